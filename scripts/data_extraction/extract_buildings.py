@@ -4,6 +4,9 @@ Extract building footprints from MassGIS database for Allston-Brighton.
 
 This script extracts the STRUCTURES_POLY layer from MassGIS and filters
 it to only include buildings within the Allston-Brighton boundary.
+When the layer is in the GeoParquet cache (massgis_parquet_cache.py), only
+the footprints near Allston-Brighton are read, from Boston's partition when
+the neighborhood boundary is available.
 
 Author: Team A
 Date: October 2025
@@ -15,6 +18,8 @@ from pathlib import Path
 import logging
 from shapely.geometry import box
 
+from massgis_parquet_cache import cache_available, read_cached_layer, town_id
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -27,13 +32,13 @@ AB_BOUNDS = {
     'north': 42.38
 }
 
+BOUNDARY_FILE = Path("data/processed/gis_layers/allston_brighton_boundary.geojson")
+
 def get_allston_brighton_boundary():
     """Get Allston-Brighton boundary for filtering."""
-    boundary_file = Path("data/processed/gis_layers/allston_brighton_boundary.geojson")
-    
-    if boundary_file.exists():
+    if BOUNDARY_FILE.exists():
         logger.info("Loading Allston-Brighton boundary...")
-        boundary_gdf = gpd.read_file(boundary_file)
+        boundary_gdf = gpd.read_file(BOUNDARY_FILE)
         return boundary_gdf
     else:
         logger.warning("Boundary not found, using bounding box...")
@@ -62,14 +67,21 @@ def extract_buildings():
     # Path to the vector database
     vector_gdb = Path("data/raw/statewide_viewer_fgdb/MassGIS_Vector_GISDATA.gdb")
     
-    if not vector_gdb.exists():
+    if not vector_gdb.exists() and not cache_available('STRUCTURES_POLY'):
         logger.error("Vector database not found!")
         return None
     
     try:
-        logger.info("Loading building footprints from MassGIS...")
-        buildings = gpd.read_file(vector_gdb, layer='STRUCTURES_POLY')
-        logger.info(f"Loaded {len(buildings):,} total building footprints")
+        if cache_available('STRUCTURES_POLY'):
+            logger.info("Loading building footprints from the GeoParquet cache...")
+            # The AB_BOUNDS fallback box reaches past Boston, so it reads every town's partition
+            town_ids = [town_id('BOSTON')] if BOUNDARY_FILE.exists() else None
+            buildings = read_cached_layer('STRUCTURES_POLY', town_ids=town_ids, bbox=boundary)
+            logger.info(f"Loaded {len(buildings):,} building footprints near Allston-Brighton")
+        else:
+            logger.info("Loading building footprints from MassGIS...")
+            buildings = gpd.read_file(vector_gdb, layer='STRUCTURES_POLY')
+            logger.info(f"Loaded {len(buildings):,} total building footprints")
         
         # Convert to WGS84
         if buildings.crs != 'EPSG:4326':
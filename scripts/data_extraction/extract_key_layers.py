@@ -3,7 +3,10 @@
 Extract key GIS layers for Allston-Brighton mapping.
 
 This script extracts the most important layers from MassGIS
-and filters them to just the Allston-Brighton area.
+and filters them to just the Allston-Brighton area. Only features in the
+area's bounding box are read, from the GeoParquet cache
+(massgis_parquet_cache.py) when the layer is there, otherwise from the
+statewide geodatabase.
 
 Author: Team A
 Date: October 2025
@@ -13,6 +16,9 @@ import geopandas as gpd
 import pandas as pd
 from pathlib import Path
 import logging
+from shapely.geometry import box
+
+from massgis_parquet_cache import cache_available, read_cached_layer
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
@@ -33,16 +39,24 @@ def extract_layer(gdb_path, layer_name, output_name):
     logger.info(f"\nExtracting: {layer_name}")
     
     try:
-        # Read the layer
-        gdf = gpd.read_file(gdb_path, layer=layer_name)
-        logger.info(f"  Total features: {len(gdf):,}")
+        # Read only the features in the bounding box (it reaches into Brookline, Newton and
+        # Cambridge, so no town filter)
+        area = gpd.GeoSeries([box(BOUNDS['min_lon'], BOUNDS['min_lat'], BOUNDS['max_lon'], BOUNDS['max_lat'])],
+                             crs='EPSG:4326')
+        if cache_available(layer_name):
+            gdf = read_cached_layer(layer_name, bbox=area)
+            logger.info(f"  Features read from the GeoParquet cache: {len(gdf):,}")
+        else:
+            gdf = gpd.read_file(gdb_path, layer=layer_name, engine="pyogrio", bbox=area)
+            logger.info(f"  Features in the bounding box: {len(gdf):,}")
         
-        # Filter to Allston-Brighton bounds
+        # Filter to Allston-Brighton bounds (in lon/lat, whatever the layer CRS)
+        bounds = gdf.geometry.bounds if gdf.crs is None or gdf.crs.to_epsg() == 4326 else gdf.geometry.to_crs(epsg=4326).bounds
         mask = (
-            (gdf.geometry.bounds['minx'] >= BOUNDS['min_lon']) &
-            (gdf.geometry.bounds['maxx'] <= BOUNDS['max_lon']) &
-            (gdf.geometry.bounds['miny'] >= BOUNDS['min_lat']) &
-            (gdf.geometry.bounds['maxy'] <= BOUNDS['max_lat'])
+            (bounds['minx'] >= BOUNDS['min_lon']) &
+            (bounds['maxx'] <= BOUNDS['max_lon']) &
+            (bounds['miny'] >= BOUNDS['min_lat']) &
+            (bounds['maxy'] <= BOUNDS['max_lat'])
         )
         
         ab_gdf = gdf[mask].copy()
@@ -7,19 +7,61 @@ MassGIS statewide database by filtering for specific towns (Boston).
 
 This is much more reliable than trying to use the terrible MassGIS website!
 
+Filters are pushed down to the reader (pyogrio): attribute filters become a
+SQL `where=` and spatial filters a `mask=` on the layer, and `columns=`
+limits the decoded fields, so only the target town's features are ever
+read out of the statewide layers. Once massgis_parquet_cache.py has been
+run, layers are read from the town-partitioned GeoParquet cache instead.
+
+Many towns and layers at once (each layer is read a single time, features
+are assigned to all the towns in one spatial-index join, and layers run in
+parallel worker processes):
+
+    python scripts/data_extraction/extract_massgis_by_town.py --towns BOSTON CAMBRIDGE --layers OPENSPACE_POLY STRUCTURES_POLY
+
 Author: Team A
 Date: October 2025
 """
 
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import geopandas as gpd
 import pandas as pd
 from pathlib import Path
 import logging
+import pyogrio
+
+from massgis_parquet_cache import CACHED_LAYERS, TOWNS_LAYER, VECTOR_GDB, cache_available, read_cached_layer
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Output names of the usual layers (others use the lower-case layer name)
+LAYER_OUTPUT_NAMES = {
+    'OPENSPACE_POLY': 'parks_openspace',
+    'CENSUS2020TIGERMAJROADS_ARC': 'major_roads',
+    'STRUCTURES_POLY': 'buildings',
+    'MBTABUSSTOPS_PT': 'mbta_bus_stops',
+}
+
+def sql_literal(value):
+    """
+    Value as an OGR SQL literal (numbers as is, strings quoted)
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+def layer_fields(gdb_path, layer_name):
+    """
+    Field names of a layer, from its metadata (no features are read)
+    """
+    return list(pyogrio.read_info(gdb_path, layer=layer_name)['fields'])
+
 def get_town_boundary(town_name="BOSTON"):
     """
     Get the boundary polygon for a specific town from MassGIS.
@@ -35,18 +77,23 @@ def get_town_boundary(town_name="BOSTON"):
     vector_gdb = Path("data/raw/statewide_viewer_fgdb/MassGIS_Vector_GISDATA.gdb")
     
     try:
-        # Read town boundaries layer (TOWNSSURVEY_POLYM is the correct layer)
-        towns = gpd.read_file(vector_gdb, layer="TOWNSSURVEY_POLYM")
-        logger.info(f"  Loaded {len(towns)} towns")
-        
-        # Filter for specific town
-        town = towns[towns['TOWN'].str.upper() == town_name.upper()].copy()
+        # Read only the town's polygon from the town boundaries layer (TOWNSSURVEY_POLYM is the correct layer)
+        if cache_available(TOWNS_LAYER):
+            town = read_cached_layer(TOWNS_LAYER, filters=[('TOWN', '=', town_name.upper())])
+        else:
+            town = gpd.read_file(vector_gdb, layer="TOWNSSURVEY_POLYM", engine="pyogrio",
+                                 where=f"TOWN ILIKE {sql_literal(town_name)}")
         
         if len(town) > 0:
             logger.info(f"  ✓ Found {town_name}")
             return town
         else:
             logger.error(f"  ✗ {town_name} not found")
+            if cache_available(TOWNS_LAYER):
+                towns = read_cached_layer(TOWNS_LAYER, columns=['TOWN'])
+            else:
+                towns = gpd.read_file(vector_gdb, layer="TOWNSSURVEY_POLYM", engine="pyogrio",
+                                      columns=['TOWN'], read_geometry=False)
             logger.info(f"  Available towns: {sorted(towns['TOWN'].unique())[:10]}...")
             return None
             
@@ -54,53 +101,57 @@ def get_town_boundary(town_name="BOSTON"):
         logger.error(f"Error getting town boundary: {e}")
         return None
 
-def extract_parcels_by_town(town_boundary, town_name="BOSTON"):
+def extract_parcels_by_town(town_boundary, town_name="BOSTON", columns=None):
     """
     Extract property parcels for a specific town.
     
     This is the key function - extracts from 2.2 million statewide parcels!
+    The town filter runs inside the reader, so only the town's parcels are decoded.
     
     Args:
         town_boundary: GeoDataFrame with town boundary polygon
         town_name: Name of town for output file
+        columns: Parcel fields to keep (default: all)
     
     Returns:
         GeoDataFrame with town's parcels
     """
     logger.info(f"\nExtracting parcels for {town_name}...")
-    logger.info("  (This may take a few minutes - 2.2M parcels to process!)")
     
     parcels_gdb = Path("data/raw/statewide_viewer_fgdb/MassGIS_L3_Parcels.gdb")
     
     try:
-        # Read parcels (this is the big one - 2.2M parcels!)
-        parcels = gpd.read_file(parcels_gdb, layer="L3_TAXPAR_POLY")
-        logger.info(f"  Loaded {len(parcels):,} total parcels")
+        if cache_available("L3_TAXPAR_POLY") and 'TOWN_ID' in town_boundary.columns:
+            # One partition read from the GeoParquet cache
+            town_parcels = read_cached_layer("L3_TAXPAR_POLY", town_ids=town_boundary['TOWN_ID'].tolist(),
+                                             columns=columns)
+            logger.info(f"  ✓ Read from the GeoParquet cache: {len(town_parcels):,} parcels")
+        else:
+            fields = layer_fields(parcels_gdb, "L3_TAXPAR_POLY")
         
-        # Check if parcels have a town field we can filter on
-        if 'TOWN_ID' in parcels.columns or 'TOWN' in parcels.columns:
-            # Easy filter by town attribute
-            town_col = 'TOWN_ID' if 'TOWN_ID' in parcels.columns else 'TOWN'
-            
-            # Get town ID from boundary
-            if 'TOWN_ID' in town_boundary.columns:
+            # Check if parcels have a town field we can filter on
+            if 'TOWN_ID' in fields and 'TOWN_ID' in town_boundary.columns:
+                # Easy filter by town attribute, evaluated by the driver
                 town_id = town_boundary['TOWN_ID'].iloc[0]
-                town_parcels = parcels[parcels[town_col] == town_id].copy()
+                if hasattr(town_id, 'item'):
+                    town_id = town_id.item()
+                where = f"TOWN_ID = {sql_literal(town_id)}"
+            elif 'TOWN' in fields:
+                where = f"TOWN ILIKE {sql_literal(town_name)}"
             else:
-                town_parcels = parcels[parcels[town_col].str.upper() == town_name.upper()].copy()
-            
-            logger.info(f"  ✓ Filtered by town attribute: {len(town_parcels):,} parcels")
-        else:
-            # Spatial filter (slower but works)
-            logger.info("  Using spatial intersection (this takes longer)...")
-            
-            # Ensure same CRS
-            if parcels.crs != town_boundary.crs:
-                town_boundary = town_boundary.to_crs(parcels.crs)
-            
-            # Spatial join
-            town_parcels = gpd.sjoin(parcels, town_boundary, predicate='intersects')
-            logger.info(f"  ✓ Spatial filter complete: {len(town_parcels):,} parcels")
+                where = None
+        
+            if where:
+                town_parcels = gpd.read_file(parcels_gdb, layer="L3_TAXPAR_POLY", engine="pyogrio",
+                                             where=where, columns=columns)
+                logger.info(f"  ✓ Filtered by town attribute ({where}): {len(town_parcels):,} parcels")
+            else:
+                # Spatial filter: only parcels intersecting the town polygon are read
+                # (geopandas reprojects the mask to the layer CRS)
+                logger.info("  Using spatial filter on the town boundary...")
+                town_parcels = gpd.read_file(parcels_gdb, layer="L3_TAXPAR_POLY", engine="pyogrio",
+                                             mask=town_boundary, columns=columns)
+                logger.info(f"  ✓ Spatial filter complete: {len(town_parcels):,} parcels")
         
         # Save to file
         output_dir = Path("data/processed/gis_layers/parcels")
@@ -118,17 +169,19 @@ def extract_parcels_by_town(town_boundary, town_name="BOSTON"):
         traceback.print_exc()
         return None
 
-def extract_layer_by_town(gdb_path, layer_name, town_boundary, output_name):
+def extract_layer_by_town(gdb_path, layer_name, town_boundary, output_name, columns=None):
     """
     Generic function to extract any layer filtered by town boundary.
     
     This is reusable for ANY layer in the MassGIS database!
+    Only features intersecting the town polygon are read from the layer.
     
     Args:
         gdb_path: Path to GeoDatabase
         layer_name: Name of layer to extract
         town_boundary: GeoDataFrame with town boundary
         output_name: Name for output file
+        columns: Fields to keep (default: all)
     
     Returns:
         GeoDataFrame with filtered data
@@ -136,16 +189,21 @@ def extract_layer_by_town(gdb_path, layer_name, town_boundary, output_name):
     logger.info(f"\nExtracting: {layer_name}")
     
     try:
-        # Read the layer
-        gdf = gpd.read_file(gdb_path, layer=layer_name)
-        logger.info(f"  Total features: {len(gdf):,}")
-        
-        # Ensure same CRS
-        if gdf.crs != town_boundary.crs:
-            town_boundary = town_boundary.to_crs(gdf.crs)
-        
-        # Spatial join to filter
-        filtered = gpd.sjoin(gdf, town_boundary, predicate='intersects')
+        if cache_available(layer_name) and 'TOWN_ID' in town_boundary.columns:
+            # The cache partitions hold every feature intersecting each town
+            filtered = read_cached_layer(layer_name, town_ids=town_boundary['TOWN_ID'].tolist(), columns=columns)
+        else:
+            # Spatial filter inside the reader (the mask is reprojected to the layer CRS)
+            filtered = gpd.read_file(gdb_path, layer=layer_name, engine="pyogrio",
+                                     mask=town_boundary, columns=columns)
+
+        # Attach the town attributes (TOWN, TOWN_ID, ...) to each feature
+        if filtered.crs != town_boundary.crs:
+            town_boundary = town_boundary.to_crs(filtered.crs)
+        # Town fields the layer already carries come from the boundary instead of getting _left/_right suffixes
+        overlap = [c for c in town_boundary.columns if c in filtered.columns and c != filtered.geometry.name]
+        filtered = gpd.sjoin(filtered.drop(columns=overlap), town_boundary, predicate='intersects')
+        filtered = filtered.drop(columns=['index_right'], errors='ignore')
         logger.info(f"  Town features: {len(filtered):,}")
         
         if len(filtered) > 0:
@@ -154,10 +212,6 @@ def extract_layer_by_town(gdb_path, layer_name, town_boundary, output_name):
             output_dir.mkdir(parents=True, exist_ok=True)
             
             output_file = output_dir / f"{output_name}.geojson"
-            
-            # Drop the join index columns
-            filtered = filtered.drop(columns=['index_right'], errors='ignore')
-            
             filtered.to_file(output_file, driver="GeoJSON")
             logger.info(f"  ✓ Saved to: {output_file}")
             
@@ -170,6 +224,116 @@ def extract_layer_by_town(gdb_path, layer_name, town_boundary, output_name):
         logger.error(f"  ✗ Error: {e}")
         return None
 
+def get_town_boundaries(town_names):
+    """
+    Boundary polygons of several towns in one read (TOWN, TOWN_ID, geometry).
+    Names that match no town are logged and skipped.
+    """
+    names = [name.upper() for name in town_names]
+    if cache_available(TOWNS_LAYER):
+        towns = read_cached_layer(TOWNS_LAYER, filters=[('TOWN', 'in', names)])
+    else:
+        # MassGIS town names are upper case
+        towns = gpd.read_file(VECTOR_GDB, layer=TOWNS_LAYER, engine="pyogrio",
+                              where=f"TOWN IN ({', '.join(sql_literal(name) for name in names)})")
+    towns = towns.assign(TOWN=towns['TOWN'].str.upper())
+
+    missing = sorted(set(names) - set(towns['TOWN']))
+    if missing:
+        logger.error(f"  ✗ Towns not found: {', '.join(missing)}")
+    return towns.reset_index(drop=True)
+
+def town_output_file(town_name, layer_name):
+    if layer_name == 'L3_TAXPAR_POLY':
+        return Path("data/processed/gis_layers/parcels") / f"{town_name.lower()}_parcels.geojson"
+    output_name = LAYER_OUTPUT_NAMES.get(layer_name, layer_name.lower())
+    return Path("data/processed/gis_layers") / f"{town_name.lower()}_{output_name}.geojson"
+
+def extract_layer_for_towns(layer_name, towns, gdb_path=None):
+    """
+    Read one layer once and write a GeoJSON per town.
+
+    Features are assigned to towns by TOWN_ID when the layer has it, otherwise
+    with a single sjoin against all the town polygons (a feature crossing a
+    town line goes to both towns).
+
+    Returns:
+        {town name: features written}
+    """
+    gdb_path = gdb_path or CACHED_LAYERS.get(layer_name, VECTOR_GDB)
+    start = time.perf_counter()
+
+    if cache_available(layer_name):
+        gdf = read_cached_layer(layer_name, town_ids=towns['TOWN_ID'].tolist())
+        source = "GeoParquet cache"
+    elif 'TOWN_ID' in layer_fields(gdb_path, layer_name):
+        town_ids = ', '.join(sql_literal(int(town_id)) for town_id in towns['TOWN_ID'])
+        gdf = gpd.read_file(gdb_path, layer=layer_name, engine="pyogrio", where=f"TOWN_ID IN ({town_ids})")
+        source = gdb_path
+    else:
+        # Only features intersecting one of the towns are read
+        gdf = gpd.read_file(gdb_path, layer=layer_name, engine="pyogrio", mask=towns)
+        source = gdb_path
+    logger.info(f"  {layer_name}: read {len(gdf):,} features from {source} ({time.perf_counter() - start:.1f}s)")
+
+    if 'TOWN_ID' in gdf.columns:
+        town_index = pd.Series(towns.index, index=towns['TOWN_ID'].astype(int))
+        matched = gdf['TOWN_ID'].astype(int).isin(town_index.index)
+        assigned = gdf[matched].assign(index_right=town_index.loc[gdf.loc[matched, 'TOWN_ID'].astype(int)].values)
+    else:
+        layer_towns = towns[['geometry']].to_crs(gdf.crs) if gdf.crs is not None else towns[['geometry']]
+        assigned = gpd.sjoin(gdf, layer_towns, predicate='intersects')
+
+    counts = {}
+    for town_idx, town_features in assigned.groupby('index_right'):
+        town_name = towns.loc[town_idx, 'TOWN']
+        output_file = town_output_file(town_name, layer_name)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        town_features.drop(columns=['index_right']).to_file(output_file, driver="GeoJSON")
+        counts[town_name] = len(town_features)
+    logger.info(f"  ✓ {layer_name}: {len(counts)} towns written ({time.perf_counter() - start:.1f}s)")
+    return counts
+
+def extract_layers_by_towns(town_names, layer_names, workers=None):
+    """
+    Extract several layers for several towns, one read per layer.
+
+    Layers are processed in parallel worker processes (at most `workers`,
+    default one per layer up to the CPU count).
+
+    Returns:
+        {layer name: {town name: features written}}
+    """
+    logger.info("="*60)
+    logger.info(f"BATCH EXTRACTION: {len(layer_names)} layers x {len(town_names)} towns")
+    logger.info("="*60)
+
+    towns = get_town_boundaries(town_names)
+    if towns.empty:
+        logger.error("No towns to extract. Exiting.")
+        return {}
+
+    workers = workers or min(len(layer_names), os.cpu_count() or 1)
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(extract_layer_for_towns, layer_name, towns): layer_name for layer_name in layer_names}
+        for future in as_completed(futures):
+            layer_name = futures[future]
+            try:
+                results[layer_name] = future.result()
+            except Exception as e:
+                logger.error(f"  ✗ Error extracting {layer_name}: {e}")
+
+    logger.info("\n" + "="*60)
+    logger.info("BATCH EXTRACTION COMPLETE!")
+    logger.info("="*60)
+    for layer_name in layer_names:
+        for town_name in towns['TOWN']:
+            count = results.get(layer_name, {}).get(town_name)
+            if count:
+                logger.info(f"  ✓ {town_output_file(town_name, layer_name)} ({count:,} features)")
+    return results
+
 def main():
     """
     Main function - Extract key layers for Allston-Brighton/Boston.
@@ -223,7 +387,7 @@ def main():
             f.write(f"### Boston Parcels\n")
             f.write(f"- Features: {len(parcels):,}\n")
             f.write(f"- File: `parcels/boston_parcels.geojson`\n")
-            f.write(f"- Source: L3_TAXPAR_POLY (from 2.2M statewide parcels)\n\n")
+            f.write(f"- Source: L3_TAXPAR_POLY (from 2.2M statewide parcels, filtered in the reader)\n\n")
         
         for name, data in extracted.items():
             f.write(f"### {name}\n")
@@ -269,4 +433,15 @@ def main():
     logger.info("="*60)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='Extract MassGIS layers by town')
+    parser.add_argument('--towns', nargs='+', default=None, help='Towns to extract (e.g. BOSTON CAMBRIDGE)')
+    parser.add_argument('--layers', nargs='+', default=None, help='Layers to extract for every town')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per layer)')
+    args = parser.parse_args()
+
+    if args.towns or args.layers:
+        extract_layers_by_towns(args.towns or ["BOSTON"],
+                                args.layers or ['L3_TAXPAR_POLY', 'OPENSPACE_POLY', 'CENSUS2020TIGERMAJROADS_ARC'],
+                                args.workers)
+    else:
+        main()
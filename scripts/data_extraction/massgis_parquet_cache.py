@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Town-partitioned GeoParquet cache of the MassGIS file geodatabases.
+
+Every extractor used to re-open MassGIS_Vector_GISDATA.gdb or
+MassGIS_L3_Parcels.gdb and decode whole statewide layers. This script is a
+one-time conversion: each layer the extractors use is streamed out of the
+geodatabase once and written to
+
+    data/processed/massgis_parquet/<LAYER>/TOWN_ID=<id>/part-0.parquet
+
+- Layers with a TOWN_ID field (parcels, towns) are partitioned on it
+- Other layers are assigned to every town polygon they intersect (one
+  STRtree query per batch), so a road crossing a town line is in both
+  partitions; features outside every town go to TOWN_ID=0
+- Each partition is sorted along a Hilbert curve and written with a GeoParquet
+  bbox covering column and row-group statistics, so bbox reads skip row
+  groups instead of decoding them
+
+The extractors call read_cached_layer() when a layer is cached and fall back
+to the geodatabase otherwise, so extracting any town or layer is a partition
+read instead of a statewide one.
+
+Usage (from the repository root):
+    python scripts/data_extraction/massgis_parquet_cache.py
+    python scripts/data_extraction/massgis_parquet_cache.py --layers L3_TAXPAR_POLY STRUCTURES_POLY
+
+Author: Team A
+Date: October 2025
+"""
+
+import argparse
+import json
+import logging
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pyogrio
+import shapely
+from pyproj import CRS
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+VECTOR_GDB = Path("data/raw/statewide_viewer_fgdb/MassGIS_Vector_GISDATA.gdb")
+PARCELS_GDB = Path("data/raw/statewide_viewer_fgdb/MassGIS_L3_Parcels.gdb")
+CACHE_DIR = Path("data/processed/massgis_parquet")
+
+TOWNS_LAYER = 'TOWNSSURVEY_POLYM'
+
+# Layers the extractors read, and the geodatabase each comes from
+CACHED_LAYERS = {
+    TOWNS_LAYER: VECTOR_GDB,
+    'L3_TAXPAR_POLY': PARCELS_GDB,
+    'STRUCTURES_POLY': VECTOR_GDB,
+    'OPENSPACE_POLY': VECTOR_GDB,
+    'CENSUS2020TIGERMAJROADS_ARC': VECTOR_GDB,
+    'MBTABUSSTOPS_PT': VECTOR_GDB,
+}
+
+TOWN_FIELD = 'TOWN_ID'
+# Position of the feature in the source layer, to drop duplicates of
+# features stored under several towns
+FEATURE_ID = 'MASSGIS_FID'
+# Partition for features outside every town polygon
+NO_TOWN = 0
+
+CACHE_INFO_FILE = '_cache_info.json'
+
+def cache_info(layer, cache_dir=CACHE_DIR):
+    """
+    The conversion record of a cached layer, or None if it is not cached
+    """
+    info_file = Path(cache_dir) / layer / CACHE_INFO_FILE
+    if not info_file.exists():
+        return None
+    with open(info_file) as f:
+        return json.load(f)
+
+def cache_available(layer, cache_dir=CACHE_DIR):
+    return cache_info(layer, cache_dir) is not None
+
+def load_towns(gdb_path=VECTOR_GDB):
+    """
+    TOWN_ID and polygon of every town, straight from the geodatabase
+    """
+    return gpd.read_file(gdb_path, layer=TOWNS_LAYER, engine="pyogrio", columns=[TOWN_FIELD])
+
+def _town_assignments(table, geometry_name, tree, tree_town_ids):
+    """
+    (row positions, town ids): each row once per town polygon it intersects,
+    rows that intersect none once under NO_TOWN
+    """
+    geometries = shapely.from_wkb(table.column(geometry_name).to_numpy(zero_copy_only=False))
+    feature_idx, town_idx = tree.query(geometries, predicate='intersects')
+    outside = np.setdiff1d(np.arange(table.num_rows), feature_idx)
+    rows = np.concatenate([feature_idx, outside])
+    town_ids = np.concatenate([tree_town_ids[town_idx], np.full(len(outside), NO_TOWN)])
+    return rows, town_ids
+
+def convert_layer(layer, gdb_path, towns, cache_dir=CACHE_DIR, batch_size=100_000, row_group_size=10_000):
+    """
+    Stream one layer out of the geodatabase into town partitions.
+
+    Pass 1 reads Arrow batches, tags each row with its town and writes the
+    batch sorted by town to a staging file. Pass 2 reads each town back from
+    the staging files (row-group statistics skip the other towns) and writes
+    its partition. Only one batch or one town is in memory at a time.
+
+    Returns:
+        The cache info record
+    """
+    from shapely import STRtree
+
+    logger.info(f"\nCaching: {layer}")
+    start = time.perf_counter()
+
+    layer_dir = Path(cache_dir) / layer
+    staging_dir = Path(cache_dir) / f"_{layer}_staging"
+    shutil.rmtree(layer_dir, ignore_errors=True)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    staging_dir.mkdir(parents=True)
+
+    info = pyogrio.read_info(gdb_path, layer=layer)
+    by_attribute = TOWN_FIELD in list(info['fields'])
+
+    features = 0
+    partitions = set()
+    with pyogrio.open_arrow(gdb_path, layer=layer, batch_size=batch_size, use_pyarrow=True) as (meta, reader):
+        crs = CRS.from_user_input(meta['crs']).to_string() if meta['crs'] else None
+        geometry_name = meta['geometry_name'] or 'wkb_geometry'
+        if not by_attribute:
+            layer_towns = towns.to_crs(crs) if crs and towns.crs != crs else towns
+            tree = STRtree(layer_towns.geometry.values)
+            tree_town_ids = layer_towns[TOWN_FIELD].to_numpy(dtype=np.int32)
+
+        for batch_no, batch in enumerate(reader):
+            table = pa.Table.from_batches([batch])
+            table = table.append_column(FEATURE_ID, pa.array(np.arange(features, features + table.num_rows)))
+            features += table.num_rows
+
+            if by_attribute:
+                town_ids = table.column(TOWN_FIELD).fill_null(NO_TOWN).to_numpy().astype(np.int32)
+                table = table.drop_columns([TOWN_FIELD])
+            else:
+                rows, town_ids = _town_assignments(table, geometry_name, tree, tree_town_ids)
+                table = table.take(pa.array(rows))
+
+            order = np.argsort(town_ids, kind='stable')
+            table = table.take(pa.array(order)).append_column(TOWN_FIELD, pa.array(town_ids[order]))
+            partitions.update(np.unique(town_ids).tolist())
+            pq.write_table(table, staging_dir / f"part-{batch_no:05d}.parquet", row_group_size=row_group_size)
+            logger.info(f"  Read {features:,} features")
+
+    staging = ds.dataset(staging_dir, format='parquet')
+    for town_id in sorted(partitions):
+        town_table = staging.to_table(filter=ds.field(TOWN_FIELD) == town_id).drop_columns([TOWN_FIELD])
+        geometry = shapely.from_wkb(town_table.column(geometry_name).to_numpy(zero_copy_only=False))
+        town = gpd.GeoDataFrame(town_table.drop_columns([geometry_name]).to_pandas(), geometry=geometry, crs=crs)
+
+        # Nearby features in the same row groups keep the bbox statistics tight
+        located = town.geometry.notna() & ~town.geometry.is_empty
+        if located.all():
+            town = town.iloc[np.argsort(town.geometry.hilbert_distance())]
+        town = town.reset_index(drop=True)
+
+        partition_dir = layer_dir / f"{TOWN_FIELD}={town_id}"
+        partition_dir.mkdir(parents=True)
+        town.to_parquet(partition_dir / "part-0.parquet", index=False, write_covering_bbox=True,
+                        row_group_size=row_group_size)
+    shutil.rmtree(staging_dir)
+
+    record = {
+        'layer': layer,
+        'source': str(gdb_path),
+        'source_modified': datetime.fromtimestamp(Path(gdb_path).stat().st_mtime).isoformat(),
+        'crs': crs,
+        'features': features,
+        'towns': len(partitions),
+        'partitioned_by': 'attribute' if by_attribute else 'intersects',
+        'created': datetime.now().isoformat(),
+    }
+    with open(layer_dir / CACHE_INFO_FILE, 'w') as f:
+        json.dump(record, f, indent=2)
+
+    logger.info(f"  ✓ {features:,} features in {len(partitions)} town partitions "
+                f"({time.perf_counter() - start:.1f}s) -> {layer_dir}")
+    return record
+
+def read_cached_layer(layer, town_ids=None, bbox=None, columns=None, filters=None, cache_dir=CACHE_DIR):
+    """
+    Read a cached layer, only touching the partitions and row groups needed.
+
+    Args:
+        layer: Layer name (a key of CACHED_LAYERS)
+        town_ids: TOWN_IDs to read (default: all towns)
+        bbox: (minx, miny, maxx, maxy) in the layer CRS, or a GeoDataFrame /
+              GeoSeries whose bounds are used (reprojected to the layer CRS)
+        columns: Fields to keep (default: all)
+        filters: Extra pyarrow filters, e.g. [('TOWN', '=', 'BOSTON')]
+
+    Returns:
+        GeoDataFrame in the layer CRS. TOWN_ID is kept only when it is a field of
+        the source layer, and a feature in several of the requested towns is returned once.
+    """
+    info = cache_info(layer, cache_dir)
+    if info is None:
+        raise FileNotFoundError(f"{layer} is not cached in {cache_dir} - run massgis_parquet_cache.py first")
+
+    if isinstance(bbox, (gpd.GeoDataFrame, gpd.GeoSeries)):
+        if info['crs'] and bbox.crs is not None:
+            bbox = bbox.to_crs(info['crs'])
+        bbox = tuple(bbox.total_bounds)
+
+    filters = list(filters or [])
+    if town_ids is not None:
+        filters.append((TOWN_FIELD, 'in', [int(town_id) for town_id in town_ids]))
+    if columns is not None:
+        columns = list(dict.fromkeys(list(columns) + [FEATURE_ID, 'geometry']))
+
+    gdf = gpd.read_parquet(Path(cache_dir) / layer, columns=columns, filters=filters or None, bbox=bbox)
+
+    if info['partitioned_by'] == 'intersects':
+        gdf = gdf.drop_duplicates(FEATURE_ID).drop(columns=[TOWN_FIELD], errors='ignore')
+    return gdf.drop(columns=[FEATURE_ID, 'bbox'], errors='ignore').reset_index(drop=True)
+
+def town_id(town_name, cache_dir=CACHE_DIR):
+    """
+    TOWN_ID of a town (e.g. BOSTON -> 35) from the cached towns layer
+    """
+    towns = read_cached_layer(TOWNS_LAYER, columns=['TOWN', TOWN_FIELD],
+                              filters=[('TOWN', '=', town_name.upper())], cache_dir=cache_dir)
+    if towns.empty:
+        raise ValueError(f"Town {town_name} not found in the cached {TOWNS_LAYER}")
+    return int(towns[TOWN_FIELD].iloc[0])
+
+def main(layers=None, cache_dir=CACHE_DIR, batch_size=100_000, row_group_size=10_000):
+    """
+    Convert the listed layers (default: all CACHED_LAYERS) to town-partitioned GeoParquet.
+    """
+    logger.info("="*60)
+    logger.info("MASSGIS GEOPARQUET CACHE")
+    logger.info("="*60)
+
+    layers = layers or list(CACHED_LAYERS)
+    unknown = [layer for layer in layers if layer not in CACHED_LAYERS]
+    if unknown:
+        logger.error(f"Unknown layers: {', '.join(unknown)} (choose from {', '.join(CACHED_LAYERS)})")
+        return False
+
+    # Town lookups (town_id) need the towns layer in the cache too
+    if TOWNS_LAYER not in layers and not cache_available(TOWNS_LAYER, cache_dir):
+        layers = [TOWNS_LAYER] + layers
+
+    towns = load_towns()
+    logger.info(f"Loaded {len(towns)} town polygons")
+
+    for layer in layers:
+        gdb_path = CACHED_LAYERS[layer]
+        try:
+            convert_layer(layer, gdb_path, towns, cache_dir, batch_size, row_group_size)
+        except Exception as e:
+            logger.error(f"  ✗ Error caching {layer}: {e}")
+            import traceback
+            traceback.print_exc()
+
+    logger.info("\n" + "="*60)
+    logger.info(f"Cache ready in: {cache_dir}")
+    logger.info("="*60)
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert MassGIS layers to a town-partitioned GeoParquet cache')
+    parser.add_argument('--layers', nargs='+', default=None, help='Layers to convert (default: all used layers)')
+    parser.add_argument('--cache-dir', type=Path, default=CACHE_DIR)
+    parser.add_argument('--batch-size', type=int, default=100_000, help='Features read from the geodatabase at a time')
+    parser.add_argument('--row-group-size', type=int, default=10_000, help='Rows per Parquet row group')
+    args = parser.parse_args()
+
+    main(args.layers, args.cache_dir, args.batch_size, args.row_group_size)
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Local address-point index: forward geocoding without the network
+
+Address points are built once from data we already hold:
+
+- building footprints (allston_brighton_buildings.geojson) joined on
+  STRUCT_ID to building_property_with_suffix.csv for ST_NUM / ST_NAME / ZIP
+- parcel polygons (allston_brighton_parcels.geojson) joined on
+  MAP_PAR_ID = GIS_ID to the FY assessment CSV
+
+Each point is the footprint's or parcel's representative point (always
+inside the polygon). When both sources have an address, the building wins.
+Ranges such as "12-16" register every number on that side of the street.
+The points are saved to data/processed/address_points.parquet.
+
+At lookup time an address is normalized with geocode_cache.normalize_street
+and resolved by:
+
+1. exact  - a hash lookup on "NUMBER STREET|ZIP"
+2. interpolated - linear interpolation between the nearest lower and higher
+   known numbers on the same side (parity) of the same street in the same
+   ZIP, if they are at most `max_gap` numbers apart
+3. nearest - the closest known number on that side, if it is at most
+   `max_snap` numbers away
+
+As in geocode_cache, a lookup with a ZIP only uses points in that ZIP (the
+same street name exists in several neighborhoods). A lookup without one
+uses the address's or street's points when they all share a single ZIP.
+
+A lookup is a dict probe or a bisect over a short list, so it takes
+microseconds. Nominatim stays as the last-resort fallback in the callers.
+
+Usage (from the repository root):
+    python scripts/data_processing/address_point_index.py --build
+    python scripts/data_processing/address_point_index.py --lookup "12 North Harvard Street" --zip 02134
+"""
+
+import argparse
+import logging
+import re
+import time
+from bisect import bisect_left
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+from geocode_cache import normalize_street, normalize_zip
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_ADDRESS_POINTS_PATH = str(REPO_ROOT / 'data' / 'processed' / 'address_points.parquet')
+DEFAULT_BUILDINGS_GEOJSON = str(REPO_ROOT / 'data' / 'processed' / 'gis_layers' / 'allston_brighton_buildings.geojson')
+DEFAULT_BUILDING_PROPERTY_CSV = str(REPO_ROOT / 'web_app' / 'data' / 'processed' / 'building_property_with_suffix.csv')
+DEFAULT_PARCELS_GEOJSON = str(REPO_ROOT / 'data' / 'processed' / 'gis_layers' / 'allston_brighton_parcels.geojson')
+DEFAULT_ASSESSMENT_CSV = str(REPO_ROOT / 'data' / 'raw' / 'fy2025-property-assessment-data_12_30_2024.csv')
+
+ADDRESS_POINT_COLUMNS = ['number', 'letter', 'street', 'zip', 'latitude', 'longitude', 'source']
+
+# Lower wins when two sources give a point for the same address
+SOURCE_PRIORITY = {'building': 0, 'parcel': 1}
+
+# Longest house-number range ("12-40") expanded into individual numbers
+MAX_RANGE_SPAN = 40
+
+_HOUSE_NUMBER = re.compile(r'^\s*(\d+)\s*([A-Z]?)(?:\s*-\s*(\d+)[A-Z]?)?\b')
+_QUERY = re.compile(r'^(\d+)([A-Z]?)(?:\s*-\s*\d+[A-Z]?)?\s+(.+)$')
+# Everything from a unit designator or a comma on ("..., Boston MA", "APT 2")
+_QUERY_TAIL = re.compile(r'\s*(?:,|#|\bAPT\b|\bUNIT\b|\bSTE\b|\bSUITE\b|\bFL\b).*$')
+
+@lru_cache(maxsize=65536)
+def split_address(address):
+    """
+    '12A North Harvard Street, Apt 2' -> (12, 'A', 'N HARVARD ST')
+
+    Returns (number, letter, normalized street) or None without a house number.
+    """
+    if address is None:
+        return None
+    text = _QUERY_TAIL.sub('', str(address).upper())
+    text = re.sub(r'^(\d+)\.0\b', r'\1', text.strip())
+    match = _QUERY.match(text)
+    if not match:
+        return None
+    street = normalize_street(match.group(3))
+    if not street:
+        return None
+    return int(match.group(1)), match.group(2), street
+
+def _expand_numbers(frame):
+    """
+    One row per house number from raw ST_NUM strings ("12", "12A", "12-16")
+    """
+    parts = frame['st_num'].astype(str).str.upper().str.extract(_HOUSE_NUMBER)
+    frame = frame.assign(number=pd.to_numeric(parts[0], errors='coerce'),
+                         letter=parts[1].fillna(''),
+                         number_end=pd.to_numeric(parts[2], errors='coerce'))
+    frame = frame[frame['number'].notna()].copy()
+    frame['number'] = frame['number'].astype(int)
+
+    is_range = (frame['number_end'].notna() & (frame['number_end'] > frame['number'])
+                & (frame['number_end'] - frame['number'] <= MAX_RANGE_SPAN))
+    # Only the start's side of the street: "12-15" is 12 and 14
+    frame['number'] = [
+        list(range(start, int(end) + 1, 2)) if expand else start
+        for start, end, expand in zip(frame['number'], frame['number_end'], is_range)
+    ]
+    return frame.explode('number').astype({'number': int}).drop(columns=['number_end', 'st_num'])
+
+def _normalize_points(frame, source):
+    """
+    st_num / st_name / zip / latitude / longitude -> ADDRESS_POINT_COLUMNS
+    """
+    frame = frame.dropna(subset=['st_num', 'st_name', 'latitude', 'longitude'])
+    streets = {name: normalize_street(name) for name in frame['st_name'].unique()}
+    zips = {code: normalize_zip(code) for code in frame['zip'].unique()}
+    frame = frame.assign(street=frame['st_name'].map(streets), zip=frame['zip'].map(zips), source=source)
+    frame = _expand_numbers(frame[frame['street'] != ''])
+    return frame[ADDRESS_POINT_COLUMNS]
+
+def _representative_points(path, id_column):
+    """
+    id_column -> latitude / longitude of a point inside each polygon in a GeoJSON
+    """
+    import geopandas as gpd
+
+    shapes = gpd.read_file(path, columns=[id_column])
+    if shapes.crs is not None and shapes.crs.to_epsg() != 4326:
+        shapes = shapes.to_crs(epsg=4326)
+    shapes = shapes[shapes.geometry.notna() & ~shapes.geometry.is_empty]
+    points = shapes.geometry.representative_point()
+    return pd.DataFrame({id_column: shapes[id_column].astype(str).values,
+                         'latitude': points.y.values, 'longitude': points.x.values})
+
+def building_points(buildings_geojson=DEFAULT_BUILDINGS_GEOJSON, building_csv=DEFAULT_BUILDING_PROPERTY_CSV):
+    """
+    Address points from building footprints and their assessed addresses
+    """
+    addresses = pd.read_csv(building_csv, usecols=['STRUCT_ID', 'ST_NUM', 'ST_NAME', 'ZIP_CODE'], dtype=str)
+    points = _representative_points(buildings_geojson, 'STRUCT_ID').merge(addresses, on='STRUCT_ID')
+    points = points.rename(columns={'ST_NUM': 'st_num', 'ST_NAME': 'st_name', 'ZIP_CODE': 'zip'})
+    return _normalize_points(points, 'building')
+
+def parcel_points(parcels_geojson=DEFAULT_PARCELS_GEOJSON, assessment_csv=DEFAULT_ASSESSMENT_CSV):
+    """
+    Address points from parcel polygons and the FY assessment addresses
+    """
+    addresses = pd.read_csv(assessment_csv, usecols=['GIS_ID', 'ST_NUM', 'ST_NAME', 'ZIP_CODE'], dtype=str)
+    addresses = addresses.drop_duplicates(['GIS_ID', 'ST_NUM', 'ST_NAME'])
+    points = _representative_points(parcels_geojson, 'MAP_PAR_ID').merge(
+        addresses, left_on='MAP_PAR_ID', right_on='GIS_ID')
+    points = points.rename(columns={'ST_NUM': 'st_num', 'ST_NAME': 'st_name', 'ZIP_CODE': 'zip'})
+    return _normalize_points(points, 'parcel')
+
+def build_address_points(sources):
+    """
+    Combine point frames, keeping the highest-priority source per address
+    """
+    points = pd.concat([frame for frame in sources if frame is not None and len(frame)], ignore_index=True)
+    points = points.sort_values('source', key=lambda s: s.map(SOURCE_PRIORITY), kind='stable')
+    points = points.drop_duplicates(['number', 'letter', 'street', 'zip'], keep='first')
+    return points.sort_values(['street', 'number', 'letter']).reset_index(drop=True)
+
+class AddressPointIndex:
+    """
+    In-memory exact-match hash plus per-street interpolation tables.
+
+    Args:
+        points: DataFrame with ADDRESS_POINT_COLUMNS
+        max_gap: Largest number gap interpolated across on one side of a street
+        max_snap: Largest number distance for snapping to the nearest known point
+    """
+
+    def __init__(self, points, max_gap=40, max_snap=6):
+        self.max_gap = max_gap
+        self.max_snap = max_snap
+        self.exact = {}
+        house_zips = {}
+        for number, letter, street, zip_code, latitude, longitude in points[
+                ['number', 'letter', 'street', 'zip', 'latitude', 'longitude']].itertuples(index=False):
+            house = f"{number}{letter} {street}"
+            self.exact.setdefault(f"{house}|{zip_code}", (float(latitude), float(longitude)))
+            house_zips.setdefault(house, set()).add(zip_code)
+        # ZIP-less keys only where the address is in a single ZIP
+        for house, zip_codes in house_zips.items():
+            if len(zip_codes) == 1:
+                self.exact.setdefault(f"{house}|", self.exact[f"{house}|{next(iter(zip_codes))}"])
+
+        # (street, zip, parity) -> sorted numbers and their mean coordinates
+        self.segments = {}
+        self.street_zips = points.groupby('street')['zip'].unique().map(list).to_dict()
+        plain = points[points['letter'] == '']
+        by_number = plain.groupby(['street', 'zip', 'number'], sort=True)[['latitude', 'longitude']].mean().reset_index()
+        by_number['parity'] = by_number['number'] % 2
+        for (street, zip_code, parity), group in by_number.groupby(['street', 'zip', 'parity'], sort=False):
+            self.segments[(street, zip_code, parity)] = (group['number'].tolist(), group['latitude'].tolist(),
+                                                         group['longitude'].tolist())
+
+    def __len__(self):
+        return len(self.exact)
+
+    @classmethod
+    def load(cls, path=DEFAULT_ADDRESS_POINTS_PATH, **kwargs):
+        return cls(pd.read_parquet(path), **kwargs)
+
+    def _along_street(self, number, street, zip_code):
+        if not zip_code:
+            # Without a ZIP, only a street that lies in a single ZIP can be interpolated
+            zip_codes = self.street_zips.get(street, [])
+            if len(zip_codes) != 1:
+                return None
+            zip_code = zip_codes[0]
+        segment = self.segments.get((street, zip_code, number % 2))
+        if segment is None:
+            return None
+        numbers, latitudes, longitudes = segment
+        i = bisect_left(numbers, number)
+        if 0 < i < len(numbers) and numbers[i] - numbers[i - 1] <= self.max_gap:
+            lo, hi = numbers[i - 1], numbers[i]
+            t = (number - lo) / (hi - lo)
+            return (latitudes[i - 1] + t * (latitudes[i] - latitudes[i - 1]),
+                    longitudes[i - 1] + t * (longitudes[i] - longitudes[i - 1]), 'interpolated')
+        nearest = min((j for j in (i - 1, i) if 0 <= j < len(numbers)), key=lambda j: abs(numbers[j] - number))
+        if abs(numbers[nearest] - number) <= self.max_snap:
+            return latitudes[nearest], longitudes[nearest], 'nearest'
+        return None
+
+    def resolve(self, address, zip_code=None):
+        """
+        (latitude, longitude, method) for an address, or None if it cannot be placed locally
+        """
+        parsed = split_address(address)
+        if parsed is None:
+            return None
+        number, letter, street = parsed
+        zip_code = normalize_zip(zip_code)
+        coords = self.exact.get(f"{number}{letter} {street}|{zip_code}")
+        if coords is None and letter:
+            coords = self.exact.get(f"{number} {street}|{zip_code}")
+        if coords is not None:
+            return coords[0], coords[1], 'exact'
+        return self._along_street(number, street, zip_code)
+
+_local = None
+_local_loaded = False
+
+def local_index(path=DEFAULT_ADDRESS_POINTS_PATH):
+    """
+    Process-wide AddressPointIndex from the saved points (None if not built yet)
+    """
+    global _local, _local_loaded
+    if not _local_loaded:
+        _local_loaded = True
+        if Path(path).exists():
+            _local = AddressPointIndex.load(path)
+            logger.info(f"📍 Loaded {len(_local):,} local address keys from {path}")
+        else:
+            logger.warning(f"⚠️  No address points at {path}; run address_point_index.py --build")
+    return _local
+
+def geocode_local(address, zip_code=None):
+    """
+    (latitude, longitude, method) from the local index, or None
+    """
+    index = local_index()
+    return index.resolve(address, zip_code) if index is not None else None
+
+def build(args):
+    sources = []
+    for name, loader, paths in (
+        ('building', building_points, (args.buildings, args.building_csv)),
+        ('parcel', parcel_points, (args.parcels, args.assessment_csv)),
+    ):
+        missing = [p for p in paths if not Path(p).exists()]
+        if missing:
+            logger.warning(f"⚠️  Skipping {name} points, missing: {', '.join(missing)}")
+            continue
+        frame = loader(*paths)
+        logger.info(f"🏠 {len(frame):,} {name} address points")
+        sources.append(frame)
+    if not sources:
+        logger.error("❌ No address point sources found")
+        return None
+
+    points = build_address_points(sources)
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    points.to_parquet(args.output, index=False, compression='zstd')
+    logger.info(f"💾 Wrote {len(points):,} address points on {points['street'].nunique():,} streets to {args.output}")
+    return points
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Build or query the local address-point index')
+    parser.add_argument('--build', action='store_true', help='Rebuild address points from the sources')
+    parser.add_argument('--buildings', default=DEFAULT_BUILDINGS_GEOJSON)
+    parser.add_argument('--building-csv', default=DEFAULT_BUILDING_PROPERTY_CSV)
+    parser.add_argument('--parcels', default=DEFAULT_PARCELS_GEOJSON)
+    parser.add_argument('--assessment-csv', default=DEFAULT_ASSESSMENT_CSV)
+    parser.add_argument('--output', default=DEFAULT_ADDRESS_POINTS_PATH)
+    parser.add_argument('--lookup', default=None, help='Address to resolve')
+    parser.add_argument('--zip', default=None, help='ZIP code for --lookup')
+    args = parser.parse_args()
+
+    if args.build:
+        build(args)
+    if args.lookup:
+        index = AddressPointIndex.load(args.output)
+        start = time.perf_counter()
+        result = index.resolve(args.lookup, args.zip)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        if result:
+            logger.info(f"✅ {args.lookup}: {result[0]:.6f}, {result[1]:.6f} ({result[2]}, {elapsed_us:.0f} µs)")
+        else:
+            logger.info(f"❌ {args.lookup}: not resolvable locally ({elapsed_us:.0f} µs)")
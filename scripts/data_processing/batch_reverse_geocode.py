@@ -1,84 +1,119 @@
 #!/usr/bin/env python3
 """
 Batch reverse geocoding for all buildings.
-Processes buildings in batches to avoid overwhelming the service.
+Buildings are first resolved locally against the addressed parcels
+(parcel_reverse_geocoder.py); only the unmatched ones are sent to the
+service, in batches to avoid overwhelming it.
+
+Building points are streamed in chunks, results are appended to a JSON-lines
+file as they come in, and every processed building ID to a checkpoint log
+(with its status: geocoded, or no_result when the service errored or found
+nothing), so an interrupted run resumes where it stopped. The combined JSON
+array is exported at the end.
 """
 
+import argparse
 import json
 import time
 import urllib.request
 import urllib.parse
 from pathlib import Path
 import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scraping'))
+
+from geocode_cache import shared_cache
+from parcel_reverse_geocoder import ParcelReverseGeocoder, iter_building_points
+from structured_logging import event, setup_logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+BUILDINGS_FILE = Path("data/processed/gis_layers/allston_brighton_building_points.geojson")
+RESULTS_FILE = Path("data/processed/geocoded_buildings.jsonl")
+CHECKPOINT_FILE = Path("data/processed/batch_reverse_geocode.done")
+DEFAULT_LOG_FILE = 'data/processed/batch_reverse_geocode.log'
+FINAL_FILE = Path("data/processed/all_geocoded_buildings_final.json")
+
+def fetch_nominatim_reverse(lat, lon):
+    """One Nominatim reverse request (raises on network/HTTP errors)."""
+    url = f"https://nominatim.openstreetmap.org/reverse?lat={lat}&lon={lon}&format=json&addressdetails=1&zoom=18"
+    req = urllib.request.Request(url)
+    req.add_header('User-Agent', 'Allston-Brighton-Analysis/1.0')
+    
+    with urllib.request.urlopen(req, timeout=10) as response:
+        return json.loads(response.read().decode())
+
 def reverse_geocode_batch(lat, lon):
-    """Simple reverse geocoding using Nominatim API."""
+    """Simple reverse geocoding using Nominatim API, through the shared geocode cache."""
     try:
-        url = f"https://nominatim.openstreetmap.org/reverse?lat={lat}&lon={lon}&format=json&addressdetails=1&zoom=18"
-        req = urllib.request.Request(url)
-        req.add_header('User-Agent', 'Allston-Brighton-Analysis/1.0')
-        
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode())
-        
-        return data
-        
+        return shared_cache().reverse(lat, lon, lambda: fetch_nominatim_reverse(lat, lon))
     except Exception as e:
-        logger.warning(f"Geocoding failed for [{lat}, {lon}]: {e}")
+        logger.warning(f"Geocoding failed for [{lat}, {lon}]: {e}",
+                       extra=event('geocode_failed', lat=lat, lon=lon, error=str(e)))
         return None
 
-def process_buildings_batch(start_idx=0, batch_size=100):
+def local_result(building, match):
+    """Result record for a building resolved by the local parcel reverse geocoder."""
+    return {
+        'building_id': building['building_id'],
+        'struct_id': building['struct_id'],
+        'latitude': building['latitude'],
+        'longitude': building['longitude'],
+        'area_sqft': building['area_sqft'],
+        'full_address': match['full_address'],
+        'house_number': match['house_number'],
+        'street': match['street'],
+        'suburb': match['neighborhood'],
+        'city': 'Boston',
+        'state': 'Massachusetts',
+        'postcode': match['postcode'],
+        'country': 'United States',
+        'parcel_id': match['parcel_id'],
+        'method': match['method'],
+        'confidence': match['confidence'],
+        'distance_m': match['distance_m'],
+    }
+
+def process_buildings_batch(buildings, start_idx=0, batch_size=100):
     """
-    Process a batch of buildings starting from start_idx.
+    Reverse geocode buildings[start_idx:start_idx + batch_size] through Nominatim.
     This allows you to process buildings in smaller chunks.
+
+    Returns (results, building IDs that got no address).
     """
-    logger.info(f"Processing buildings {start_idx} to {start_idx + batch_size - 1}")
-    
-    # Load building points
-    buildings_file = Path("data/processed/gis_layers/allston_brighton_building_points.geojson")
-    
-    with open(buildings_file, 'r') as f:
-        data = json.load(f)
-    
-    total_buildings = len(data['features'])
-    end_idx = min(start_idx + batch_size, total_buildings)
-    
-    logger.info(f"Processing {end_idx - start_idx} buildings (total: {total_buildings})")
+    end_idx = min(start_idx + batch_size, len(buildings))
+    logger.info(f"Processing {end_idx - start_idx} buildings (total: {len(buildings)})")
     
     results = []
+    no_result_ids = []
     successful = 0
     failed = 0
     
     for i in range(start_idx, end_idx):
-        building = data['features'][i]
-        props = building['properties']
-        coords = building['geometry']['coordinates']
-        
-        lon, lat = coords[0], coords[1]
-        building_id = props.get('building_id', i)
-        struct_id = props.get('STRUCT_ID', 'Unknown')
-        area_sqft = props.get('AREA_SQ_FT', 'Unknown')
+        building = buildings[i]
+        lat, lon = building['latitude'], building['longitude']
+        struct_id = building['struct_id']
         
         # Progress update
         if (i - start_idx + 1) % 10 == 0:
             logger.info(f"  Processed {i - start_idx + 1}/{end_idx - start_idx} in this batch")
         
-        # Reverse geocode
+        # Reverse geocode (cache first)
+        misses_before = shared_cache().misses
         address_data = reverse_geocode_batch(lat, lon)
+        went_to_network = shared_cache().misses > misses_before
         
         if address_data and 'address' in address_data:
             addr = address_data['address']
             
             result = {
-                'building_id': building_id,
+                'building_id': building['building_id'],
                 'struct_id': struct_id,
                 'latitude': lat,
                 'longitude': lon,
-                'area_sqft': area_sqft,
+                'area_sqft': building['area_sqft'],
                 'full_address': address_data.get('display_name', ''),
                 'house_number': addr.get('house_number', ''),
                 'street': addr.get('road', addr.get('street', '')),
@@ -86,84 +121,163 @@ def process_buildings_batch(start_idx=0, batch_size=100):
                 'city': addr.get('city', addr.get('town', '')),
                 'state': addr.get('state', ''),
                 'postcode': addr.get('postcode', ''),
-                'country': addr.get('country', '')
+                'country': addr.get('country', ''),
+                'method': 'nominatim',
+                'confidence': 'network',
             }
             
             results.append(result)
             successful += 1
             
-            if successful % 5 == 0:
-                logger.info(f"    ✓ Successfully geocoded {successful} buildings in this batch")
+            logger.info(f"    ✓ Geocoded building {struct_id} ({successful} in this batch)",
+                        extra=event('building_geocoded', sample=True, struct_id=struct_id, lat=lat, lon=lon))
         else:
+            no_result_ids.append(str(building['building_id']))
             failed += 1
         
-        # Rate limiting - sleep every 5 requests
-        if (i - start_idx + 1) % 5 == 0:
+        # Rate limiting - sleep every 5 network requests (cache hits are free)
+        if went_to_network and shared_cache().misses % 5 == 0:
             time.sleep(2)
     
     logger.info(f"Batch complete: {successful} successful, {failed} failed")
-    return results
+    return results, no_result_ids
 
-def main():
-    """Main function - process all buildings in batches."""
+def load_checkpoint(path=CHECKPOINT_FILE):
+    """
+    Building IDs processed by earlier runs, with or without a result
+    (append-only log, one "ID<tab>status" per line).
+    """
+    if not path.exists():
+        return set()
+    with open(path) as f:
+        return {line.split('\t')[0].strip() for line in f if line.strip()}
+
+def export_results(results_file=RESULTS_FILE, output_file=FINAL_FILE):
+    """
+    Stream the JSON-lines results into one JSON array, one building per
+    element (a result written twice around a crash is kept once).
+    """
+    seen = set()
+    count = 0
+    with open(results_file) as src, open(output_file, 'w') as out:
+        out.write('[\n')
+        for line in src:
+            result = json.loads(line)
+            if str(result['building_id']) in seen:
+                continue
+            seen.add(str(result['building_id']))
+            out.write((',\n' if count else '') + json.dumps(result))
+            count += 1
+        out.write('\n]\n')
+    return count
+
+def main(local_only=False, max_distance_m=30.0, chunk_size=2000, batch_size=100, restart=False):
+    """
+    Main function - stream building points in chunks, resolve each chunk
+    against the parcels locally, send only the unmatched ones to Nominatim
+    in batches, and append every result as soon as it is known.
+    
+    Processed building IDs, including those Nominatim had no address for,
+    go to an append-only checkpoint log, so a re-run resumes exactly where
+    the last one stopped (use restart=True to retry the no-result ones).
+    """
     logger.info("="*60)
     logger.info("FULL BATCH REVERSE GEOCODING - ALL BUILDINGS")
     logger.info("="*60)
     
-    # Process all 10,282 buildings in batches of 100
-    all_results = []
-    batch_size = 100
-    total_buildings = 10282
+    if restart:
+        RESULTS_FILE.unlink(missing_ok=True)
+        CHECKPOINT_FILE.unlink(missing_ok=True)
+    done = load_checkpoint()
+    if done:
+        logger.info(f"♻️  Resuming: {len(done):,} buildings already done")
     
-    for start_idx in range(0, total_buildings, batch_size):
-        batch_num = (start_idx // batch_size) + 1
-        total_batches = (total_buildings + batch_size - 1) // batch_size
-        
-        logger.info(f"\n{'='*50}")
-        logger.info(f"PROCESSING BATCH {batch_num}/{total_batches}")
-        logger.info(f"Buildings {start_idx} to {min(start_idx + batch_size, total_buildings) - 1}")
-        logger.info(f"{'='*50}")
-        
-        # Process this batch
-        batch_results = process_buildings_batch(start_idx, batch_size)
-        
-        if batch_results:
-            all_results.extend(batch_results)
-            logger.info(f"✓ Batch {batch_num} complete: {len(batch_results)} buildings geocoded")
-        else:
-            logger.warning(f"✗ Batch {batch_num} failed or returned no results")
-        
-        # Save intermediate results every 5 batches
-        if batch_num % 5 == 0:
-            intermediate_file = f"data/processed/intermediate_geocoded_batch_{batch_num}.json"
-            with open(intermediate_file, 'w') as f:
-                json.dump(all_results, f, indent=2)
-            logger.info(f"💾 Saved intermediate results: {len(all_results)} total buildings")
-        
-        # Longer pause between batches to be respectful
-        if batch_num < total_batches:
-            logger.info("⏳ Waiting 30 seconds before next batch...")
-            time.sleep(30)
+    geocoder = ParcelReverseGeocoder.from_files(max_distance_m=max_distance_m)
+    RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
     
-    # Final save of all results
-    if all_results:
-        output_file = Path("data/processed/all_geocoded_buildings_final.json")
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_file, 'w') as f:
-            json.dump(all_results, f, indent=2)
+    total_buildings = 0
+    resolved_locally = 0
+    geocoded_online = 0
+    pause_before_next_batch = False
+    
+    with open(RESULTS_FILE, 'a') as results_out, open(CHECKPOINT_FILE, 'a') as checkpoint_out:
+        def commit(results, no_result_ids=()):
+            # Results reach disk before their IDs are checkpointed
+            for result in results:
+                results_out.write(json.dumps(result, default=str) + '\n')
+            results_out.flush()
+            building_ids = [str(result['building_id']) for result in results]
+            checkpoint_out.writelines(f"{building_id}\tgeocoded\n" for building_id in building_ids)
+            checkpoint_out.writelines(f"{building_id}\tno_result\n" for building_id in no_result_ids)
+            checkpoint_out.flush()
+            done.update(building_ids)
+            done.update(no_result_ids)
         
+        for chunk in iter_building_points(BUILDINGS_FILE, chunk_size):
+            total_buildings += len(chunk)
+            chunk = chunk[~chunk['building_id'].astype(str).isin(done)]
+            if chunk.empty:
+                continue
+            
+            # One vectorized STRtree call per chunk
+            matches = geocoder.reverse(chunk['longitude'], chunk['latitude'])
+            buildings = chunk.to_dict('records')
+            match_records = matches.to_dict('records')
+            local_results = [local_result(building, match) for building, match in zip(buildings, match_records)
+                             if match['method'] != 'unmatched']
+            commit(local_results)
+            resolved_locally += len(local_results)
+            
+            unmatched = [building for building, match in zip(buildings, match_records)
+                         if match['method'] == 'unmatched']
+            logger.info(f"✓ Buildings up to #{total_buildings:,}: {len(local_results):,} resolved locally, "
+                        f"{len(unmatched):,} unmatched")
+            if local_only:
+                continue
+            
+            for start_idx in range(0, len(unmatched), batch_size):
+                # Longer pause between batches to be respectful (skipped when the cache answered everything)
+                if pause_before_next_batch:
+                    logger.info("⏳ Waiting 30 seconds before next batch...")
+                    time.sleep(30)
+                misses_before_batch = shared_cache().misses
+                
+                batch_results, no_result_ids = process_buildings_batch(unmatched, start_idx, batch_size)
+                commit(batch_results, no_result_ids)
+                geocoded_online += len(batch_results)
+                pause_before_next_batch = shared_cache().misses > misses_before_batch
+    
+    # Final export of all results (earlier runs included)
+    count = export_results() if done else 0
+    if count:
         logger.info(f"\n🎉 ALL PROCESSING COMPLETE!")
-        logger.info(f"✓ Successfully geocoded {len(all_results)} out of {total_buildings} buildings")
-        logger.info(f"✓ Final results saved to: {output_file}")
-        logger.info(f"📊 Success rate: {len(all_results)/total_buildings*100:.1f}%")
+        logger.info(f"✓ This run: {resolved_locally:,} resolved locally, {geocoded_online:,} via Nominatim")
+        logger.info(f"✓ Successfully geocoded {count} out of {total_buildings} buildings")
+        logger.info(f"✓ Final results saved to: {FINAL_FILE}")
+        logger.info(f"📊 Success rate: {count/total_buildings*100:.1f}%")
         
         # Show sample results
         logger.info(f"\nSample addresses found:")
-        for i, result in enumerate(all_results[:5]):
-            logger.info(f"  {i+1}. {result.get('full_address', 'No address')}")
+        with open(RESULTS_FILE) as f:
+            for i, line in zip(range(5), f):
+                logger.info(f"  {i+1}. {json.loads(line).get('full_address', 'No address')}")
     else:
         logger.error("No buildings were successfully geocoded")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='Reverse geocode all building points')
+    parser.add_argument('--local-only', action='store_true', help='Do not send unmatched buildings to Nominatim')
+    parser.add_argument('--max-distance', type=float, default=30.0,
+                        help='Nearest-parcel cap in meters for the local lookup')
+    parser.add_argument('--chunk-size', type=int, default=2000, help='Building points read per chunk')
+    parser.add_argument('--restart', action='store_true', help='Discard the checkpoint and results and start over')
+    parser.add_argument('--log-file', default=DEFAULT_LOG_FILE, help='JSON-lines log file')
+    parser.add_argument('--log-sample-every', type=int, default=10,
+                        help='Keep 1 in N per-building log messages (1 keeps all)')
+    args = parser.parse_args()
+
+    # Set up logging (JSON lines in the file, handler I/O on a background thread)
+    setup_logging(args.log_file, sample_every=args.log_sample_every)
+    
+    main(local_only=args.local_only, max_distance_m=args.max_distance, chunk_size=args.chunk_size,
+         restart=args.restart)
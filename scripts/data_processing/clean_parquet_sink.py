@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Stream scraped parcel records into typed, compressed Parquet partitions
+
+The scrapers hand finished records to write() in batches (it has the
+scrape_many(on_batch=...) signature). Each successful record is cleaned on
+the way in with create_clean_dataset.clean_record, which applies the
+same conversions as clean_parcel_dataset, and buffered. Every
+`partition_rows` rows the buffer is written out as one zstd-compressed
+Parquet file with a fixed schema. The clean dataset is therefore complete
+when the crawl finishes, and there is no second pass over the raw CSV.
+
+Partitions are numbered part-00000.parquet, part-00001.parquet, ... and
+are written to a temporary name first, so a crash never leaves a torn file.
+A resumed crawl continues the numbering. A parcel scraped twice (refresh,
+retry) has a row in two partitions; read_clean_dataset() keeps the newest.
+
+Usage (from the repository root):
+    python scripts/data_processing/clean_parquet_sink.py --from-csv data/processed/parcel_scraping_progress.csv
+    python scripts/data_processing/clean_parquet_sink.py --summary
+"""
+
+import argparse
+import logging
+import os
+import re
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from create_clean_dataset import CLEAN_COLUMNS, clean_record
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARQUET_DIR = 'data/processed/clean_parcels'
+
+_STRING_TYPE = pa.string()
+_COLUMN_TYPES = {
+    'owner_count': pa.int32(),
+    'year_built': pa.int32(),
+    'property_age': pa.int32(),
+    'years_of_data': pa.int32(),
+    'is_residential': pa.bool_(),
+    'is_commercial': pa.bool_(),
+    'is_exempt': pa.bool_(),
+    'residential_exemption_bool': pa.bool_(),
+    'personal_exemption_bool': pa.bool_(),
+    'scrape_timestamp': pa.timestamp('us'),
+    'assessment_date': pa.timestamp('us'),
+}
+_FLOAT_COLUMNS = [
+    'lot_size_sqft', 'living_area_sqft', 'value_per_sqft', 'lot_efficiency',
+    'latest_assessed_value', 'value_trend_5yr', 'value_trend_10yr', 'value_volatility',
+]
+
+def _column_type(column):
+    if column in _COLUMN_TYPES:
+        return _COLUMN_TYPES[column]
+    if column in _FLOAT_COLUMNS or column.endswith('_numeric'):
+        return pa.float64()
+    return _STRING_TYPE
+
+CLEAN_SCHEMA = pa.schema([(column, _column_type(column)) for column in CLEAN_COLUMNS])
+
+class CleanParquetSink:
+    """
+    Clean records as they arrive and write them out as Parquet partitions.
+
+    Args:
+        directory: Folder holding the part-*.parquet files (created if missing)
+        partition_rows: Rows per Parquet file
+        compression: Parquet codec
+    """
+
+    def __init__(self, directory=DEFAULT_PARQUET_DIR, partition_rows=5000, compression='zstd'):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.partition_rows = partition_rows
+        self.compression = compression
+        self.rows_written = 0
+        self.skipped = 0
+        self._buffer = []
+
+        numbers = [int(m.group(1)) for m in
+                   (re.fullmatch(r'part-(\d+)\.parquet', p.name) for p in self.directory.iterdir()) if m]
+        self._next_part = max(numbers) + 1 if numbers else 0
+
+    def write(self, records):
+        """
+        Clean and buffer a batch of scraped records; failed scrapes are skipped
+        """
+        for record in records:
+            if not record.get('scraped_successfully'):
+                self.skipped += 1
+                continue
+            self._buffer.append(clean_record(record))
+            if len(self._buffer) >= self.partition_rows:
+                self.flush()
+
+    def flush(self):
+        """
+        Write buffered rows as the next partition (no-op when empty)
+        """
+        if not self._buffer:
+            return None
+        table = pa.Table.from_pylist(self._buffer, schema=CLEAN_SCHEMA)
+        path = self.directory / f"part-{self._next_part:05d}.parquet"
+        tmp_path = path.with_name(path.name + '.tmp')
+        pq.write_table(table, tmp_path, compression=self.compression)
+        os.replace(tmp_path, path)
+
+        self._next_part += 1
+        self.rows_written += len(self._buffer)
+        logger.info(f"💾 Wrote {len(self._buffer):,} clean rows to {path}")
+        self._buffer = []
+        return path
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+def read_clean_dataset(directory=DEFAULT_PARQUET_DIR, columns=None):
+    """
+    Load every partition as one DataFrame, keeping the newest row per parcel
+    """
+    paths = sorted(Path(directory).glob('part-*.parquet'))
+    if not paths:
+        return pd.DataFrame(columns=columns or CLEAN_COLUMNS)
+    read_columns = None if columns is None else list(dict.fromkeys(['parcel_id', 'scrape_timestamp', *columns]))
+    df = pq.ParquetDataset(paths).read(columns=read_columns).to_pandas()
+    df = df.sort_values('scrape_timestamp', kind='stable').drop_duplicates('parcel_id', keep='last')
+    return df[columns] if columns is not None else df.reset_index(drop=True)
+
+def sink_csv(input_file, directory=DEFAULT_PARQUET_DIR, partition_rows=5000, chunksize=5000):
+    """
+    Stream an existing raw scrape CSV into the sink (for crawls run before it existed)
+    """
+    with CleanParquetSink(directory, partition_rows=partition_rows) as sink:
+        for chunk in pd.read_csv(input_file, chunksize=chunksize, dtype={'parcel_id': str}):
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            sink.write(chunk.to_dict('records'))
+    logger.info(f"✅ {sink.rows_written:,} clean rows written, {sink.skipped:,} failed scrapes skipped")
+    return sink.rows_written
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Typed Parquet partitions of the clean parcel dataset')
+    parser.add_argument('--directory', default=DEFAULT_PARQUET_DIR, help='Folder holding the partitions')
+    parser.add_argument('--from-csv', default=None, help='Clean an existing raw scrape CSV into the folder')
+    parser.add_argument('--partition-rows', type=int, default=5000, help='Rows per Parquet file')
+    parser.add_argument('--summary', action='store_true', help='Print row count and schema of the dataset')
+    args = parser.parse_args()
+
+    if args.from_csv:
+        sink_csv(args.from_csv, args.directory, partition_rows=args.partition_rows)
+    if args.summary or not args.from_csv:
+        df = read_clean_dataset(args.directory)
+        logger.info(f"📊 {len(df):,} parcels in {args.directory}")
+        print(df.dtypes.to_string())
@@ -9,8 +9,11 @@ import json
 import re
 import logging
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, Any, Optional
 
+from value_history_store import explode_value_history, trend_metrics
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -201,6 +204,141 @@ def parse_owners_list(owners_str: str) -> Optional[Dict]:
         logger.warning(f"Could not parse owners list: {e}")
         return None
 
+# Columns of the clean dataset, in output order
+CLEAN_COLUMNS = [
+    # Identifiers
+    'parcel_id', 'parcel_id_display', 'address',
+    
+    # Owner information
+    'owner_name', 'owner_mailing_address', 'owner_count', 'primary_owner',
+    
+    # Property basics
+    'property_type', 'classification_code', 'is_residential', 'is_commercial', 'is_exempt',
+    'year_built', 'property_age',
+    
+    # Physical characteristics
+    'lot_size_sqft', 'living_area_sqft', 'value_per_sqft', 'lot_efficiency',
+    'land_use', 'building_style',
+    
+    # Building details
+    'total_rooms_numeric', 'bedrooms_numeric', 'bathrooms_numeric', 'half_bathrooms_numeric',
+    'kitchens_numeric', 'kitchen_type', 'fireplaces_numeric', 'parking_spots_numeric',
+    'story_height_numeric',
+    
+    # Building features
+    'ac_type', 'heat_type', 'interior_condition', 'interior_finish',
+    'view', 'grade', 'roof_cover', 'roof_structure',
+    'exterior_finish', 'exterior_condition', 'foundation',
+    
+    # Outbuildings
+    'outbuilding_type', 'outbuilding_size_numeric', 'outbuilding_quality', 'outbuilding_condition',
+    
+    # Financial information
+    'fy2025_building_value_numeric', 'fy2025_land_value_numeric', 'fy2025_total_assessed_value_numeric',
+    'residential_tax_rate_numeric', 'commercial_tax_rate_numeric',
+    'estimated_tax_numeric', 'community_preservation_numeric', 'total_first_half_tax_numeric',
+    
+    # Exemptions
+    'residential_exemption_bool', 'personal_exemption_bool',
+    
+    # Value history
+    'latest_assessed_value', 'value_trend_5yr', 'value_trend_10yr', 'value_volatility', 'years_of_data',
+    
+    # Metadata
+    'scrape_timestamp', 'assessment_date', 'exemption_notes'
+]
+
+FINANCIAL_COLUMNS = [
+    'fy2025_building_value', 'fy2025_land_value', 'fy2025_total_assessed_value',
+    'estimated_tax', 'community_preservation', 'total_first_half_tax',
+    'residential_tax_rate', 'commercial_tax_rate'
+]
+BUILDING_COLUMNS = [
+    'total_rooms', 'bedrooms', 'bathrooms', 'half_bathrooms', 'kitchens',
+    'fireplaces', 'parking_spots', 'story_height'
+]
+CATEGORICAL_COLUMNS = [
+    'land_use', 'building_style', 'kitchen_type', 'ac_type', 'heat_type',
+    'interior_condition', 'interior_finish', 'view', 'grade',
+    'roof_cover', 'roof_structure', 'exterior_finish', 'exterior_condition',
+    'foundation', 'outbuilding_type', 'outbuilding_quality', 'outbuilding_condition'
+]
+
+def _fill_unknown(value):
+    return 'Unknown' if pd.isna(value) else value
+
+def _ratio(numerator, denominator) -> Optional[float]:
+    if numerator is None or denominator is None or denominator == 0:
+        return None
+    return numerator / denominator
+
+@lru_cache(maxsize=1024)
+def _parse_timestamp(text):
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        parsed = pd.to_datetime(text, errors='coerce')
+        return None if pd.isna(parsed) else parsed.to_pydatetime()
+
+def _timestamp(value):
+    # Scrape timestamps are ISO strings; assessment dates repeat, so parses are cached
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return _parse_timestamp(str(value))
+
+def clean_record(record: Dict[str, Any], current_year: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Clean one scraped record into a CLEAN_COLUMNS row
+
+    Same conversions as clean_parcel_dataset, for one record at a time, so
+    they can run while the scrape is still in progress.
+    """
+    get = record.get
+    row = {
+        'parcel_id': str(get('parcel_id')),
+        'parcel_id_display': str(get('parcel_id_display')),
+        'address': _fill_unknown(get('address')),
+        'owner_name': _fill_unknown(get('owner_name')),
+        'owner_mailing_address': _fill_unknown(get('owner_mailing_address')),
+        'property_type': _fill_unknown(get('property_type')),
+        'classification_code': _fill_unknown(get('classification_code')),
+        'lot_size_sqft': clean_sqft_value(get('lot_size')),
+        'living_area_sqft': clean_sqft_value(get('living_area')),
+        'year_built': clean_year_value(get('year_built')),
+        'residential_exemption_bool': clean_boolean_value(get('residential_exemption')),
+        'personal_exemption_bool': clean_boolean_value(get('personal_exemption')),
+        'outbuilding_size_numeric': clean_sqft_value(get('outbuilding_size')),
+        'scrape_timestamp': _timestamp(get('scrape_timestamp')),
+        'assessment_date': _timestamp(get('assessment_date')),
+        'exemption_notes': get('exemption_notes'),
+    }
+    for col in FINANCIAL_COLUMNS:
+        row[f'{col}_numeric'] = clean_currency_value(get(col))
+    for col in BUILDING_COLUMNS:
+        row[f'{col}_numeric'] = clean_numeric_value(get(col))
+    for col in CATEGORICAL_COLUMNS:
+        row[col] = _fill_unknown(get(col))
+
+    history = parse_value_history(get('value_history')) or {}
+    for key in ('latest_assessed_value', 'value_trend_5yr', 'value_trend_10yr', 'value_volatility', 'years_of_data'):
+        row[key] = history.get(key)
+    owners = parse_owners_list(get('current_owners_list')) or {}
+    row['owner_count'] = owners.get('owner_count')
+    row['primary_owner'] = owners.get('primary_owner')
+
+    current_year = current_year or datetime.now().year
+    age = current_year - row['year_built'] if row['year_built'] is not None else None
+    row['property_age'] = age if age is not None and age >= 0 else None
+    row['value_per_sqft'] = _ratio(row['fy2025_total_assessed_value_numeric'], row['living_area_sqft'])
+    row['lot_efficiency'] = _ratio(row['living_area_sqft'], row['lot_size_sqft'])
+
+    property_type = str(row['property_type'])
+    row['is_residential'] = bool(re.search('Family|Condominium|Apartment', property_type, re.IGNORECASE))
+    row['is_commercial'] = bool(re.search('Commercial|Office|Retail|Industrial', property_type, re.IGNORECASE))
+    row['is_exempt'] = bool(re.search('Exempt', property_type, re.IGNORECASE))
+
+    return {col: row[col] for col in CLEAN_COLUMNS}
+
 def clean_parcel_dataset(input_file: str, output_file: str) -> pd.DataFrame:
     """
     Clean and structure the scraped parcel dataset
@@ -297,8 +435,8 @@ def clean_parcel_dataset(input_file: str, output_file: str) -> pd.DataFrame:
     # Parse complex JSON fields
     logger.info("🧹 Parsing complex JSON fields...")
     
-    # Parse value history
-    clean_df['value_history_parsed'] = clean_df['value_history'].apply(parse_value_history)
+    # Value history: explode to a long table once and aggregate per parcel
+    history_metrics = trend_metrics(explode_value_history(clean_df))
     
     # Parse owners list
     clean_df['owners_parsed'] = clean_df['current_owners_list'].apply(parse_owners_list)
@@ -307,21 +445,8 @@ def clean_parcel_dataset(input_file: str, output_file: str) -> pd.DataFrame:
     logger.info("🧹 Extracting key metrics from parsed data...")
     
     # Value history metrics
-    clean_df['latest_assessed_value'] = clean_df['value_history_parsed'].apply(
-        lambda x: x['latest_assessed_value'] if x and 'latest_assessed_value' in x else None
-    )
-    clean_df['value_trend_5yr'] = clean_df['value_history_parsed'].apply(
-        lambda x: x['value_trend_5yr'] if x and 'value_trend_5yr' in x else None
-    )
-    clean_df['value_trend_10yr'] = clean_df['value_history_parsed'].apply(
-        lambda x: x['value_trend_10yr'] if x and 'value_trend_10yr' in x else None
-    )
-    clean_df['value_volatility'] = clean_df['value_history_parsed'].apply(
-        lambda x: x['value_volatility'] if x and 'value_volatility' in x else None
-    )
-    clean_df['years_of_data'] = clean_df['value_history_parsed'].apply(
-        lambda x: x['years_of_data'] if x and 'years_of_data' in x else None
-    )
+    for col in ['latest_assessed_value', 'value_trend_5yr', 'value_trend_10yr', 'value_volatility', 'years_of_data']:
+        clean_df[col] = clean_df['parcel_id'].map(history_metrics[col])
     
     # Owner metrics
     clean_df['owner_count'] = clean_df['owners_parsed'].apply(
@@ -360,51 +485,8 @@ def clean_parcel_dataset(input_file: str, output_file: str) -> pd.DataFrame:
     # Select final columns for the clean dataset
     logger.info("🧹 Selecting final columns...")
     
-    final_columns = [
-        # Identifiers
-        'parcel_id', 'parcel_id_display', 'address',
-        
-        # Owner information
-        'owner_name', 'owner_mailing_address', 'owner_count', 'primary_owner',
-        
-        # Property basics
-        'property_type', 'classification_code', 'is_residential', 'is_commercial', 'is_exempt',
-        'year_built', 'property_age',
-        
-        # Physical characteristics
-        'lot_size_sqft', 'living_area_sqft', 'value_per_sqft', 'lot_efficiency',
-        'land_use', 'building_style',
-        
-        # Building details
-        'total_rooms_numeric', 'bedrooms_numeric', 'bathrooms_numeric', 'half_bathrooms_numeric',
-        'kitchens_numeric', 'kitchen_type', 'fireplaces_numeric', 'parking_spots_numeric',
-        'story_height_numeric',
-        
-        # Building features
-        'ac_type', 'heat_type', 'interior_condition', 'interior_finish',
-        'view', 'grade', 'roof_cover', 'roof_structure',
-        'exterior_finish', 'exterior_condition', 'foundation',
-        
-        # Outbuildings
-        'outbuilding_type', 'outbuilding_size_numeric', 'outbuilding_quality', 'outbuilding_condition',
-        
-        # Financial information
-        'fy2025_building_value_numeric', 'fy2025_land_value_numeric', 'fy2025_total_assessed_value_numeric',
-        'residential_tax_rate_numeric', 'commercial_tax_rate_numeric',
-        'estimated_tax_numeric', 'community_preservation_numeric', 'total_first_half_tax_numeric',
-        
-        # Exemptions
-        'residential_exemption_bool', 'personal_exemption_bool',
-        
-        # Value history
-        'latest_assessed_value', 'value_trend_5yr', 'value_trend_10yr', 'value_volatility', 'years_of_data',
-        
-        # Metadata
-        'scrape_timestamp', 'assessment_date', 'exemption_notes'
-    ]
-    
     # Create the final clean dataset
-    clean_final_df = clean_df[final_columns].copy()
+    clean_final_df = clean_df[CLEAN_COLUMNS].copy()
     
     # Generate data quality report
     logger.info("📊 Generating data quality report...")
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Persistent SQLite cache shared by every geocoding script
+
+Forward lookups are keyed by a normalized address ("12 N HARVARD ST|02134"):
+upper-cased, punctuation dropped, street suffixes abbreviated the same way
+find_homeowner.py does, a float '.0' house number fixed, plus the 5-digit
+ZIP when known. A lookup with a ZIP only matches that ZIP, since the same
+street name exists in several Boston neighborhoods. A lookup without one
+falls back to an entry with a ZIP when exactly one ZIP has that address.
+Everything is in Boston, so the city is not part of the key.
+
+Reverse lookups are keyed by the coordinates rounded to a grid cell
+(`precision` decimals; 5 is about 1 m).
+
+Every entry records its provider (nominatim, a seed CSV, ...) and when it
+was fetched. Entries expire after `ttl_days`. "No match" answers are cached
+too, for `negative_ttl_days`. Network errors are not cached. With a warm
+cache, a repeat run makes no network calls at all.
+
+Usage from a script:
+    from geocode_cache import shared_cache
+    lat, lon = shared_cache().forward(address, lambda: nominatim_lookup(address), zip_code=zip_code)
+    data = shared_cache().reverse(lat, lon, lambda: nominatim_reverse(lat, lon))
+
+    python scripts/data_processing/geocode_cache.py --stats
+    python scripts/data_processing/geocode_cache.py --purge-expired
+"""
+
+import argparse
+import json
+import logging
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Anchored at the repository root so scripts under web_app/ share the same file
+DEFAULT_GEOCODE_CACHE_PATH = str(Path(__file__).resolve().parents[2] / 'data' / 'processed' / 'geocode_cache.sqlite')
+
+STREET_ABBREVIATIONS = {
+    r'\bSTREET\b': 'ST', r'\bAVENUE\b': 'AVE', r'\bROAD\b': 'RD',
+    r'\bDRIVE\b': 'DR', r'\bPLACE\b': 'PL', r'\bBOULEVARD\b': 'BLVD',
+    r'\bPARKWAY\b': 'PKWY', r'\bTERRACE\b': 'TER', r'\bCOMMONWEALTH\b': 'COMM',
+    r'\bCOURT\b': 'CT', r'\bSQUARE\b': 'SQ', r'\bLANE\b': 'LN', r'\bHIGHWAY\b': 'HWY',
+    r'\bNORTH\b': 'N', r'\bSOUTH\b': 'S', r'\bEAST\b': 'E', r'\bWEST\b': 'W',
+}
+_ABBREVIATION_PATTERNS = [(re.compile(pattern), short) for pattern, short in STREET_ABBREVIATIONS.items()]
+
+# Suffix spellings used by the assessing data (AV, TE, WY, ...) -> the forms above
+STREET_SUFFIXES = {
+    'AV': 'AVE', 'TE': 'TER', 'TERR': 'TER', 'WY': 'WAY', 'PW': 'PKWY', 'HW': 'HWY',
+    'CI': 'CIR', 'CIRCLE': 'CIR', 'SQR': 'SQ', 'STR': 'ST',
+}
+
+def normalize_street(address):
+    """
+    '12.0 North Harvard Street,' -> '12 N HARVARD ST', 'Commonwealth Av' -> 'COMM AVE'
+    """
+    if address is None:
+        return ''
+    text = str(address).upper().strip()
+    text = re.sub(r'^(\d+)\.0\b', r'\1', text)
+    text = re.sub(r'[^\w\s-]', ' ', text)
+    for pattern, short in _ABBREVIATION_PATTERNS:
+        text = pattern.sub(short, text)
+    words = text.split()
+    if len(words) > 1 and words[-1] in STREET_SUFFIXES:
+        words[-1] = STREET_SUFFIXES[words[-1]]
+    return ' '.join(words)
+
+def normalize_zip(zip_code):
+    """
+    2134 / '02134' / '02134-1234' / 2134.0 -> '02134' ('' if unusable)
+    """
+    if zip_code is None or zip_code != zip_code:  # None or NaN
+        return ''
+    digits = re.sub(r'\D', '', str(zip_code).split('.')[0].split('-')[0])
+    return digits.zfill(5)[:5] if digits else ''
+
+def address_key(address, zip_code=None):
+    return f"{normalize_street(address)}|{normalize_zip(zip_code)}"
+
+def grid_cell(latitude, longitude, precision=5):
+    return f"{round(float(latitude), precision):.{precision}f},{round(float(longitude), precision):.{precision}f}"
+
+class GeocodeCache:
+    """
+    SQLite-backed forward and reverse geocode cache with TTL and provenance.
+
+    Args:
+        path: SQLite file to use (created with its parent directory if missing)
+        ttl_days: Days a successful lookup stays valid
+        negative_ttl_days: Days a "no match" answer stays valid
+        precision: Decimal places coordinates are rounded to for reverse keys
+    """
+
+    def __init__(self, path=DEFAULT_GEOCODE_CACHE_PATH, ttl_days=365, negative_ttl_days=30, precision=5):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = timedelta(days=ttl_days)
+        self.negative_ttl = timedelta(days=negative_ttl_days)
+        self.precision = precision
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(str(self.path), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS forward (
+                address_key TEXT PRIMARY KEY,
+                query TEXT,
+                latitude REAL,
+                longitude REAL,
+                result TEXT,
+                provider TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                expires_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS reverse (
+                cell TEXT PRIMARY KEY,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                result TEXT,
+                provider TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                expires_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS seeded_sources (
+                source TEXT PRIMARY KEY,
+                modified REAL NOT NULL,
+                rows INTEGER NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    def _expiry(self, now, found):
+        return (now + (self.ttl if found else self.negative_ttl)).isoformat()
+
+    @staticmethod
+    def _entry(row):
+        latitude, longitude, result, provider, fetched_at = row
+        return {
+            'latitude': latitude,
+            'longitude': longitude,
+            'result': json.loads(result) if result else None,
+            'provider': provider,
+            'fetched_at': fetched_at,
+        }
+
+    def get_forward(self, address, zip_code=None):
+        """
+        Cached entry for an address, or None if unknown or expired.
+
+        An entry with latitude None is a cached "no match". Without a ZIP, an
+        entry stored with one is used when no other ZIP has the same address.
+        """
+        now = datetime.now().isoformat()
+        query = "SELECT latitude, longitude, result, provider, fetched_at FROM forward WHERE expires_at > ? AND "
+        row = self.conn.execute(query + "address_key = ?", (now, address_key(address, zip_code))).fetchone()
+        if row is None and not normalize_zip(zip_code):
+            # Every '<street>|<zip>' key sorts between '<street>|' and '<street>}'
+            street = normalize_street(address)
+            rows = self.conn.execute(query + "address_key > ? AND address_key < ? LIMIT 2",
+                                     (now, f"{street}|", f"{street}}}")).fetchall()
+            row = rows[0] if len(rows) == 1 else None
+        return self._entry(row) if row is not None else None
+
+    def put_forward(self, address, latitude, longitude, zip_code=None, result=None, provider='nominatim'):
+        now = datetime.now()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO forward VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (address_key(address, zip_code), str(address), latitude, longitude,
+                 json.dumps(result) if result is not None else None, provider,
+                 now.isoformat(), self._expiry(now, latitude is not None))
+            )
+
+    def get_reverse(self, latitude, longitude):
+        """
+        Cached reverse result for the grid cell of (latitude, longitude), or None
+        """
+        row = self.conn.execute(
+            "SELECT latitude, longitude, result, provider, fetched_at FROM reverse "
+            "WHERE cell = ? AND expires_at > ?",
+            (grid_cell(latitude, longitude, self.precision), datetime.now().isoformat())
+        ).fetchone()
+        return self._entry(row) if row is not None else None
+
+    def put_reverse(self, latitude, longitude, result, provider='nominatim'):
+        now = datetime.now()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO reverse VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (grid_cell(latitude, longitude, self.precision), latitude, longitude,
+                 json.dumps(result) if result is not None else None, provider,
+                 now.isoformat(), self._expiry(now, result is not None))
+            )
+
+    def forward(self, address, fetch, zip_code=None, provider='nominatim'):
+        """
+        (latitude, longitude) for an address, calling fetch() only on a cache miss.
+
+        fetch() returns (lat, lon), or (None, None) for no match; exceptions
+        propagate and nothing is cached.
+        """
+        entry = self.get_forward(address, zip_code)
+        if entry is not None:
+            self.hits += 1
+            return entry['latitude'], entry['longitude']
+        self.misses += 1
+        latitude, longitude = fetch()
+        self.put_forward(address, latitude, longitude, zip_code=zip_code, provider=provider)
+        return latitude, longitude
+
+    def reverse(self, latitude, longitude, fetch, provider='nominatim'):
+        """
+        Reverse geocode result for a point, calling fetch() only on a cache miss.
+
+        fetch() returns the provider's result dict, or None for no match;
+        exceptions propagate and nothing is cached.
+        """
+        entry = self.get_reverse(latitude, longitude)
+        if entry is not None:
+            self.hits += 1
+            return entry['result']
+        self.misses += 1
+        result = fetch()
+        self.put_reverse(latitude, longitude, result, provider=provider)
+        return result
+
+    def seed_forward(self, addresses, latitudes, longitudes, source, modified=None, zip_codes=None):
+        """
+        Bulk-load known points (e.g. a geocoded CSV) as provider `source`.
+
+        With `modified` (the source file's mtime), a source already seeded at
+        that mtime is skipped; returns the number of rows written.
+        """
+        if modified is not None:
+            row = self.conn.execute("SELECT modified FROM seeded_sources WHERE source = ?", (source,)).fetchone()
+            if row is not None and row[0] == modified:
+                return 0
+
+        now = datetime.now()
+        fetched_at, expires_at = now.isoformat(), self._expiry(now, True)
+        zip_codes = zip_codes if zip_codes is not None else [None] * len(addresses)
+        rows = [
+            (address_key(address, zip_code), str(address), float(lat), float(lon), None, source, fetched_at, expires_at)
+            for address, lat, lon, zip_code in zip(addresses, latitudes, longitudes, zip_codes)
+            if normalize_street(address)
+        ]
+        with self.conn:
+            # Never overwrite a direct lookup with a seeded point
+            self.conn.executemany("INSERT OR IGNORE INTO forward VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            if modified is not None:
+                self.conn.execute("INSERT OR REPLACE INTO seeded_sources VALUES (?, ?, ?)",
+                                  (source, modified, len(rows)))
+        return len(rows)
+
+    def purge_expired(self):
+        now = datetime.now().isoformat()
+        with self.conn:
+            removed = self.conn.execute("DELETE FROM forward WHERE expires_at <= ?", (now,)).rowcount
+            removed += self.conn.execute("DELETE FROM reverse WHERE expires_at <= ?", (now,)).rowcount
+        return removed
+
+    def stats(self):
+        counts = {}
+        for table in ('forward', 'reverse'):
+            total, found = self.conn.execute(
+                f"SELECT COUNT(*), COUNT(latitude) FROM {table}" if table == 'forward'
+                else f"SELECT COUNT(*), COUNT(result) FROM {table}"
+            ).fetchone()
+            counts[table] = {'entries': total, 'no_match': total - found}
+        counts['providers'] = dict(self.conn.execute(
+            "SELECT provider, COUNT(*) FROM (SELECT provider FROM forward UNION ALL SELECT provider FROM reverse) "
+            "GROUP BY provider"
+        ).fetchall())
+        counts['session'] = {'hits': self.hits, 'misses': self.misses}
+        return counts
+
+    def close(self):
+        self.conn.close()
+
+_shared = None
+
+def shared_cache():
+    """
+    Process-wide GeocodeCache at the default path
+    """
+    global _shared
+    if _shared is None:
+        _shared = GeocodeCache()
+    return _shared
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Inspect or maintain the shared geocode cache')
+    parser.add_argument('--path', default=DEFAULT_GEOCODE_CACHE_PATH)
+    parser.add_argument('--stats', action='store_true', help='Show entry counts per table and provider')
+    parser.add_argument('--purge-expired', action='store_true', help='Delete expired entries')
+    args = parser.parse_args()
+
+    cache = GeocodeCache(args.path)
+    if args.purge_expired:
+        logger.info(f"🧹 Removed {cache.purge_expired():,} expired entries")
+    if args.stats or not args.purge_expired:
+        logger.info(f"📊 {cache.stats()}")
+    cache.close()
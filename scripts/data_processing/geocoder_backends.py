@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Pluggable forward geocoding backends
+
+Every backend has the same two methods:
+
+    backend.geocode(address, city, state, zip_code) -> (lat, lon) or (None, None)
+    backend.geocode_batch(queries) -> {id: (lat, lon) or (None, None)}
+
+where `queries` is a list of (id, address, city, state, zip_code). "No
+match" is (None, None). geocode() raises on network errors; geocode_batch()
+leaves out the ids it could not get an answer for, so one bad query does
+not lose the rest of the batch.
+
+Backends:
+    nominatim - geopy Nominatim, one request at a time, at most one per
+                `min_interval` seconds (batch = sequential single queries)
+    census    - US Census Bureau geocoder; batches go to the addressbatch
+                endpoint as CSV files of up to 10,000 addresses (only
+                "No_Match" rows count as no match; ties are left out)
+    mock      - answers from a local CSV (address, zip_code, latitude,
+                longitude) with optional simulated latency, for tests and
+                benchmarks without the network
+
+The scripts call get_backend(), which picks the backend named by the
+GEOCODER_BACKEND environment variable (.env works, default nominatim), so
+switching provider is a config change. geocode_many() runs a list of
+queries through the shared geocode cache and sends only the misses to the
+backend, as batches.
+"""
+
+import abc
+import csv
+import io
+import logging
+import os
+import time
+
+from geocode_cache import address_key, normalize_zip, shared_cache
+
+logger = logging.getLogger(__name__)
+
+class GeocoderBackend(abc.ABC):
+    """
+    Base class: subclasses implement geocode(); geocode_batch() defaults to a loop
+    """
+
+    name = 'base'
+    batch_size = 1
+
+    @abc.abstractmethod
+    def geocode(self, address, city='Boston', state='MA', zip_code=None):
+        """
+        (lat, lon) for one address, or (None, None) if there is no match
+        """
+
+    def geocode_batch(self, queries):
+        results = {}
+        for query_id, address, city, state, zip_code in queries:
+            try:
+                results[query_id] = self.geocode(address, city, state, zip_code)
+            except Exception as e:
+                # Left out of the results, so geocode_many() does not cache it as "no match"
+                logger.warning(f"⚠️ {self.name} failed on {address}: {e}")
+        return results
+
+def _one_line(address, city, state, zip_code):
+    full_address = f"{address}, {city}, {state}"
+    if zip_code:
+        full_address += f" {zip_code}"
+    return full_address
+
+class NominatimBackend(GeocoderBackend):
+    """
+    OpenStreetMap Nominatim through geopy, rate limited to one request per `min_interval`
+    """
+
+    name = 'nominatim'
+
+    def __init__(self, user_agent='abcdc_geocoder', min_interval=1.1, timeout=15):
+        from geopy.geocoders import Nominatim
+
+        self.geolocator = Nominatim(user_agent=user_agent)
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self._last_request = 0.0
+
+    def geocode(self, address, city='Boston', state='MA', zip_code=None):
+        wait = self.min_interval - (time.monotonic() - self._last_request)
+        if wait > 0:
+            time.sleep(wait)
+        self._last_request = time.monotonic()
+        location = self.geolocator.geocode(_one_line(address, city, state, zip_code), timeout=self.timeout)
+        if location:
+            return location.latitude, location.longitude
+        return None, None
+
+class CensusBatchBackend(GeocoderBackend):
+    """
+    US Census Bureau geocoder (onelineaddress for single queries, addressbatch for batches)
+    """
+
+    name = 'census'
+    batch_size = 10000
+    BASE_URL = 'https://geocoding.geo.census.gov/geocoder/locations'
+
+    def __init__(self, benchmark='Public_AR_Current', batch_size=10000, timeout=600):
+        import requests
+
+        self.requests = requests
+        self.session = requests.Session()
+        self.benchmark = benchmark
+        self.batch_size = min(batch_size, 10000)
+        self.timeout = timeout
+
+    def geocode(self, address, city='Boston', state='MA', zip_code=None):
+        response = self.session.get(f"{self.BASE_URL}/onelineaddress", params={
+            'address': _one_line(address, city, state, zip_code),
+            'benchmark': self.benchmark,
+            'format': 'json',
+        }, timeout=30)
+        response.raise_for_status()
+        matches = response.json().get('result', {}).get('addressMatches', [])
+        if matches:
+            return matches[0]['coordinates']['y'], matches[0]['coordinates']['x']
+        return None, None
+
+    @staticmethod
+    def batch_csv(queries):
+        """
+        Census batch input: Unique ID, Street address, City, State, ZIP (no header)
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for query_id, address, city, state, zip_code in queries:
+            writer.writerow([query_id, address, city or '', state or '', normalize_zip(zip_code)])
+        return buffer.getvalue()
+
+    @staticmethod
+    def parse_batch_response(text):
+        """
+        {id: (lat, lon)} for the "Match" rows of the batch result CSV and
+        {id: (None, None)} for the "No_Match" rows; "Tie" rows are left out
+        """
+        results = {}
+        for row in csv.reader(io.StringIO(text)):
+            if len(row) >= 6 and row[2] == 'Match' and row[5]:
+                lon, lat = row[5].split(',')
+                results[row[0]] = (float(lat), float(lon))
+            elif len(row) >= 3 and row[2] == 'No_Match':
+                results[row[0]] = (None, None)
+        return results
+
+    def geocode_batch(self, queries):
+        results = {}
+        for start in range(0, len(queries), self.batch_size):
+            chunk = queries[start:start + self.batch_size]
+            try:
+                response = self.session.post(
+                    f"{self.BASE_URL}/addressbatch",
+                    data={'benchmark': self.benchmark},
+                    files={'addressFile': ('addresses.csv', self.batch_csv(chunk), 'text/csv')},
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+            except self.requests.RequestException as e:
+                # The chunk's ids stay out of the results, so they are retried on the next run
+                logger.warning(f"⚠️ {self.name} batch of {len(chunk):,} addresses failed: {e}")
+                continue
+            by_id = self.parse_batch_response(response.text)
+            # The service echoes our ids as strings; ids it left out (or tied) are not answered
+            results.update({query_id: by_id[str(query_id)] for query_id, *_ in chunk if str(query_id) in by_id})
+        return results
+
+class MockFileBackend(GeocoderBackend):
+    """
+    Answers from a CSV with address, zip_code (optional), latitude, longitude columns.
+
+    Args:
+        path: The CSV file
+        request_latency: Seconds slept per request (single query or batch submission)
+        row_latency: Extra seconds slept per address in a batch
+        batch_size: Addresses per simulated batch submission
+    """
+
+    name = 'mock'
+
+    def __init__(self, path=None, request_latency=0.0, row_latency=0.0, batch_size=10000):
+        import pandas as pd
+
+        path = path or os.getenv('GEOCODER_MOCK_FILE', 'data/processed/mock_geocodes.csv')
+        answers = pd.read_csv(path, dtype={'zip_code': str})
+        zip_codes = answers['zip_code'] if 'zip_code' in answers else [None] * len(answers)
+        self.points = {}
+        for address, zip_code, lat, lon in zip(answers['address'], zip_codes,
+                                               answers['latitude'], answers['longitude']):
+            self.points.setdefault(address_key(address, zip_code), (float(lat), float(lon)))
+            self.points.setdefault(address_key(address), (float(lat), float(lon)))
+        self.request_latency = request_latency
+        self.row_latency = row_latency
+        self.batch_size = batch_size
+
+    def _lookup(self, address, zip_code):
+        return self.points.get(address_key(address, zip_code)) or self.points.get(address_key(address))
+
+    def geocode(self, address, city='Boston', state='MA', zip_code=None):
+        if self.request_latency:
+            time.sleep(self.request_latency)
+        return self._lookup(address, zip_code) or (None, None)
+
+    def geocode_batch(self, queries):
+        results = {}
+        for start in range(0, len(queries), self.batch_size):
+            chunk = queries[start:start + self.batch_size]
+            if self.request_latency or self.row_latency:
+                time.sleep(self.request_latency + self.row_latency * len(chunk))
+            for query_id, address, city, state, zip_code in chunk:
+                results[query_id] = self._lookup(address, zip_code) or (None, None)
+        return results
+
+BACKENDS = {
+    'nominatim': NominatimBackend,
+    'census': CensusBatchBackend,
+    'mock': MockFileBackend,
+}
+
+_backends = {}
+
+def get_backend(name=None, **kwargs):
+    """
+    Backend named `name`, else GEOCODER_BACKEND, else nominatim (one instance per name)
+    """
+    name = (name or os.getenv('GEOCODER_BACKEND', 'nominatim')).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown geocoder backend '{name}' (choose from {', '.join(BACKENDS)})")
+    if kwargs:
+        return BACKENDS[name](**kwargs)
+    if name not in _backends:
+        _backends[name] = BACKENDS[name]()
+    return _backends[name]
+
+def geocode_many(queries, backend=None, cache=None):
+    """
+    Resolve (id, address, city, state, zip_code) queries: cache first, then
+    every miss in batches through the backend. Results, including "no
+    match", are written to the cache under the backend's name; queries the
+    backend failed on are not cached, so the next run retries them.
+
+    Returns {id: (lat, lon)} for the queries that resolved.
+    """
+    backend = backend or get_backend()
+    cache = cache or shared_cache()
+
+    results = {}
+    pending = []
+    for query in queries:
+        query_id, address, city, state, zip_code = query
+        entry = cache.get_forward(address, zip_code)
+        if entry is None:
+            pending.append(query)
+            cache.misses += 1
+        else:
+            cache.hits += 1
+            if entry['latitude'] is not None:
+                results[query_id] = (entry['latitude'], entry['longitude'])
+
+    # Cache each submission as it completes, so a failure later on loses nothing
+    for start in range(0, len(pending), backend.batch_size):
+        chunk = pending[start:start + backend.batch_size]
+        found = backend.geocode_batch(chunk)
+        for query_id, address, city, state, zip_code in chunk:
+            if query_id not in found:
+                continue
+            lat, lon = found[query_id]
+            cache.put_forward(address, lat, lon, zip_code=zip_code, provider=backend.name)
+            if lat is not None:
+                results[query_id] = (lat, lon)
+    return results
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Offline reverse geocoder: building points -> parcel addresses with an STRtree
+
+Parcel polygons (allston_brighton_parcels.geojson) are joined on
+MAP_PAR_ID = GIS_ID to the FY assessment CSV, giving one address per parcel,
+and loaded into a shapely STRtree in a metric CRS (EPSG:26986, MA State
+Plane, meters). A whole array of points is then resolved in one call:
+
+- point_in_parcel - the point lies inside an addressed parcel (confidence high)
+- nearest_parcel  - otherwise the nearest addressed parcel within
+                    `max_distance_m` (confidence medium within
+                    `medium_distance_m`, low beyond it)
+- unmatched       - nothing within the cap; callers may fall back to Nominatim
+
+All ~10k building centroids resolve in well under a second.
+
+Usage (from the repository root):
+    python scripts/data_processing/parcel_reverse_geocoder.py
+    python scripts/data_processing/parcel_reverse_geocoder.py --max-distance 50 --output data/processed/local_reverse_geocoded_buildings.csv
+"""
+
+import argparse
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from address_point_index import DEFAULT_ASSESSMENT_CSV, DEFAULT_PARCELS_GEOJSON, REPO_ROOT
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUILDING_POINTS_GEOJSON = str(REPO_ROOT / 'data' / 'processed' / 'gis_layers' / 'allston_brighton_building_points.geojson')
+DEFAULT_OUTPUT_PATH = str(REPO_ROOT / 'data' / 'processed' / 'local_reverse_geocoded_buildings.csv')
+
+# Massachusetts State Plane (meters), so distance caps are in meters
+METRIC_CRS = 'EPSG:26986'
+
+ADDRESS_COLUMNS = ['parcel_id', 'house_number', 'street', 'neighborhood', 'postcode', 'full_address']
+RESULT_COLUMNS = ADDRESS_COLUMNS + ['method', 'confidence', 'distance_m']
+
+def load_addressed_parcels(parcels_geojson=DEFAULT_PARCELS_GEOJSON, assessment_csv=DEFAULT_ASSESSMENT_CSV):
+    """
+    Parcel polygons with one assessed address each (parcels without one are dropped)
+    """
+    import geopandas as gpd
+
+    parcels = gpd.read_file(parcels_geojson, columns=['MAP_PAR_ID'])
+    parcels = parcels[parcels.geometry.notna() & ~parcels.geometry.is_empty]
+    parcels['MAP_PAR_ID'] = parcels['MAP_PAR_ID'].astype(str)
+
+    # Condo units share their parent parcel's GIS_ID; the first unit's address stands for the lot
+    addresses = pd.read_csv(assessment_csv, usecols=['GIS_ID', 'ST_NUM', 'ST_NAME', 'CITY', 'ZIP_CODE'], dtype=str)
+    addresses = addresses.dropna(subset=['ST_NAME']).drop_duplicates('GIS_ID')
+    parcels = parcels.merge(addresses, left_on='MAP_PAR_ID', right_on='GIS_ID')
+
+    house_number = parcels['ST_NUM'].fillna('').str.strip()
+    street = parcels['ST_NAME'].str.strip()
+    neighborhood = parcels['CITY'].fillna('').str.strip().str.title()
+    postcode = parcels['ZIP_CODE'].fillna('').str.strip().str.zfill(5)
+    full_address = ((house_number + ' ' + street).str.strip() + ', '
+                    + neighborhood.where(neighborhood != '', 'Boston') + ', MA ' + postcode).str.strip()
+
+    return gpd.GeoDataFrame({
+        'parcel_id': parcels['MAP_PAR_ID'].values,
+        'house_number': house_number.values,
+        'street': street.values,
+        'neighborhood': neighborhood.values,
+        'postcode': postcode.values,
+        'full_address': full_address.values,
+    }, geometry=parcels.geometry.values, crs=parcels.crs)
+
+class ParcelReverseGeocoder:
+    """
+    Vectorized point -> parcel address lookup over an STRtree.
+
+    Args:
+        parcels: GeoDataFrame of polygons with ADDRESS_COLUMNS
+        max_distance_m: Largest distance for the nearest-parcel fallback
+        medium_distance_m: Nearest-parcel matches closer than this are 'medium' confidence
+    """
+
+    def __init__(self, parcels, max_distance_m=30.0, medium_distance_m=10.0):
+        from shapely import STRtree
+
+        self.max_distance_m = max_distance_m
+        self.medium_distance_m = medium_distance_m
+        projected = parcels.to_crs(METRIC_CRS) if parcels.crs is not None else parcels
+        self.addresses = parcels[ADDRESS_COLUMNS].reset_index(drop=True)
+        self.tree = STRtree(projected.geometry.values)
+
+    def __len__(self):
+        return len(self.addresses)
+
+    @classmethod
+    def from_files(cls, parcels_geojson=DEFAULT_PARCELS_GEOJSON, assessment_csv=DEFAULT_ASSESSMENT_CSV, **kwargs):
+        return cls(load_addressed_parcels(parcels_geojson, assessment_csv), **kwargs)
+
+    def reverse(self, longitudes, latitudes):
+        """
+        One row per input point (same order): ADDRESS_COLUMNS + method, confidence, distance_m
+        """
+        import geopandas as gpd
+
+        points = gpd.GeoSeries.from_xy(np.asarray(longitudes, dtype=float), np.asarray(latitudes, dtype=float),
+                                       crs='EPSG:4326').to_crs(METRIC_CRS).values
+        n = len(points)
+        parcel_index = np.full(n, -1, dtype=np.int64)
+        distance = np.full(n, np.nan)
+        method = np.full(n, 'unmatched', dtype=object)
+
+        point_idx, tree_idx = self.tree.query(points, predicate='within')
+        # A point on a shared edge matches two parcels; keep the first
+        point_idx, first = np.unique(point_idx, return_index=True)
+        parcel_index[point_idx] = tree_idx[first]
+        distance[point_idx] = 0.0
+        method[point_idx] = 'point_in_parcel'
+
+        outside = np.flatnonzero(parcel_index < 0)
+        if len(outside) and self.max_distance_m > 0:
+            (near_point, near_tree), near_distance = self.tree.query_nearest(
+                points[outside], max_distance=self.max_distance_m, return_distance=True, all_matches=False)
+            hits = outside[near_point]
+            parcel_index[hits] = near_tree
+            distance[hits] = near_distance
+            method[hits] = 'nearest_parcel'
+
+        matched = parcel_index >= 0
+        result = pd.DataFrame(index=range(n), columns=ADDRESS_COLUMNS, dtype=object)
+        result.loc[matched, ADDRESS_COLUMNS] = self.addresses.iloc[parcel_index[matched]].values
+        result['method'] = method
+        result['confidence'] = np.select(
+            [method == 'point_in_parcel', (method == 'nearest_parcel') & (distance <= self.medium_distance_m),
+             method == 'nearest_parcel'],
+            ['high', 'medium', 'low'], default='none')
+        result['distance_m'] = np.round(distance, 2)
+        return result
+
+def load_building_points(path=DEFAULT_BUILDING_POINTS_GEOJSON):
+    """
+    building_id / struct_id / area_sqft / latitude / longitude for every building point
+    """
+    import geopandas as gpd
+
+    buildings = gpd.read_file(path)
+    if buildings.crs is not None and buildings.crs.to_epsg() != 4326:
+        buildings = buildings.to_crs(epsg=4326)
+    return pd.DataFrame({
+        'building_id': buildings['building_id'] if 'building_id' in buildings else range(len(buildings)),
+        'struct_id': buildings['STRUCT_ID'] if 'STRUCT_ID' in buildings else 'Unknown',
+        'area_sqft': buildings['AREA_SQ_FT'] if 'AREA_SQ_FT' in buildings else None,
+        'latitude': buildings.geometry.y.values,
+        'longitude': buildings.geometry.x.values,
+    })
+
+def iter_building_points(path=DEFAULT_BUILDING_POINTS_GEOJSON, chunk_size=2000):
+    """
+    load_building_points() in DataFrame chunks, streamed from the file with
+    pyogrio's Arrow reader so only one chunk is in memory at a time
+    """
+    import geopandas as gpd
+    import pyogrio
+    import shapely
+
+    offset = 0
+    with pyogrio.open_arrow(path, batch_size=chunk_size, use_pyarrow=True) as (meta, reader):
+        geometry_name = meta['geometry_name'] or 'wkb_geometry'
+        for batch in reader:
+            columns = batch.schema.names
+            points = gpd.GeoSeries(shapely.from_wkb(batch.column(geometry_name).to_numpy(zero_copy_only=False)),
+                                   crs=meta['crs'])
+            if points.crs is not None and points.crs.to_epsg() != 4326:
+                points = points.to_crs(epsg=4326)
+            positions = range(offset, offset + batch.num_rows)
+            offset += batch.num_rows
+            yield pd.DataFrame({
+                'building_id': batch.column('building_id').to_pandas() if 'building_id' in columns else positions,
+                'struct_id': batch.column('STRUCT_ID').to_pandas() if 'STRUCT_ID' in columns else 'Unknown',
+                'area_sqft': batch.column('AREA_SQ_FT').to_pandas() if 'AREA_SQ_FT' in columns else None,
+                'latitude': points.y.values,
+                'longitude': points.x.values,
+            })
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Reverse geocode building points against addressed parcels')
+    parser.add_argument('--buildings', default=DEFAULT_BUILDING_POINTS_GEOJSON)
+    parser.add_argument('--parcels', default=DEFAULT_PARCELS_GEOJSON)
+    parser.add_argument('--assessment-csv', default=DEFAULT_ASSESSMENT_CSV)
+    parser.add_argument('--max-distance', type=float, default=30.0, help='Nearest-parcel cap in meters')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    geocoder = ParcelReverseGeocoder.from_files(args.parcels, args.assessment_csv, max_distance_m=args.max_distance)
+    buildings = load_building_points(args.buildings)
+    logger.info(f"🗺️  {len(geocoder):,} addressed parcels, {len(buildings):,} building points "
+                f"({time.perf_counter() - start:.1f}s to load)")
+
+    start = time.perf_counter()
+    results = pd.concat([buildings, geocoder.reverse(buildings['longitude'], buildings['latitude'])], axis=1)
+    logger.info(f"⚡ Reverse geocoded {len(results):,} buildings in {time.perf_counter() - start:.2f}s")
+    for method, count in results['method'].value_counts().items():
+        logger.info(f"  {method}: {count:,}")
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    results.to_csv(args.output, index=False)
+    logger.info(f"💾 Saved to {args.output}")
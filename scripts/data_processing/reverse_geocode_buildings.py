@@ -14,9 +14,14 @@ import time
 import requests
 from pathlib import Path
 import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scraping'))
+
+from geocode_cache import shared_cache
+from structured_logging import event, setup_logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 def reverse_geocode_coordinates(lat, lon, service='nominatim'):
@@ -42,34 +47,37 @@ def reverse_geocode_coordinates(lat, lon, service='nominatim'):
 def reverse_geocode_nominatim(lat, lon):
     """
     Use OpenStreetMap Nominatim service for reverse geocoding.
-    Free but has rate limits.
+    Free but has rate limits, so answers are kept in the shared geocode cache.
     """
     try:
-        url = "https://nominatim.openstreetmap.org/reverse"
-        params = {
-            'lat': lat,
-            'lon': lon,
-            'format': 'json',
-            'addressdetails': 1,
-            'zoom': 18  # Get detailed address
-        }
-        
-        headers = {
-            'User-Agent': 'Allston-Brighton-Analysis/1.0'  # Required by Nominatim
-        }
-        
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return parse_nominatim_response(data)
-        else:
-            logger.warning(f"HTTP {response.status_code}: {response.text}")
-            return None
-            
+        data = shared_cache().reverse(lat, lon, lambda: fetch_nominatim_reverse(lat, lon))
     except Exception as e:
         logger.error(f"Error with Nominatim: {e}")
         return None
+    return parse_nominatim_response(data) if data else None
+
+def fetch_nominatim_reverse(lat, lon):
+    """
+    One Nominatim reverse request; raises on HTTP errors so they are not cached.
+    """
+    url = "https://nominatim.openstreetmap.org/reverse"
+    params = {
+        'lat': lat,
+        'lon': lon,
+        'format': 'json',
+        'addressdetails': 1,
+        'zoom': 18  # Get detailed address
+    }
+    
+    headers = {
+        'User-Agent': 'Allston-Brighton-Analysis/1.0'  # Required by Nominatim
+    }
+    
+    response = requests.get(url, params=params, headers=headers, timeout=10)
+    
+    if response.status_code != 200:
+        raise requests.HTTPError(f"HTTP {response.status_code}: {response.text}")
+    return response.json()
 
 def parse_nominatim_response(data):
     """
@@ -183,8 +191,10 @@ def reverse_geocode_all_buildings():
         if (i + 1) % 100 == 0:  # Progress update every 100 buildings
             logger.info(f"Processed {i+1}/{len(data['features'])} buildings...")
         
-        # Reverse geocode
+        # Reverse geocode (cache first)
+        misses_before = shared_cache().misses
         address_info = reverse_geocode_coordinates(lat, lon)
+        went_to_network = shared_cache().misses > misses_before
         
         if address_info:
             # Add building info to result
@@ -199,13 +209,13 @@ def reverse_geocode_all_buildings():
             results.append(result)
             processed += 1
             
-            if processed % 10 == 0:  # Log every 10 successful geocodes
-                logger.info(f"  ✓ Geocoded {processed} buildings so far...")
+            logger.info(f"  ✓ Geocoded {processed} buildings so far...",
+                        extra=event('building_geocoded', sample=True, struct_id=struct_id, lat=lat, lon=lon))
         else:
             skipped += 1
         
-        # Rate limiting - be respectful to the service
-        if (i + 1) % 10 == 0:  # Sleep every 10 requests
+        # Rate limiting - be respectful to the service (cache hits are free)
+        if went_to_network and shared_cache().misses % 10 == 0:  # Sleep every 10 requests
             time.sleep(1)  # Shorter sleep for faster processing
     
     logger.info(f"\n✓ Processing complete!")
@@ -248,4 +258,6 @@ def main():
         logger.error("No buildings were successfully geocoded")
 
 if __name__ == "__main__":
+    # Set up logging (JSON lines in the file, handler I/O on a background thread)
+    setup_logging('data/processed/reverse_geocode_buildings.log')
     main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Long-format store for scraped assessment value history
+
+The scraper keeps each parcel's value history as a JSON string in the
+`value_history` column. This module explodes it once into a long table
+
+    parcel_id | fiscal_year | property_type | assessed_value
+
+written to Parquet (and loaded into the property_value_history table in
+Postgres by web_app/scripts/data_loading/load_value_history.py), and
+computes the per-parcel trend metrics with one vectorized group-by over
+that table instead of per-row Python over the JSON.
+
+Trend metrics match create_clean_dataset.parse_value_history: trends are
+the percent change from the 5th / 10th most recent year to the most recent,
+volatility is the population standard deviation of all years.
+
+Usage (from the repository root):
+    python scripts/data_processing/value_history_store.py
+    python scripts/data_processing/value_history_store.py --input data/processed/all_parcels_comprehensive_data.csv --metrics
+"""
+
+import argparse
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VALUE_HISTORY_PATH = 'data/processed/value_history.parquet'
+VALUE_HISTORY_COLUMNS = ['parcel_id', 'fiscal_year', 'property_type', 'assessed_value']
+
+def explode_value_history(df):
+    """
+    Long table of (parcel_id, fiscal_year, property_type, assessed_value) from `value_history` JSON
+
+    Rows without a parseable year or value are dropped; if a year appears
+    twice for a parcel the first (page order) entry is kept.
+    """
+    parcel_ids, entries = [], []
+    for parcel_id, history in zip(df['parcel_id'].astype(str), df['value_history']):
+        if not isinstance(history, str) or not history:
+            continue
+        try:
+            parsed = json.loads(history)
+        except ValueError:
+            logger.warning(f"Could not parse value history for parcel {parcel_id}")
+            continue
+        parcel_ids.extend([parcel_id] * len(parsed))
+        entries.extend(parsed)
+
+    long_df = pd.DataFrame.from_records(entries, columns=['fiscal_year', 'property_type', 'assessed_value'])
+    long_df.insert(0, 'parcel_id', parcel_ids)
+    long_df['fiscal_year'] = pd.to_numeric(long_df['fiscal_year'], errors='coerce')
+    long_df['assessed_value'] = pd.to_numeric(
+        long_df['assessed_value'].astype(str).str.replace(r'[$,\s]', '', regex=True), errors='coerce')
+    long_df = long_df.dropna(subset=['fiscal_year', 'assessed_value'])
+    long_df = long_df.drop_duplicates(['parcel_id', 'fiscal_year'], keep='first')
+    return long_df.astype({'fiscal_year': 'int32', 'property_type': 'string'}).reset_index(drop=True)
+
+def write_value_history(long_df, path=DEFAULT_VALUE_HISTORY_PATH):
+    long_df.sort_values(['parcel_id', 'fiscal_year']).to_parquet(path, index=False, compression='zstd')
+    logger.info(f"💾 Wrote {len(long_df):,} value history rows to {path}")
+
+def read_value_history(path=DEFAULT_VALUE_HISTORY_PATH):
+    return pd.read_parquet(path)
+
+def trend_metrics(long_df):
+    """
+    Per-parcel value history metrics from the long table, indexed by parcel_id
+    """
+    ordered = long_df.sort_values(['parcel_id', 'fiscal_year'], ascending=[True, False])
+    groups = ordered.groupby('parcel_id', sort=False)
+    recency = groups.cumcount()
+    values = ordered['assessed_value']
+
+    latest = ordered[recency == 0].set_index('parcel_id')
+    metrics = pd.DataFrame({
+        'latest_assessed_value': latest['assessed_value'],
+        'latest_property_type': latest['property_type'],
+        'latest_fiscal_year': latest['fiscal_year'],
+        'max_value': groups['assessed_value'].max(),
+        'min_value': groups['assessed_value'].min(),
+        'value_volatility': groups['assessed_value'].std(ddof=0),
+        'years_of_data': groups.size(),
+    })
+    for years in (5, 10):
+        base = ordered[recency == years - 1].set_index('parcel_id')['assessed_value']
+        metrics[f'value_trend_{years}yr'] = (
+            (metrics['latest_assessed_value'] - base) / base.replace(0, np.nan) * 100
+        )
+    return metrics
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Explode scraped value history into a long Parquet table')
+    parser.add_argument('--input', default='data/processed/all_parcels_comprehensive_data.csv',
+                        help='Scraped parcel CSV with a value_history column')
+    parser.add_argument('--output', default=DEFAULT_VALUE_HISTORY_PATH)
+    parser.add_argument('--metrics', action='store_true', help='Also print trend metrics summary')
+    args = parser.parse_args()
+
+    raw = pd.read_csv(args.input, usecols=['parcel_id', 'value_history'], dtype={'parcel_id': str})
+    long_df = explode_value_history(raw)
+    write_value_history(long_df, args.output)
+    if args.metrics:
+        print(trend_metrics(long_df).describe().T.to_string())
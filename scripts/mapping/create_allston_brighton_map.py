@@ -21,6 +21,12 @@ from pathlib import Path
 import logging
 from shapely.geometry import box
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data_extraction'))
+
+from massgis_parquet_cache import cache_available, read_cached_layer
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
@@ -76,23 +82,28 @@ def extract_mbta_stops():
     
     vector_gdb = Path("data/raw/statewide_viewer_fgdb/MassGIS_Vector_GISDATA.gdb")
     
-    if not vector_gdb.exists():
+    if not vector_gdb.exists() and not cache_available('MBTABUSSTOPS_PT'):
         logger.warning("  Vector database not found")
         return None
     
     try:
-        # Read MBTA bus stops directly
-        stops = gpd.read_file(vector_gdb, layer='MBTABUSSTOPS_PT')
-        logger.info(f"  Loaded {len(stops)} total MBTA stops")
+        # Get Allston-Brighton boundary for proper filtering
+        boundary = get_allston_brighton_boundary()
+        boundary_geom = boundary.geometry.iloc[0]
+        
+        # Only stops in the boundary's bounding box are read; no town filter, since
+        # the box reaches into Brookline and Cambridge
+        if cache_available('MBTABUSSTOPS_PT'):
+            stops = read_cached_layer('MBTABUSSTOPS_PT', bbox=boundary)
+            logger.info(f"  Loaded {len(stops)} MBTA stops from the GeoParquet cache")
+        else:
+            stops = gpd.read_file(vector_gdb, layer='MBTABUSSTOPS_PT', engine="pyogrio", bbox=boundary)
+            logger.info(f"  Loaded {len(stops)} MBTA stops near Allston-Brighton")
         
         # Convert to WGS84
         if stops.crs != 'EPSG:4326':
             stops = stops.to_crs('EPSG:4326')
         
-        # Get Allston-Brighton boundary for proper filtering
-        boundary = get_allston_brighton_boundary()
-        boundary_geom = boundary.geometry.iloc[0]
-        
         # Filter stops within Allston-Brighton boundary
         stops_within = stops[stops.geometry.within(boundary_geom)]
         
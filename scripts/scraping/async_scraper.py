@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Concurrent async scraper for Boston.gov assessing pages
+
+Runs the same search -> details two-hop fetch as
+boston_assessing.AssessingClient, but for many parcels
+at once over a shared aiohttp connection pool. A per-host adaptive rate
+controller (rate_controller.py) keeps the request rate under a politeness
+ceiling no matter how many workers run, and backs off when the site pushes back.
+
+Output columns are identical to scrape_all_parcels.py, so
+create_clean_dataset.py can read the results unchanged.
+
+Every fetched page is kept in the response cache (response_cache.py);
+`--replay` re-runs extraction over the cache without any network calls.
+Details URLs are remembered in details_url_index.py, so re-scrapes skip the
+search page and need one request per parcel. Pages are parsed with the
+single-pass lxml parser in property_page_parser.py, in a process pool that
+runs alongside the fetchers (fetch -> parse -> write stages joined by
+bounded queues), and results are journaled in batches. The same batches
+are cleaned in-stream into typed Parquet partitions (clean_parquet_sink.py).
+
+Usage (from the repository root):
+    python scripts/scraping/async_scraper.py --concurrency 8 --rate 2.0
+    python scripts/scraping/async_scraper.py --parse-workers 4
+    python scripts/scraping/async_scraper.py --replay
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from boston_assessing import (
+    BASE_URL, conditional_headers, failure_record, find_details_href, load_parcel_list,
+    make_record, records_to_frame, replay_parcel, search_url, store_response
+)
+from details_url_index import DEFAULT_INDEX_PATH, DetailsUrlIndex
+from rate_controller import RETRYABLE_STATUSES, AdaptiveRateController, parse_retry_after
+from response_cache import DEFAULT_CACHE_PATH, ResponseCache
+from scrape_all_parcels import save_progress
+from scrape_journal import ScrapeJournal
+from structured_logging import event, setup_logging
+
+logger = logging.getLogger(__name__)
+
+class AsyncParcelScraper:
+    """
+    Scrape many parcels concurrently while respecting a per-host rate limit.
+
+    Each host gets its own AdaptiveRateController, which paces requests up to
+    `rate_per_host` and backs off on errors, 429/5xx and Retry-After.
+
+    Args:
+        concurrency: Number of parcels in flight at once (also the pool size)
+        rate_per_host: Maximum requests per second sent to any single host
+        max_retries: Attempts per parcel on retryable errors (within the retry budget)
+        timeout: Total timeout in seconds for each request
+        cache: Optional ResponseCache that every fetched page is written to
+        url_index: Optional DetailsUrlIndex used to skip the search-page hop
+        base_url: Assessing search URL (overridable for local stand-ins)
+
+    As with AssessingClient, cached pages are revalidated with conditional
+    GETs and counted in `not_modified` / `unchanged`.
+    """
+
+    controller_class = AdaptiveRateController
+
+    def __init__(self, concurrency=8, rate_per_host=2.0, max_retries=3, timeout=30, cache=None,
+                 url_index=None, base_url=BASE_URL):
+        self.concurrency = concurrency
+        self.rate_per_host = rate_per_host
+        self.max_retries = max_retries
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.cache = cache
+        self.url_index = url_index
+        self.base_url = base_url
+        self._controllers = {}
+        self.not_modified = 0
+        self.unchanged = 0
+
+    def controller(self, url):
+        """
+        Return the rate controller for a URL's host, creating it on first use
+        """
+        host = urlsplit(url).netloc
+        if host not in self._controllers:
+            self._controllers[host] = self.controller_class(
+                initial_rate=min(0.5, self.rate_per_host), max_rate=self.rate_per_host
+            )
+        return self._controllers[host]
+
+    async def fetch(self, session, url, revalidate=True):
+        """
+        Fetch a URL once the host's rate controller allows it and return the body
+
+        A 304 for a page the cache holds no copy of is fetched again without
+        validators (`revalidate=False`) rather than returned as an empty page.
+        """
+        headers, cached = conditional_headers(self.cache if revalidate else None, url)
+        controller = self.controller(url)
+        await controller.wait_async()
+
+        start = time.monotonic()
+        try:
+            response = await session.get(url, headers=headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            controller.record_failure()
+            raise
+
+        async with response:
+            if response.status in RETRYABLE_STATUSES:
+                controller.record_failure(parse_retry_after(response.headers.get('Retry-After')), response.status)
+            else:
+                controller.record_success(time.monotonic() - start)
+
+            if response.status == 304:
+                body = self.cache.get(url) if cached is not None else None
+                if body is None and not revalidate:
+                    raise aiohttp.ClientResponseError(response.request_info, response.history, status=304,
+                                                      message='Not Modified without a cached copy')
+                if body is not None:
+                    self.not_modified += 1
+            else:
+                response.raise_for_status()
+                body = await response.read()
+            response_headers = response.headers
+
+        if body is None:
+            return await self.fetch(session, url, revalidate=False)
+        if self.cache is not None and store_response(self.cache, url, body, response_headers, cached):
+            self.unchanged += 1
+        return body
+
+    async def resolve_details_url(self, session, parcel_id, use_index=True):
+        """
+        Return the details URL for a parcel, skipping the search hop when it is indexed
+        """
+        if use_index and self.url_index is not None:
+            details_url = self.url_index.get(parcel_id)
+            if details_url:
+                return details_url
+
+        search_html = await self.fetch(session, search_url(parcel_id, self.base_url))
+        details_href = find_details_href(search_html)
+        if not details_href:
+            return None
+
+        details_url = f"{self.base_url}{details_href}"
+        if self.url_index is not None:
+            self.url_index.set(parcel_id, details_url)
+        return details_url
+
+    async def _fetch_details_once(self, session, parcel_id):
+        details_url = await self.resolve_details_url(session, parcel_id)
+        if not details_url:
+            return None
+
+        try:
+            return await self.fetch(session, details_url)
+        except aiohttp.ClientResponseError as e:
+            if self.url_index is None or e.status in RETRYABLE_STATUSES:
+                raise
+            # Indexed URL may be stale; redo the search hop once
+            self.url_index.discard(parcel_id)
+            details_url = await self.resolve_details_url(session, parcel_id, use_index=False)
+            if not details_url:
+                raise
+            return await self.fetch(session, details_url)
+
+    async def fetch_details(self, session, parcel_id):
+        """
+        Fetch a parcel's details page, retrying 429/5xx, timeouts and connection
+        errors with jittered backoff.
+
+        Returns (details_html, None) on success or (None, failure_record) otherwise.
+        """
+        attempt = 0
+        while True:
+            try:
+                details_html = await self._fetch_details_once(session, parcel_id)
+                if details_html is None:
+                    return None, failure_record(parcel_id, 'No details link found')
+                return details_html, None
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                retryable = not isinstance(e, aiohttp.ClientResponseError) or e.status in RETRYABLE_STATUSES
+                controller = self.controller(self.base_url)
+                if not retryable or attempt + 1 >= self.max_retries or not controller.try_retry():
+                    logger.error(f"Error scraping parcel {parcel_id}: {e!r}")
+                    return None, failure_record(parcel_id, repr(e))
+                await asyncio.sleep(controller.backoff_delay(attempt))
+                attempt += 1
+
+            except Exception as e:
+                logger.error(f"Error scraping parcel {parcel_id}: {e}")
+                return None, failure_record(parcel_id, e)
+
+    async def scrape_parcel(self, session, parcel_id):
+        """
+        Async equivalent of AssessingClient.scrape_parcel (parses inline)
+        """
+        details_html, failure = await self.fetch_details(session, parcel_id)
+        return failure or make_record(parcel_id, details_html)
+
+    async def scrape_many(self, parcel_ids, on_batch=None, parse_workers=None, queue_size=None,
+                          batch_size=50, refill=None):
+        """
+        Scrape parcel IDs through three overlapping stages joined by bounded queues:
+
+            fetch (`concurrency` async workers sharing one connection pool)
+              -> parse (`parse_workers` processes; 0 parses in the event loop)
+              -> write (records handed to `on_batch(records)` in batches of `batch_size`)
+
+        Fetching never waits for parsing: pages queue up for the process pool,
+        and when `queue_size` pages are waiting the fetchers block, so memory
+        stays bounded however far the network runs ahead of the CPUs.
+
+        `refill()`, if given, is called whenever the fetchers run out of
+        parcel IDs and returns more (an empty list when there are none left),
+        so a long-running caller can feed work into one pool and one session.
+
+        Returns every record when `on_batch` is None; otherwise records are
+        only passed to `on_batch` and an empty list is returned. If any stage
+        raises (e.g. `on_batch`), the other stages are cancelled and the
+        exception is re-raised instead of leaving them blocked on a full queue.
+        """
+        if parse_workers is None:
+            parse_workers = os.cpu_count() or 1
+        queue_size = queue_size or self.concurrency * 4
+
+        pending = asyncio.Queue()
+        for parcel_id in parcel_ids:
+            pending.put_nowait(parcel_id)
+        pages = asyncio.Queue(maxsize=queue_size)
+        records = asyncio.Queue(maxsize=queue_size)
+        results = []
+
+        loop = asyncio.get_running_loop()
+        pool = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers else None
+        refill_lock = asyncio.Lock()
+
+        async def next_parcel():
+            try:
+                return pending.get_nowait()
+            except asyncio.QueueEmpty:
+                if refill is None:
+                    return None
+            async with refill_lock:
+                # Another fetcher may have refilled while this one waited for the lock
+                if pending.empty():
+                    for parcel_id in refill():
+                        pending.put_nowait(parcel_id)
+                try:
+                    return pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return None
+
+        async def fetcher(session):
+            while True:
+                parcel_id = await next_parcel()
+                if parcel_id is None:
+                    return
+                details_html, failure = await self.fetch_details(session, parcel_id)
+                await pages.put((parcel_id, details_html, failure))
+
+        async def parser():
+            while True:
+                item = await pages.get()
+                if item is None:
+                    return
+                parcel_id, details_html, failure = item
+                if failure is not None:
+                    record = failure
+                else:
+                    try:
+                        if pool is None:
+                            record = make_record(parcel_id, details_html)
+                        else:
+                            record = await loop.run_in_executor(pool, make_record, parcel_id, details_html)
+                    except Exception as e:
+                        logger.error(f"Error parsing parcel {parcel_id}: {e}")
+                        record = failure_record(parcel_id, e)
+                await records.put(record)
+
+        def flush(batch):
+            if on_batch is not None:
+                on_batch(batch)
+            else:
+                results.extend(batch)
+
+        async def writer():
+            batch = []
+            while True:
+                record = await records.get()
+                if record is None:
+                    if batch:
+                        flush(batch)
+                    return
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+
+        # Two parse tasks per process keep every worker busy while results are handed back
+        parser_count = max(1, parse_workers) * 2
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            fetchers = [asyncio.create_task(fetcher(session)) for _ in range(self.concurrency)]
+            parsers = [asyncio.create_task(parser()) for _ in range(parser_count)]
+            write_task = asyncio.create_task(writer())
+
+            async def drain():
+                # Each stage gets its end-of-input markers once the one before it is done
+                await asyncio.gather(*fetchers)
+                for _ in parsers:
+                    await pages.put(None)
+                await asyncio.gather(*parsers)
+                await records.put(None)
+                await write_task
+
+            stages = fetchers + parsers + [write_task]
+            drain_task = asyncio.create_task(drain())
+            try:
+                # Supervise every stage: the first one to raise stops the whole pipeline
+                done, _ = await asyncio.wait(stages + [drain_task], return_when=asyncio.FIRST_EXCEPTION)
+                errors = [task.exception() for task in done if not task.cancelled() and task.exception()]
+                if errors:
+                    raise errors[0]
+            finally:
+                for task in stages + [drain_task]:
+                    task.cancel()
+                if pool is not None:
+                    pool.shutdown(cancel_futures=True)
+
+        return results
+
+def replay_from_cache(cache_path=DEFAULT_CACHE_PATH, index_path=DEFAULT_INDEX_PATH,
+                      output_file='data/processed/all_parcels_comprehensive_data.csv'):
+    """
+    Re-extract every cached parcel without making any network calls
+    """
+    cache = ResponseCache(cache_path)
+    url_index = DetailsUrlIndex(index_path)
+    search_prefix = search_url('')
+    parcel_ids = [url[len(search_prefix):] for url in cache.urls(search_prefix)]
+    logger.info(f"🔁 Replaying extraction for {len(parcel_ids)} cached parcels from {cache_path}")
+
+    start = time.monotonic()
+    results = [replay_parcel(cache, parcel_id, url_index) for parcel_id in parcel_ids]
+    elapsed = time.monotonic() - start
+    cache.close()
+    url_index.close()
+
+    save_progress(results, output_file)
+    successful = sum(1 for r in results if r.get('scraped_successfully'))
+    logger.info(f"🎉 Replay completed! {successful}/{len(results)} parcels extracted, saved to: {output_file}")
+    if results:
+        logger.info(f"  ⏱️ {len(results)} parcels in {elapsed:.1f}s ({len(results) / elapsed:.2f} parcels/s)")
+
+    return records_to_frame(results)
+
+def scrape_all_parcels_async(concurrency=8, rate_per_host=2.0, limit=None, parse_workers=None,
+                             output_file='data/processed/all_parcels_comprehensive_data.csv',
+                             progress_file='data/processed/parcel_scraping_progress.csv',
+                             journal_dir='data/processed/scrape_journal',
+                             parquet_dir='data/processed/clean_parcels',
+                             cache_path=DEFAULT_CACHE_PATH, index_path=DEFAULT_INDEX_PATH):
+    """
+    Main function to scrape all parcels concurrently
+
+    Finished parcels are appended to the scrape journal in batches as they
+    come out of the parse stage; progress_file is only read once, to seed an
+    empty journal. Unless parquet_dir is None, the same batches are cleaned
+    and written as typed Parquet partitions (clean_parquet_sink.py).
+    """
+    logger.info(f"🚀 Starting async parcel scraping (concurrency={concurrency}, rate={rate_per_host}/s per host)")
+
+    parcel_ids = load_parcel_list()
+    if not parcel_ids:
+        logger.error("❌ No parcel IDs found")
+        return None
+
+    # Resume by parcel ID from the append-only journal
+    journal = ScrapeJournal(journal_dir)
+    if not len(journal) and os.path.exists(progress_file):
+        journal.import_csv(progress_file)
+    if len(journal):
+        logger.info(f"📋 Resuming: {len(journal)} parcels already in {journal_dir}")
+    parcel_ids = [p for p in parcel_ids if p not in journal]
+
+    if limit is not None:
+        parcel_ids = parcel_ids[:limit]
+
+    sink = None
+    if parquet_dir is not None:
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data_processing'))
+        from clean_parquet_sink import CleanParquetSink
+        sink = CleanParquetSink(parquet_dir)
+
+    logger.info(f"🔄 {len(parcel_ids)} parcels to scrape")
+    start = time.monotonic()
+    completed = 0
+
+    def on_batch(batch):
+        nonlocal completed
+        journal.extend(batch)
+        if sink is not None:
+            sink.write(batch)
+        completed += len(batch)
+        for result in batch:
+            if not result.get('scraped_successfully'):
+                logger.warning(f"⚠️ Failed to scrape parcel {result['parcel_id']}: {result.get('error', 'Unknown error')}",
+                               extra=event('parcel_failed', parcel_id=result['parcel_id'], error=result.get('error')))
+        if completed % 50 == 0 or completed == len(parcel_ids):
+            elapsed = time.monotonic() - start
+            logger.info(f"📊 Progress: {completed}/{len(parcel_ids)} parcels ({completed / elapsed:.2f} parcels/s)",
+                        extra=event('progress', done=completed, total=len(parcel_ids),
+                                    parcels_per_second=round(completed / elapsed, 2)))
+            logger.info(f"  🚦 Rate controller: {scraper.controller(scraper.base_url).stats()}")
+
+    cache = ResponseCache(cache_path)
+    url_index = DetailsUrlIndex(index_path)
+    logger.info(f"🗂️ Details URL index holds {len(url_index)} parcels (search hop skipped for these)")
+    scraper = AsyncParcelScraper(concurrency=concurrency, rate_per_host=rate_per_host,
+                                 cache=cache, url_index=url_index)
+    try:
+        asyncio.run(scraper.scrape_many(parcel_ids, on_batch=on_batch, parse_workers=parse_workers))
+    except KeyboardInterrupt:
+        logger.info(f"⏹️ Scraping interrupted by user; progress is in {journal_dir}")
+        return None
+    finally:
+        cache.close()
+        url_index.close()
+        journal.close()
+        if sink is not None:
+            sink.close()
+
+    elapsed = time.monotonic() - start
+    results_df = journal.compact(output_file)
+    successful = results_df['scraped_successfully'].sum() if len(results_df) else 0
+    logger.info(f"🎉 Scraping completed! Results saved to: {output_file}")
+    logger.info(f"  ✅ Successful: {successful}/{len(results_df)}")
+    if sink is not None:
+        logger.info(f"  🧹 Clean Parquet dataset: {sink.rows_written} new rows in {parquet_dir}")
+    if completed:
+        logger.info(f"  ⏱️ {completed} parcels in {elapsed:.1f}s ({completed / elapsed:.2f} parcels/s)")
+        logger.info(f"  🚦 Rate controller: {scraper.controller(scraper.base_url).stats()}")
+
+    return results_df
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Concurrently scrape Boston.gov assessing pages for all parcels')
+    parser.add_argument('--concurrency', type=int, default=8, help='Parcels in flight at once')
+    parser.add_argument('--rate', type=float, default=2.0, help='Maximum requests per second per host')
+    parser.add_argument('--limit', type=int, default=None, help='Only scrape the first N pending parcels')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help='Processes parsing pages (default: one per CPU, 0 = parse in the event loop)')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help='Raw HTML response cache (SQLite)')
+    parser.add_argument('--parquet-dir', default='data/processed/clean_parcels',
+                        help='Folder for the clean, typed Parquet partitions')
+    parser.add_argument('--no-parquet', action='store_true', help='Only write the raw journal')
+    parser.add_argument('--replay', action='store_true', help='Re-run extraction over the cache with no network calls')
+    args = parser.parse_args()
+
+    setup_logging('data/processed/parcel_scraping.log')
+    if args.replay:
+        replay_from_cache(cache_path=args.cache)
+    else:
+        scrape_all_parcels_async(concurrency=args.concurrency, rate_per_host=args.rate,
+                                 limit=args.limit, parse_workers=args.parse_workers,
+                                 parquet_dir=None if args.no_parquet else args.parquet_dir,
+                                 cache_path=args.cache)
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Shared Boston.gov assessing extraction library
+
+Single home for everything the parcel scrapers used to carry their own copy
+of: the site URLs and headers, the fetch path (search page -> details page,
+with the response cache and details URL index), the page parser, and the
+output field schema. Every record is stamped with PARSER_VERSION so rows
+produced by different parser revisions can be told apart.
+
+Used by scrape_all_parcels.py, async_scraper.py, final_comprehensive_scraper.py,
+enrich_all_parcels.py and enrich_parcels_with_boston_data.py.
+"""
+
+import logging
+import time
+
+import pandas as pd
+import requests
+
+from property_page_parser import PARSER_VERSION, find_details_href, parse_property_page
+from rate_controller import RETRYABLE_STATUSES, parse_retry_after
+from response_cache import content_hash
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://www.cityofboston.gov/assessing/search/"
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+}
+
+# Canonical output columns, in the order they are written. These are the
+# names create_clean_dataset.py reads.
+FIELD_SCHEMA = [
+    # Identifiers and scrape metadata
+    'parcel_id', 'scraped_successfully', 'error', 'scrape_timestamp', 'parser_version',
+    'parcel_id_display', 'address',
+    # Property basics
+    'property_type', 'classification_code', 'lot_size', 'living_area', 'year_built',
+    # Owner and exemptions
+    'owner_name', 'owner_mailing_address', 'current_owners_list',
+    'residential_exemption', 'personal_exemption', 'exemption_notes',
+    # Value and tax
+    'fy2025_building_value', 'fy2025_land_value', 'fy2025_total_assessed_value',
+    'residential_tax_rate', 'commercial_tax_rate', 'estimated_tax',
+    'community_preservation', 'total_first_half_tax', 'assessment_date', 'value_history',
+    # Building attributes
+    'land_use', 'building_style', 'total_rooms', 'bedrooms', 'bathrooms', 'half_bathrooms',
+    'kitchens', 'kitchen_type', 'fireplaces', 'ac_type', 'heat_type',
+    'interior_condition', 'interior_finish', 'view', 'grade', 'parking_spots',
+    'story_height', 'roof_cover', 'roof_structure', 'exterior_finish',
+    'exterior_condition', 'foundation',
+    # Outbuildings
+    'outbuilding_type', 'outbuilding_size', 'outbuilding_quality', 'outbuilding_condition',
+    'extraction_error',
+]
+
+# Column names used by the old enrich_* scrapers -> canonical names
+LEGACY_FIELD_ALIASES = {
+    'building_value': 'fy2025_building_value',
+    'land_value': 'fy2025_land_value',
+    'total_assessed_value': 'fy2025_total_assessed_value',
+    'fiscal_year_building_value': 'fy2025_building_value',
+    'fiscal_year_land_value': 'fy2025_land_value',
+    'fiscal_year_total_value': 'fy2025_total_assessed_value',
+    'current_owners': 'current_owners_list',
+}
+
+def normalize_parcel_id(parcel_id):
+    """
+    Return a parcel ID as a plain digit string (drops a float '.0' suffix)
+    """
+    parcel_str = str(parcel_id).strip()
+    if parcel_str.endswith('.0'):
+        parcel_str = parcel_str[:-2]
+    return parcel_str
+
+def search_url(parcel_id, base_url=BASE_URL):
+    return f"{base_url}?parcel={parcel_id}"
+
+def conditional_headers(cache, url):
+    """
+    Request headers for `url` plus the cached validators (None if never fetched).
+
+    Adds If-None-Match / If-Modified-Since when the cache holds an ETag or
+    Last-Modified for the URL, so an unchanged page comes back as a bodyless 304.
+    """
+    headers = dict(HEADERS)
+    cached = cache.validators(url) if cache is not None else None
+    if cached:
+        if cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+    return headers, cached
+
+def store_response(cache, url, body, response_headers, cached):
+    """
+    Write a fetched (or revalidated) page to the cache; return True if its content is unchanged
+    """
+    etag = response_headers.get('ETag') or (cached or {}).get('etag')
+    last_modified = response_headers.get('Last-Modified') or (cached or {}).get('last_modified')
+    body_hash = cache.put(url, body, etag=etag, last_modified=last_modified)
+    return cached is not None and body_hash == cached['content_hash']
+
+def make_record(parcel_id, details_html):
+    """
+    Parse a details page into a successful, version-stamped record
+    """
+    record = parse_property_page(details_html)
+    record.update({
+        'parcel_id': parcel_id,
+        'scraped_successfully': True,
+        'scrape_timestamp': pd.Timestamp.now().isoformat(),
+        'parser_version': PARSER_VERSION
+    })
+    return record
+
+def failure_record(parcel_id, error):
+    return {
+        'parcel_id': parcel_id,
+        'scraped_successfully': False,
+        'error': str(error),
+        'scrape_timestamp': pd.Timestamp.now().isoformat(),
+        'parser_version': PARSER_VERSION
+    }
+
+def replay_parcel(cache, parcel_id, url_index=None, base_url=BASE_URL):
+    """
+    Re-run extraction for one parcel using only pages in a ResponseCache
+    """
+    details_url = url_index.get(parcel_id) if url_index is not None else None
+    if details_url is None:
+        search_html = cache.get(search_url(parcel_id, base_url))
+        if search_html is None:
+            return failure_record(parcel_id, 'Search page not in cache')
+
+        details_href = find_details_href(search_html)
+        if not details_href:
+            return failure_record(parcel_id, 'No details link found')
+        details_url = f"{base_url}{details_href}"
+
+    details_html = cache.get(details_url)
+    if details_html is None:
+        return failure_record(parcel_id, 'Details page not in cache')
+
+    return make_record(parcel_id, details_html)
+
+def records_to_frame(records):
+    """
+    Build a DataFrame with schema columns first, in schema order
+    """
+    df = pd.DataFrame(records).rename(columns=LEGACY_FIELD_ALIASES)
+    df = df.loc[:, ~df.columns.duplicated()]
+    ordered = [col for col in FIELD_SCHEMA if col in df.columns]
+    extra = [col for col in df.columns if col not in FIELD_SCHEMA]
+    return df[ordered + extra]
+
+def load_parcel_list(mapping_file='data/processed/gis_layers/building_parcel_mapping.csv'):
+    """
+    Load the unique parcel IDs from building_parcel_mapping.csv
+    """
+    try:
+        df = pd.read_csv(mapping_file)
+        parcel_ids = [normalize_parcel_id(p) for p in df['OFFICIAL_PAR_ID'].dropna().unique()]
+
+        logger.info(f"📊 Loaded {len(parcel_ids)} unique parcel IDs")
+        logger.info(f"📋 Sample parcel IDs: {parcel_ids[:5]}")
+
+        return parcel_ids
+
+    except Exception as e:
+        logger.error(f"Error loading parcel list: {e}")
+        return []
+
+class AssessingClient:
+    """
+    Synchronous fetch path for Boston.gov assessing pages.
+
+    Args:
+        session: requests.Session to reuse (one is created if omitted)
+        cache: Optional ResponseCache every fetched page is written to
+        url_index: Optional DetailsUrlIndex used to skip the search-page hop
+        timeout: Per-request timeout in seconds
+        max_retries: Attempts per parcel on request errors
+        retry_delay: Seconds to wait between attempts (without a rate controller)
+        base_url: Assessing search URL (overridable for local stand-ins)
+        rate_controller: Optional AdaptiveRateController pacing every request;
+            retries then use its jittered backoff and retry budget
+
+    With a cache, every GET is conditional; `not_modified` counts 304 replies
+    and `unchanged` counts pages whose content hash matched the cached copy.
+    """
+
+    def __init__(self, session=None, cache=None, url_index=None, timeout=30,
+                 max_retries=1, retry_delay=5, base_url=BASE_URL, rate_controller=None):
+        self.session = session or requests.Session()
+        self.cache = cache
+        self.url_index = url_index
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.base_url = base_url
+        self.rate_controller = rate_controller
+        self.not_modified = 0
+        self.unchanged = 0
+
+    def get(self, url, revalidate=True):
+        """
+        GET a page, raise on HTTP errors, and store the body in the cache
+
+        A 304 for a page the cache holds no copy of is fetched again without
+        validators (`revalidate=False`) rather than returned as an empty page.
+        """
+        headers, cached = conditional_headers(self.cache if revalidate else None, url)
+        controller = self.rate_controller
+        if controller is not None:
+            controller.wait()
+
+        start = time.monotonic()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            if controller is not None:
+                controller.record_failure()
+            raise
+
+        if controller is not None:
+            if response.status_code in RETRYABLE_STATUSES:
+                controller.record_failure(parse_retry_after(response.headers.get('Retry-After')), response.status_code)
+            else:
+                controller.record_success(time.monotonic() - start)
+
+        if response.status_code == 304:
+            body = self.cache.get(url) if cached is not None else None
+            if body is None and not revalidate:
+                raise requests.exceptions.HTTPError('304 Not Modified without a cached copy', response=response)
+            if body is None:
+                return self.get(url, revalidate=False)
+            self.not_modified += 1
+        else:
+            response.raise_for_status()
+            body = response.content
+
+        if self.cache is not None and store_response(self.cache, url, body, response.headers, cached):
+            self.unchanged += 1
+        return body
+
+    def resolve_details_url(self, parcel_id, use_index=True):
+        """
+        Return the details URL for a parcel, skipping the search hop when it is indexed
+        """
+        if use_index and self.url_index is not None:
+            details_url = self.url_index.get(parcel_id)
+            if details_url:
+                return details_url
+
+        details_href = find_details_href(self.get(search_url(parcel_id, self.base_url)))
+        if not details_href:
+            return None
+
+        details_url = f"{self.base_url}{details_href}"
+        if self.url_index is not None:
+            self.url_index.set(parcel_id, details_url)
+        return details_url
+
+    def scrape_parcel(self, parcel_id):
+        """
+        Fetch and parse one parcel; always returns a record, never raises
+        """
+        for attempt in range(self.max_retries):
+            try:
+                details_url = self.resolve_details_url(parcel_id)
+                if not details_url:
+                    return failure_record(parcel_id, 'No details link found')
+                return make_record(parcel_id, self.get(details_url))
+
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Request failed for parcel {parcel_id} (attempt {attempt + 1}): {e}")
+                if self.url_index is not None:
+                    # The indexed URL may be stale; the next attempt redoes the search hop
+                    self.url_index.discard(parcel_id)
+                if attempt == self.max_retries - 1:
+                    return failure_record(parcel_id, f'Request failed: {e}')
+                if self.rate_controller is None:
+                    time.sleep(self.retry_delay)
+                elif self.rate_controller.try_retry():
+                    time.sleep(self.rate_controller.backoff_delay(attempt))
+                else:
+                    return failure_record(parcel_id, f'Request failed (retry budget exhausted): {e}')
+
+            except Exception as e:
+                logger.error(f"Error scraping parcel {parcel_id}: {e}")
+                return failure_record(parcel_id, e)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Delta scrape: fetch only what the bulk FY assessment file cannot supply
+
+Most of what the scraper collects (values, year built, rooms, owner) is
+already in the city's bulk FY assessment CSV. Only three fields come
+exclusively from the web page:
+
+- value_history: the multi-year assessed value table
+- current_owners_list: every current owner, not just the first
+- exemption_notes: the abatement / exemption text
+
+This planner joins the bulk file to the target parcel list, works out per
+parcel which of those fields are missing or out of date in the scrape
+journal, scrapes only those parcels, and writes a merged CSV: bulk
+attributes for every parcel, web-only fields from the latest scrape.
+
+Bulk values are written in the page's text format ('$1,233,700.00',
+'4,000 sq ft'), so a merged column never mixes two formats. Coded bulk
+columns (LUC, INT_COND, ...) do not match the page text and are left to
+the scrape.
+
+A web-only field is out of date when:
+- value_history: its entry for the bulk file's fiscal year disagrees with
+  the bulk TOTAL_VALUE (a missing year is added from the bulk file instead)
+- current_owners_list: the bulk OWNER is not among the scraped owners
+- exemption_notes: the owner changed (exemptions are filed per owner)
+
+Parcels absent from the bulk file always get a full scrape.
+
+Usage (from the repository root):
+    python scripts/scraping/delta_scrape_planner.py --dry-run
+    python scripts/scraping/delta_scrape_planner.py --assessment-csv data/raw/fy2026-property-assessment-data.csv
+
+The merged CSV goes to data/processed/delta_merged_parcel_data.csv, next to
+(not over) the scraper's all_parcels_comprehensive_data.csv.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+
+import pandas as pd
+
+from async_scraper import AsyncParcelScraper
+from boston_assessing import load_parcel_list, normalize_parcel_id, records_to_frame
+from details_url_index import DEFAULT_INDEX_PATH, DetailsUrlIndex
+from refresh_planner import DEFAULT_ASSESSMENT_CSV, fiscal_year_from_filename, normalize_owner, parse_money
+from response_cache import DEFAULT_CACHE_PATH, ResponseCache
+from scrape_journal import ScrapeJournal
+from structured_logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+WEB_ONLY_FIELDS = ('value_history', 'current_owners_list', 'exemption_notes')
+
+DEFAULT_OUTPUT_FILE = 'data/processed/delta_merged_parcel_data.csv'
+
+# The page's value and tax fields are for this fiscal year only
+VALUE_FIELDS_YEAR = 2025
+VALUE_FIELDS = ('fy2025_building_value', 'fy2025_land_value', 'fy2025_total_assessed_value', 'estimated_tax')
+
+def format_money(value):
+    """
+    1233700 -> '$1,233,700.00', as the details page shows money (None if not a number)
+    """
+    number = parse_money(value)
+    return None if number is None else f"${number:,.2f}"
+
+def format_sqft(value):
+    """
+    4000 -> '4,000 sq ft' (None if not a number)
+    """
+    number = parse_money(value)
+    return None if number is None else f"{number:,.0f} sq ft"
+
+def format_count(value):
+    """
+    5.0 -> '5' (None if not a number)
+    """
+    number = parse_money(value)
+    return None if number is None else f"{number:.0f}"
+
+def format_text(value):
+    return None if value is None or (isinstance(value, float) and pd.isna(value)) else str(value).strip()
+
+# Canonical record field -> (bulk FY assessment CSV column, formatter into the page's text)
+BULK_FIELDS = {
+    'owner_name': ('OWNER', format_text),
+    'lot_size': ('LAND_SF', format_sqft),
+    'living_area': ('LIVING_AREA', format_sqft),
+    'year_built': ('YR_BUILT', format_count),
+    'fy2025_building_value': ('BLDG_VALUE', format_money),
+    'fy2025_land_value': ('LAND_VALUE', format_money),
+    'fy2025_total_assessed_value': ('TOTAL_VALUE', format_money),
+    'estimated_tax': ('GROSS_TAX', format_money),
+    'total_rooms': ('TT_RMS', format_count),
+    'bedrooms': ('BED_RMS', format_count),
+    'bathrooms': ('FULL_BTH', format_count),
+    'half_bathrooms': ('HLF_BTH', format_count),
+    'kitchens': ('KITCHENS', format_count),
+    'fireplaces': ('FIREPLACES', format_count),
+    'parking_spots': ('NUM_PARKING', format_count),
+}
+
+def load_bulk_attributes(csv_file, parcel_ids=None):
+    """
+    Load the bulk FY assessment CSV as canonical record fields in the page's format, indexed by parcel ID
+    """
+    wanted = {'PID', *(column for column, _ in BULK_FIELDS.values())}
+    df = pd.read_csv(csv_file, dtype={'PID': str}, usecols=lambda c: c in wanted, low_memory=False)
+    df['PID'] = df['PID'].map(normalize_parcel_id)
+    if parcel_ids is not None:
+        df = df[df['PID'].isin(set(parcel_ids))]
+    df = df.drop_duplicates('PID', keep='last').set_index('PID')
+
+    bulk = pd.DataFrame(index=df.index)
+    for field, (column, formatter) in BULK_FIELDS.items():
+        if column in df.columns:
+            bulk[field] = df[column].map(formatter)
+    logger.info(f"📊 Loaded bulk attributes for {len(bulk):,} parcels from {csv_file}")
+    return bulk
+
+def _history_entries(value_history):
+    if not isinstance(value_history, str) or not value_history:
+        return None
+    try:
+        return json.loads(value_history)
+    except ValueError:
+        return None
+
+def record_fiscal_year(record):
+    """
+    Fiscal year a scraped page was for: "Assessment as of January 1, 2024" -> 2025
+    """
+    match = re.search(r'\b(\d{4})\b', str(record.get('assessment_date') or ''))
+    return int(match.group(1)) + 1 if match else VALUE_FIELDS_YEAR
+
+def history_is_current(value_history, fiscal_year, total_value, scraped_year=VALUE_FIELDS_YEAR):
+    """
+    True if a scraped value_history JSON agrees with the bulk total value for `fiscal_year`.
+
+    A history with no `fiscal_year` entry yet is current: the new year is
+    added from the bulk file by extend_history(), so a new bulk file does
+    not send every parcel back to the web page. A page with no value history
+    at all is current until the bulk file is for a later year than the page
+    (`scraped_year`).
+    """
+    if not isinstance(value_history, str) or not value_history:
+        return scraped_year >= fiscal_year
+    entries = _history_entries(value_history)
+    if entries is None:
+        return False
+    if not entries:
+        return scraped_year >= fiscal_year
+    for entry in entries:
+        if entry.get('fiscal_year') == fiscal_year:
+            bulk_value = parse_money(total_value)
+            return bulk_value is None or parse_money(entry.get('assessed_value')) == bulk_value
+    return True
+
+def extend_history(value_history, fiscal_year, total_value):
+    """
+    Add a `fiscal_year` entry built from the bulk total value to a value_history JSON that lacks one
+    """
+    entries = _history_entries(value_history)
+    assessed_value = format_money(total_value)
+    if entries is None or assessed_value is None or any(e.get('fiscal_year') == fiscal_year for e in entries):
+        return value_history
+    # Newest year first, as on the page; the property type carries over from the latest scraped year
+    entries.insert(0, {
+        'fiscal_year': fiscal_year,
+        'property_type': entries[0].get('property_type', '') if entries else '',
+        'assessed_value': assessed_value
+    })
+    return json.dumps(entries)
+
+def owner_is_listed(owners_list, owner):
+    """
+    True if the bulk owner appears in a scraped current_owners_list JSON
+    """
+    if not isinstance(owners_list, str) or not owners_list:
+        return False
+    try:
+        owners = json.loads(owners_list)
+    except ValueError:
+        return False
+    owner = normalize_owner(owner)
+    return not owner or owner in {normalize_owner(o) for o in owners}
+
+def plan_delta(parcel_ids, records, bulk, fiscal_year):
+    """
+    Return {parcel_id: [web-only fields to fetch]} for the parcels that need a scrape.
+
+    Parcels missing from the bulk file, or without a successful scrape, need
+    every web-only field.
+    """
+    plan = {}
+    for parcel_id in parcel_ids:
+        record = records.get(parcel_id)
+        if parcel_id not in bulk.index or not record or not record.get('scraped_successfully'):
+            plan[parcel_id] = list(WEB_ONLY_FIELDS)
+            continue
+
+        row = bulk.loc[parcel_id]
+        fields = []
+        if not history_is_current(record.get('value_history'), fiscal_year, row.get('fy2025_total_assessed_value'),
+                                  record_fiscal_year(record)):
+            fields.append('value_history')
+        if not owner_is_listed(record.get('current_owners_list'), row.get('owner_name')):
+            fields.append('current_owners_list')
+            fields.append('exemption_notes')
+        if fields:
+            plan[parcel_id] = fields
+    return plan
+
+def merge_records(parcel_ids, bulk, records, fiscal_year):
+    """
+    One record per parcel: the scraped record overlaid with bulk attributes.
+
+    Bulk values win where present (the bulk file is the city's record for the
+    fiscal year), except that the page's value and tax fields are only
+    replaced by a bulk file for the same year. The bulk year is added to
+    value_history when the scrape predates it; the other web-only fields
+    always come from the scrape.
+    """
+    merged = []
+    for parcel_id in parcel_ids:
+        record = dict(records.get(parcel_id) or {'scraped_successfully': False})
+        record['parcel_id'] = parcel_id
+        if parcel_id in bulk.index:
+            row = bulk.loc[parcel_id]
+            for field, value in row.items():
+                if field in VALUE_FIELDS and fiscal_year != VALUE_FIELDS_YEAR:
+                    continue
+                if pd.notna(value):
+                    record[field] = value
+            record['value_history'] = extend_history(record.get('value_history'), fiscal_year,
+                                                     row.get('fy2025_total_assessed_value'))
+            record['attribute_source'] = 'bulk+web' if record.get('scraped_successfully') else 'bulk'
+        else:
+            record['attribute_source'] = 'web'
+        merged.append(record)
+    return records_to_frame(merged)
+
+def delta_scrape(assessment_csv=DEFAULT_ASSESSMENT_CSV, fiscal_year=None, dry_run=False,
+                 concurrency=8, rate_per_host=2.0,
+                 output_file=DEFAULT_OUTPUT_FILE,
+                 journal_dir='data/processed/scrape_journal',
+                 cache_path=DEFAULT_CACHE_PATH, index_path=DEFAULT_INDEX_PATH):
+    """
+    Plan and run a delta scrape, then write the bulk + web merged CSV
+    """
+    if not os.path.exists(assessment_csv):
+        logger.error(f"❌ Assessment CSV not found: {assessment_csv}")
+        return None
+    fiscal_year = fiscal_year or fiscal_year_from_filename(assessment_csv)
+    if fiscal_year is None:
+        logger.error("❌ Could not tell the fiscal year from the file name; pass --fiscal-year")
+        return None
+
+    parcel_ids = load_parcel_list()
+    if not parcel_ids:
+        logger.error("❌ No parcel IDs found")
+        return None
+
+    bulk = load_bulk_attributes(assessment_csv, parcel_ids)
+    journal = ScrapeJournal(journal_dir)
+    plan = plan_delta(parcel_ids, journal.latest_records(), bulk, fiscal_year)
+
+    missing_from_bulk = sum(1 for p in parcel_ids if p not in bulk.index)
+    field_counts = Counter(field for fields in plan.values() for field in fields)
+    logger.info(f"🧭 Delta plan (FY{fiscal_year}): {len(plan):,}/{len(parcel_ids):,} parcels "
+                f"({len(plan) / len(parcel_ids):.1%}) need the web page")
+    logger.info(f"  not in bulk file: {missing_from_bulk:,}")
+    for field in WEB_ONLY_FIELDS:
+        logger.info(f"  {field}: {field_counts.get(field, 0):,}")
+
+    to_fetch = [p for p in parcel_ids if p in plan]
+    if dry_run:
+        journal.close()
+        return plan
+
+    if to_fetch:
+        cache = ResponseCache(cache_path)
+        url_index = DetailsUrlIndex(index_path)
+        scraper = AsyncParcelScraper(concurrency=concurrency, rate_per_host=rate_per_host,
+                                     cache=cache, url_index=url_index)
+        start = time.monotonic()
+        try:
+            asyncio.run(scraper.scrape_many(to_fetch, on_batch=journal.extend))
+        except KeyboardInterrupt:
+            logger.info(f"⏹️ Delta scrape interrupted by user; progress is in {journal_dir}")
+            journal.close()
+            return plan
+        finally:
+            cache.close()
+            url_index.close()
+        logger.info(f"🎉 Scraped {len(to_fetch):,} parcels in {time.monotonic() - start:.1f}s")
+
+    df = merge_records(parcel_ids, bulk, journal.latest_records(), fiscal_year)
+    journal.close()
+    df.to_csv(output_file, index=False)
+    logger.info(f"💾 Wrote {len(df):,} merged parcels to {output_file}")
+    return plan
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Scrape only the web-only fields the bulk FY file lacks')
+    parser.add_argument('--assessment-csv', default=DEFAULT_ASSESSMENT_CSV, help='Bulk FY assessment CSV')
+    parser.add_argument('--fiscal-year', type=int, default=None,
+                        help='Fiscal year of the bulk file (default: taken from its file name)')
+    parser.add_argument('--dry-run', action='store_true', help='Only print the plan')
+    parser.add_argument('--concurrency', type=int, default=8, help='Parcels in flight at once')
+    parser.add_argument('--rate', type=float, default=2.0, help='Maximum requests per second per host')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_FILE, help='Merged bulk + web CSV')
+    args = parser.parse_args()
+
+    setup_logging('data/processed/parcel_scraping.log')
+
+    delta_scrape(assessment_csv=args.assessment_csv, fiscal_year=args.fiscal_year,
+                 dry_run=args.dry_run, concurrency=args.concurrency, rate_per_host=args.rate,
+                 output_file=args.output)
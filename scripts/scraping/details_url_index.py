@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Persistent parcel_id -> details-page URL index for Boston.gov assessing
+
+Every parcel normally costs two requests: the `?parcel=` search page, then the
+`pid=` details link parsed out of it. The scrapers record each details URL
+here as a side effect, so later runs and refreshes can go straight to the
+details page and skip the search hop.
+"""
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_INDEX_PATH = 'data/processed/scrape_cache/details_url_index.sqlite'
+
+class DetailsUrlIndex:
+    """
+    SQLite-backed mapping from parcel ID to its details-page URL.
+
+    Args:
+        path: SQLite file to use (created with its parent directory if missing)
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS details_urls (
+                parcel_id TEXT PRIMARY KEY,
+                details_url TEXT NOT NULL,
+                recorded_at TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, parcel_id):
+        """
+        Return the known details URL for a parcel, or None
+        """
+        row = self.conn.execute(
+            "SELECT details_url FROM details_urls WHERE parcel_id = ?", (str(parcel_id),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, parcel_id, details_url):
+        """
+        Record (or replace) the details URL for a parcel
+        """
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO details_urls (parcel_id, details_url, recorded_at) VALUES (?, ?, ?)",
+                (str(parcel_id), details_url, datetime.now().isoformat())
+            )
+
+    def discard(self, parcel_id):
+        """
+        Forget a parcel's URL, e.g. after the details page stopped resolving
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM details_urls WHERE parcel_id = ?", (str(parcel_id),))
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM details_urls").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Single-pass lxml parser for Boston.gov assessing details pages
+
+The original BeautifulSoup extractor (now scripts/testing/legacy_bs4_extractor.py)
+walked every table three times (main fields, value history, current owners) on
+the pure-Python html.parser backend and matched labels through a long elif
+chain. This module parses with lxml, visits each table row exactly once, and
+maps labels through a dictionary, returning the same record.
+
+See scripts/testing/benchmark_property_parser.py for the parse-time comparison.
+"""
+
+import json
+import re
+
+from lxml import html as lxml_html
+
+# Bump whenever the extracted output changes; stamped on every scraped record.
+# Version 1 was the BeautifulSoup extractor (legacy_bs4_extractor.py).
+PARSER_VERSION = 2
+
+# Exact row label -> output field
+LABEL_FIELDS = {
+    'Parcel ID:': 'parcel_id_display',
+    'Address:': 'address',
+    'Property Type:': 'property_type',
+    'Classification Code:': 'classification_code',
+    'Lot Size:': 'lot_size',
+    'Living Area:': 'living_area',
+    'Year Built:': 'year_built',
+    "Owner's Mailing Address:": 'owner_mailing_address',
+    'Residential Exemption:': 'residential_exemption',
+    'Personal Exemption:': 'personal_exemption',
+    # Tax and value fields
+    'FY2025 Building value:': 'fy2025_building_value',
+    'FY2025 Land Value:': 'fy2025_land_value',
+    'FY2025 Total Assessed Value:': 'fy2025_total_assessed_value',
+    '- Residential:': 'residential_tax_rate',
+    '- Commercial:': 'commercial_tax_rate',
+    'Estimated Tax:': 'estimated_tax',
+    'Community Preservation:': 'community_preservation',
+    'Total, First Half:': 'total_first_half_tax',
+    # Building attributes
+    'Land Use:': 'land_use',
+    'Style:': 'building_style',
+    'Total Rooms:': 'total_rooms',
+    'Bedrooms:': 'bedrooms',
+    'Bathrooms:': 'bathrooms',
+    'Half Bathrooms:': 'half_bathrooms',
+    'Number of Kitchens:': 'kitchens',
+    'Kitchen Type:': 'kitchen_type',
+    'Fireplaces:': 'fireplaces',
+    'AC Type:': 'ac_type',
+    'Heat Type:': 'heat_type',
+    'Interior Condition:': 'interior_condition',
+    'Interior Finish:': 'interior_finish',
+    'View:': 'view',
+    'Grade:': 'grade',
+    'Parking Spots:': 'parking_spots',
+    'Story Height:': 'story_height',
+    'Roof Cover:': 'roof_cover',
+    'Roof Structure:': 'roof_structure',
+    'Exterior Finish:': 'exterior_finish',
+    'Exterior Condition:': 'exterior_condition',
+    'Foundation:': 'foundation',
+    # Outbuildings
+    'Type:': 'outbuilding_type',
+    'Size/sqft:': 'outbuilding_size',
+    'Quality:': 'outbuilding_quality',
+    'Condition:': 'outbuilding_condition',
+}
+
+# Labels like "Owner on January 1, 2025:" carry a date, so they match by substring
+OWNER_LABEL_MARKER = 'Owner on'
+OWNERS_SECTION_MARKER = 'Current Owner/s'
+
+ASSESSMENT_DATE_PATTERN = re.compile(r'Assessment as of ([^,]+),')
+
+def _text(element):
+    """
+    Equivalent of BeautifulSoup's get_text(strip=True)
+    """
+    return ''.join(s.strip() for s in element.itertext())
+
+def _cells(row):
+    return [child for child in row if child.tag in ('td', 'th')]
+
+def find_details_href(search_html):
+    """
+    Return the `pid=` details link from a search results page, or None
+    """
+    hrefs = lxml_html.fromstring(search_html).xpath('//a[contains(@href, "pid=")]/@href')
+    return hrefs[0] if hrefs else None
+
+def parse_property_page(content):
+    """
+    Parse a details page (bytes or str) into a flat property record.
+
+    Main fields, value history and current owners are all collected while
+    visiting each <tr> once; value history and owners are JSON-encoded
+    strings, matching the columns create_clean_dataset.py expects.
+    """
+    info = {}
+
+    try:
+        root = lxml_html.fromstring(content)
+
+        value_history = []
+        history_table = None
+        history_done = False
+        owners = []
+        owners_table = None
+        row_counts = {}
+
+        for row in root.iter('tr'):
+            table = next(row.iterancestors('table'), None)
+            row_index = row_counts.get(table, 0)
+            row_counts[table] = row_index + 1
+            cells = _cells(row)
+
+            # Value history: first table whose header row names both columns
+            if not history_done:
+                if row_index == 0 and history_table is None:
+                    header_text = ''.join(row.itertext()).lower()
+                    if 'fiscal year' in header_text and 'assessed value' in header_text:
+                        history_table = table
+                        continue
+                elif table is history_table and history_table is not None:
+                    if len(cells) >= 3:
+                        year = _text(cells[0])
+                        value = _text(cells[2])
+                        if year.isdigit() and value.startswith('$'):
+                            value_history.append({
+                                'fiscal_year': int(year),
+                                'property_type': _text(cells[1]),
+                                'assessed_value': value
+                            })
+                    continue
+                elif history_table is not None:
+                    history_done = True
+
+            if len(cells) < 2:
+                continue
+
+            key_text = _text(cells[0])
+            value = _text(cells[1])
+
+            # Current owners: every row after the "Current Owner/s" row in its table
+            if table is owners_table and table is not None:
+                if value and value != OWNERS_SECTION_MARKER:
+                    owners.append(value)
+            elif OWNERS_SECTION_MARKER in key_text:
+                owners_table = table
+
+            field = LABEL_FIELDS.get(key_text)
+            if field is None and OWNER_LABEL_MARKER in key_text:
+                field = 'owner_name'
+            if field is not None:
+                info[field] = value
+
+        if value_history:
+            info['value_history'] = json.dumps(value_history)
+        if owners:
+            info['current_owners_list'] = json.dumps(owners)
+
+        # Free-text fields; string() runs inside libxml2, not as a Python walk
+        body = root.find('body')
+        text = (body if body is not None else root).xpath('string()')
+
+        match = ASSESSMENT_DATE_PATTERN.search(text)
+        if match:
+            info['assessment_date'] = match.group(1).strip()
+
+        start = text.find('Applications for Abatements')
+        if start != -1:
+            end = text.find('Attributes', start)
+            if end == -1:
+                end = start + 200
+            info['exemption_notes'] = text[start:end].strip()
+
+    except Exception as e:
+        info['extraction_error'] = str(e)
+
+    return info
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Adaptive request pacing for the Boston.gov scrapers
+
+Replaces the fixed `time.sleep(2)` between requests and `time.sleep(5)`
+between retries. The controller spaces requests at a current rate that is
+adjusted AIMD-style (additive increase, multiplicative decrease):
+
+- every fast success raises the rate, up to `max_rate`: by `slow_start`
+  (a multiplier) until the first sign of congestion, then by `increase`
+  requests/second, as in TCP slow start / congestion avoidance
+- errors, 429/5xx replies and responses slower than `latency_target` cut
+  the rate by `decrease`, down to `min_rate`, at most once per
+  `decrease_interval` so a burst of in-flight failures counts as one event
+- a Retry-After header holds every request until it has elapsed
+- `failure_threshold` consecutive failures open a circuit breaker that pauses
+  all requests for `cooldown` seconds. It then lets a single probe request
+  through (half-open): the probe's success closes the breaker, its failure
+  re-opens it for another cooldown. 429s carrying Retry-After are explicit
+  throttling and are already honoured, so they do not count toward the
+  breaker; other failures with Retry-After (e.g. 503) do
+- retries draw on a shared budget (`min_retries` plus `retry_ratio` of all
+  requests), so a struggling site is not hit with a retry storm
+
+Throughput therefore climbs toward what the site tolerates instead of sitting
+at a fixed pessimistic delay. The same controller paces the requests client
+(wait()) and the aiohttp client (wait_async()).
+"""
+
+import asyncio
+import email.utils
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Replies that mean "slow down / try again later" rather than "this page is wrong"
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+def parse_retry_after(value):
+    """
+    Return a Retry-After header (delta-seconds or HTTP-date) as seconds, or None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+class AdaptiveRateController:
+    """
+    AIMD request pacer with exponential backoff, circuit breaker and retry budget.
+
+    Args:
+        initial_rate: Starting requests per second
+        min_rate: Floor the rate never drops below
+        max_rate: Ceiling the rate never climbs above
+        increase: Requests/second added after each fast success
+        slow_start: Rate multiplier per fast success before the first congestion event
+        decrease: Factor the rate is multiplied by after a failure or slow reply
+        decrease_interval: Minimum seconds between two decreases
+        latency_target: Seconds; slower successful replies count as congestion
+        backoff_base: First retry backoff in seconds (doubles per attempt, full jitter)
+        max_backoff: Cap on a single retry backoff in seconds
+        failure_threshold: Consecutive failures that open the circuit breaker
+        cooldown: Seconds the breaker stays open
+        retry_ratio: Retries allowed as a fraction of requests sent
+        min_retries: Retries always allowed regardless of volume
+    """
+
+    def __init__(self, initial_rate=0.5, min_rate=0.2, max_rate=5.0, increase=0.1,
+                 slow_start=1.5, decrease=0.5, decrease_interval=1.0, latency_target=3.0,
+                 backoff_base=1.0, max_backoff=60.0, failure_threshold=5, cooldown=60.0,
+                 retry_ratio=0.1, min_retries=10):
+        self.rate = min(max(initial_rate, min_rate), max_rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.slow_start = slow_start
+        self.slow_start_threshold = max_rate
+        self.decrease = decrease
+        self.decrease_interval = decrease_interval
+        self.latency_target = latency_target
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.retry_ratio = retry_ratio
+        self.min_retries = min_retries
+
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.breaker_trips = 0
+        self.open_until = 0.0
+        self._half_open = False
+        self._probe_sent = None
+        self._last_sent = 0.0
+        self._hold_until = 0.0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def breaker_open(self):
+        return time.monotonic() < self.open_until
+
+    def _slow_down(self, now):
+        if now - self._last_decrease >= self.decrease_interval:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            # Halve the slow-start ceiling too, so an early blip does not leave
+            # the rate crawling up additively from near zero
+            self.slow_start_threshold = max(self.rate, self.slow_start_threshold * self.decrease)
+            self._last_decrease = now
+
+    def reserve(self):
+        """
+        Claim a send slot if one is free now (returns 0), else return seconds to wait before asking again
+
+        Slots are re-checked against the current rate, so waiters speed up as
+        soon as the rate rises instead of keeping slots booked at an old rate.
+        After a cooldown only the probe gets a slot until its result is in
+        (or it has gone unanswered for a whole cooldown).
+        """
+        with self._lock:
+            now = time.monotonic()
+            ready = max(self._last_sent + 1.0 / self.rate, self.open_until, self._hold_until)
+            if now < ready:
+                return ready - now
+            if self._half_open:
+                if self._probe_sent is not None and now - self._probe_sent < self.cooldown:
+                    return 1.0 / self.rate
+                self._probe_sent = now
+            self._last_sent = now
+            self.requests += 1
+            return 0.0
+
+    def wait(self):
+        """
+        Block until a request may be sent
+        """
+        delay = self.reserve()
+        while delay > 0:
+            time.sleep(delay)
+            delay = self.reserve()
+
+    async def wait_async(self):
+        """
+        asyncio equivalent of wait()
+        """
+        delay = self.reserve()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self.reserve()
+
+    def record_success(self, latency):
+        """
+        Feed back a successful reply and how long it took
+        """
+        with self._lock:
+            self.consecutive_failures = 0
+            if self._probe_sent is not None:
+                self._half_open = False
+                self._probe_sent = None
+                logger.info("🔌 Circuit breaker closed after a successful probe")
+            if latency > self.latency_target:
+                self._slow_down(time.monotonic())
+            elif self.rate < self.slow_start_threshold:
+                self.rate = min(self.slow_start_threshold, self.rate * self.slow_start)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def record_failure(self, retry_after=None, status=None):
+        """
+        Feed back an error or retryable `status`, honouring Retry-After if given
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.failures += 1
+            self._slow_down(now)
+            if retry_after:
+                self._hold_until = max(self._hold_until, now + retry_after)
+                if status == 429:
+                    return
+
+            if self._probe_sent is not None:
+                # Failed probe: back to open for another cooldown
+                self._probe_sent = None
+                self.open_until = now + self.cooldown
+                self.breaker_trips += 1
+                logger.warning(f"🔌 Circuit breaker probe failed; open for another {self.cooldown:.0f}s")
+                return
+
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold and not self._half_open:
+                self.open_until = now + self.cooldown
+                self._half_open = True
+                self.breaker_trips += 1
+                self.consecutive_failures = 0
+                logger.warning(f"🔌 Circuit breaker open for {self.cooldown:.0f}s "
+                               f"after {self.failure_threshold} consecutive failures")
+
+    def try_retry(self):
+        """
+        Take one retry from the budget; False means give up instead of retrying
+        """
+        with self._lock:
+            if self.retries >= self.min_retries + self.retry_ratio * self.requests:
+                return False
+            self.retries += 1
+            return True
+
+    def backoff_delay(self, attempt):
+        """
+        Full-jitter exponential backoff for retry number `attempt` (0-based)
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff_base * 2 ** attempt))
+
+    def stats(self):
+        return {
+            'rate': round(self.rate, 3),
+            'requests': self.requests,
+            'failures': self.failures,
+            'retries': self.retries,
+            'breaker_trips': self.breaker_trips,
+        }
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Incremental refresh of scraped parcels driven by change detection
+
+A full re-crawl fetches every parcel even though, year to year, most pages do
+not change. This planner picks only the parcels likely to have changed:
+
+- missing: no record in the scrape journal yet
+- failed: the last scrape attempt failed
+- bulk_changed: owner or total assessed value differs in the bulk FY
+  assessment CSV (against a previous bulk CSV if given, otherwise against
+  the values on the scraped record; those are FY2025 values, so a bulk file
+  for another fiscal year is a new baseline and only its owners are compared)
+- stale: the record is older than --max-age-days
+
+Everything else is skipped, or with --revalidate sent a conditional GET
+(ETag/Last-Modified from the response cache), which costs a bodyless 304 when
+the page is unchanged. Refreshed records are appended to the scrape journal
+and the output CSV is re-compacted.
+
+Usage (from the repository root):
+    python scripts/scraping/refresh_planner.py --dry-run
+    python scripts/scraping/refresh_planner.py --previous-assessment-csv data/raw/fy2024-property-assessment-data.csv
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import Counter
+
+import pandas as pd
+
+from async_scraper import AsyncParcelScraper
+from boston_assessing import load_parcel_list, normalize_parcel_id
+from details_url_index import DEFAULT_INDEX_PATH, DetailsUrlIndex
+from response_cache import DEFAULT_CACHE_PATH, ResponseCache
+from scrape_journal import ScrapeJournal
+from structured_logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ASSESSMENT_CSV = 'data/raw/fy2025-property-assessment-data_12_30_2024.csv'
+
+# Fiscal year of the scraped fy2025_total_assessed_value
+SCRAPED_VALUE_YEAR = 2025
+
+# Reasons in priority order; a parcel is listed under the first that applies
+REFRESH_REASONS = ('missing', 'failed', 'bulk_changed', 'stale')
+
+def parse_money(value):
+    """
+    '$1,234,500' / '1234500' / 1234500.0 -> 1234500.0 (None if not a number)
+    """
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    digits = re.sub(r'[^\d.]', '', str(value))
+    try:
+        return float(digits)
+    except ValueError:
+        return None
+
+def fiscal_year_from_filename(csv_file):
+    """
+    'fy2025-property-assessment-data_12_30_2024.csv' -> 2025 (None if the name has no FY)
+    """
+    match = re.search(r'fy(\d{4})', os.path.basename(csv_file).lower())
+    return int(match.group(1)) if match else None
+
+def normalize_owner(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ''
+    return ' '.join(str(value).upper().split())
+
+def load_assessment_snapshot(csv_file):
+    """
+    Load owner and total value per parcel from a bulk FY assessment CSV
+    """
+    df = pd.read_csv(csv_file, dtype={'PID': str}, usecols=['PID', 'OWNER', 'TOTAL_VALUE'],
+                     low_memory=False)
+    snapshot = pd.DataFrame({
+        'owner': df['OWNER'].map(normalize_owner).values,
+        'total_value': df['TOTAL_VALUE'].map(parse_money).values,
+    }, index=df['PID'].map(normalize_parcel_id))
+    snapshot = snapshot[~snapshot.index.duplicated(keep='last')]
+    logger.info(f"📊 Loaded {len(snapshot):,} parcels from {csv_file}")
+    return snapshot
+
+def bulk_changes(current, previous):
+    """
+    Parcel IDs whose owner or total value differ between two bulk snapshots
+    """
+    joined = current.join(previous, how='left', rsuffix='_previous')
+    changed = pd.Series(False, index=joined.index)
+    for column in ('owner', 'total_value'):
+        old, new = joined[f'{column}_previous'], joined[column]
+        changed |= (old != new) & ~(old.isna() & new.isna())
+    return set(joined.index[changed])
+
+def record_changes(current, records, fiscal_year=SCRAPED_VALUE_YEAR):
+    """
+    Parcel IDs whose scraped owner or total value disagree with a bulk snapshot.
+
+    Total values are only compared when the snapshot is for the scraped
+    fiscal year; a newer year's values all differ and are not a change.
+    """
+    if fiscal_year != SCRAPED_VALUE_YEAR:
+        current = current.assign(total_value=None)
+    scraped = pd.DataFrame.from_dict({
+        parcel_id: {
+            'owner': normalize_owner(record.get('owner_name')),
+            'total_value': parse_money(record.get('fy2025_total_assessed_value')),
+        }
+        for parcel_id, record in records.items() if record.get('scraped_successfully')
+    }, orient='index', columns=['owner', 'total_value'])
+    if fiscal_year != SCRAPED_VALUE_YEAR:
+        scraped = scraped.assign(total_value=None)
+    return bulk_changes(current, scraped)
+
+def stale_parcels(records, max_age_days, now=None):
+    """
+    Parcel IDs whose record was scraped more than `max_age_days` ago
+    """
+    cutoff = (now or pd.Timestamp.now()) - pd.Timedelta(days=max_age_days)
+    stale = set()
+    for parcel_id, record in records.items():
+        scraped_at = pd.to_datetime(record.get('scrape_timestamp'), errors='coerce')
+        if pd.isna(scraped_at) or scraped_at < cutoff:
+            stale.add(parcel_id)
+    return stale
+
+def plan_refresh(parcel_ids, records, assessment_csv=None, previous_assessment_csv=None,
+                 max_age_days=None):
+    """
+    Return {parcel_id: reason} for the parcels that should be re-fetched
+    """
+    candidates = {reason: set() for reason in REFRESH_REASONS}
+    candidates['missing'] = {p for p in parcel_ids if p not in records}
+    candidates['failed'] = {p for p in parcel_ids
+                            if p in records and not records[p].get('scraped_successfully')}
+
+    if assessment_csv and os.path.exists(assessment_csv):
+        current = load_assessment_snapshot(assessment_csv)
+        if previous_assessment_csv:
+            candidates['bulk_changed'] = bulk_changes(current, load_assessment_snapshot(previous_assessment_csv))
+        else:
+            fiscal_year = fiscal_year_from_filename(assessment_csv)
+            if fiscal_year != SCRAPED_VALUE_YEAR:
+                logger.info(f"🔄 Bulk file is FY{fiscal_year or '?'}, scraped values are FY{SCRAPED_VALUE_YEAR}: "
+                            f"comparing owners only")
+            candidates['bulk_changed'] = record_changes(current, records, fiscal_year)
+    elif assessment_csv:
+        logger.warning(f"⚠️ Assessment CSV not found: {assessment_csv} (skipping bulk change detection)")
+
+    if max_age_days is not None:
+        candidates['stale'] = stale_parcels(records, max_age_days)
+
+    plan = {}
+    for parcel_id in parcel_ids:
+        for reason in REFRESH_REASONS:
+            if parcel_id in candidates[reason]:
+                plan[parcel_id] = reason
+                break
+    return plan
+
+def refresh_parcels(assessment_csv=DEFAULT_ASSESSMENT_CSV, previous_assessment_csv=None,
+                    max_age_days=365, revalidate=False, dry_run=False, concurrency=8,
+                    rate_per_host=2.0,
+                    output_file='data/processed/all_parcels_comprehensive_data.csv',
+                    journal_dir='data/processed/scrape_journal',
+                    cache_path=DEFAULT_CACHE_PATH, index_path=DEFAULT_INDEX_PATH):
+    """
+    Plan and run an incremental refresh, then re-compact the output CSV
+    """
+    parcel_ids = load_parcel_list()
+    if not parcel_ids:
+        logger.error("❌ No parcel IDs found")
+        return None
+
+    journal = ScrapeJournal(journal_dir)
+    plan = plan_refresh(parcel_ids, journal.latest_records(), assessment_csv,
+                        previous_assessment_csv, max_age_days)
+
+    counts = Counter(plan.values())
+    logger.info(f"🧭 Refresh plan: {len(plan):,}/{len(parcel_ids):,} parcels "
+                f"({len(plan) / len(parcel_ids):.1%}) need a full fetch")
+    for reason in REFRESH_REASONS:
+        logger.info(f"  {reason}: {counts.get(reason, 0):,}")
+
+    to_fetch = [p for p in parcel_ids if p in plan]
+    if revalidate:
+        rest = [p for p in parcel_ids if p not in plan]
+        logger.info(f"  revalidate (conditional GET): {len(rest):,}")
+        to_fetch += rest
+
+    if dry_run or not to_fetch:
+        journal.close()
+        return plan
+
+    cache = ResponseCache(cache_path)
+    url_index = DetailsUrlIndex(index_path)
+    scraper = AsyncParcelScraper(concurrency=concurrency, rate_per_host=rate_per_host,
+                                 cache=cache, url_index=url_index)
+    start = time.monotonic()
+    try:
+        asyncio.run(scraper.scrape_many(to_fetch, on_batch=journal.extend))
+    except KeyboardInterrupt:
+        logger.info(f"⏹️ Refresh interrupted by user; progress is in {journal_dir}")
+        return plan
+    finally:
+        cache.close()
+        url_index.close()
+        journal.close()
+
+    elapsed = time.monotonic() - start
+    logger.info(f"🎉 Refreshed {len(to_fetch):,} parcels in {elapsed:.1f}s")
+    logger.info(f"  🔁 304 Not Modified: {scraper.not_modified:,}, unchanged content: {scraper.unchanged:,}")
+    journal.compact(output_file)
+    return plan
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Re-scrape only the parcels likely to have changed')
+    parser.add_argument('--assessment-csv', default=DEFAULT_ASSESSMENT_CSV, help='Current bulk FY assessment CSV')
+    parser.add_argument('--previous-assessment-csv', default=None,
+                        help='Previous bulk FY CSV to diff against (default: compare with scraped records)')
+    parser.add_argument('--max-age-days', type=int, default=365, help='Re-fetch records older than this')
+    parser.add_argument('--revalidate', action='store_true',
+                        help='Also send conditional GETs for every parcel not in the plan')
+    parser.add_argument('--dry-run', action='store_true', help='Only print the plan')
+    parser.add_argument('--concurrency', type=int, default=8, help='Parcels in flight at once')
+    parser.add_argument('--rate', type=float, default=2.0, help='Maximum requests per second per host')
+    args = parser.parse_args()
+
+    setup_logging('data/processed/parcel_scraping.log')
+
+    refresh_parcels(assessment_csv=args.assessment_csv,
+                    previous_assessment_csv=args.previous_assessment_csv,
+                    max_age_days=args.max_age_days, revalidate=args.revalidate,
+                    dry_run=args.dry_run, concurrency=args.concurrency, rate_per_host=args.rate)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Compressed on-disk cache of raw Boston.gov HTML responses
+
+Every fetched search and details page is stored once, zlib-compressed and
+content-addressed by its SHA-256, in a single SQLite file. A separate table
+maps (url, fetch_date) to the content hash, so refetching an unchanged page
+costs one small row instead of another copy of the HTML.
+
+Keeping the raw pages means new fields can be added to the extractor and
+re-run over the cache (see `async_scraper.py --replay`) without any HTTP.
+ETag/Last-Modified validators are kept alongside each response so refreshes
+can send conditional GETs (see refresh_planner.py).
+"""
+
+import hashlib
+import sqlite3
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = 'data/processed/scrape_cache/responses.sqlite'
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+class ResponseCache:
+    """
+    SQLite-backed, content-addressed cache of raw HTTP response bodies.
+
+    Args:
+        path: SQLite file to use (created with its parent directory if missing)
+        compression_level: zlib level used for new bodies
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, compression_level=6):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compression_level = compression_level
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                content_hash TEXT PRIMARY KEY,
+                body BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT NOT NULL,
+                fetch_date TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                content_hash TEXT NOT NULL REFERENCES blobs(content_hash),
+                etag TEXT,
+                last_modified TEXT,
+                PRIMARY KEY (url, fetch_date)
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_url_fetched
+                ON responses (url, fetched_at);
+        """)
+        # Caches created before validators were stored lack these columns
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(responses)")}
+        for column in ('etag', 'last_modified'):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE responses ADD COLUMN {column} TEXT")
+        self.conn.commit()
+
+    def put(self, url, body, fetched_at=None, etag=None, last_modified=None):
+        """
+        Store a response body (and its validators) for `url` and return its content hash
+        """
+        fetched_at = fetched_at or datetime.now()
+        body_hash = content_hash(body)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO blobs (content_hash, body) VALUES (?, ?)",
+                (body_hash, zlib.compress(body, self.compression_level))
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, fetch_date, fetched_at, content_hash, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, fetched_at.date().isoformat(), fetched_at.isoformat(), body_hash,
+                 etag, last_modified)
+            )
+        return body_hash
+
+    def validators(self, url):
+        """
+        Return the latest fetch's content_hash, etag, last_modified and fetched_at for `url`, or None
+        """
+        row = self.conn.execute(
+            "SELECT content_hash, etag, last_modified, fetched_at FROM responses "
+            "WHERE url = ? ORDER BY fetched_at DESC LIMIT 1",
+            (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('content_hash', 'etag', 'last_modified', 'fetched_at'), row))
+
+    def get(self, url, fetch_date=None):
+        """
+        Return the cached body for `url` (latest fetch unless `fetch_date` is given), or None
+        """
+        if fetch_date is None:
+            row = self.conn.execute(
+                "SELECT b.body FROM responses r JOIN blobs b USING (content_hash) "
+                "WHERE r.url = ? ORDER BY r.fetched_at DESC LIMIT 1",
+                (url,)
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT b.body FROM responses r JOIN blobs b USING (content_hash) "
+                "WHERE r.url = ? AND r.fetch_date = ?",
+                (url, fetch_date)
+            ).fetchone()
+        return zlib.decompress(row[0]) if row else None
+
+    def urls(self, prefix=''):
+        """
+        List distinct cached URLs starting with `prefix`
+        """
+        rows = self.conn.execute(
+            "SELECT DISTINCT url FROM responses WHERE substr(url, 1, ?) = ? ORDER BY url",
+            (len(prefix), prefix)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self):
+        """
+        Return counts and stored size for logging
+        """
+        responses, urls = self.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT url) FROM responses"
+        ).fetchone()
+        blobs, stored_bytes = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM blobs"
+        ).fetchone()
+        return {'responses': responses, 'urls': urls, 'blobs': blobs, 'stored_bytes': stored_bytes}
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Append-only journal of scraped parcel records
+
+Replaces the "rebuild a DataFrame and rewrite the whole CSV every N parcels"
+progress saves. Each finished parcel is appended as one JSON line to the
+current segment file, so a checkpoint costs the same no matter how many
+parcels are already done. Resuming reads the segments and skips parcels
+whose latest record succeeded (failed ones are retried), and compact()
+materializes the final dataset once at the end (latest record per parcel
+wins).
+
+Each run opens a fresh segment, so a line torn by a crash never gets glued to
+new records; unreadable lines are skipped when reading.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from boston_assessing import normalize_parcel_id, records_to_frame
+
+logger = logging.getLogger(__name__)
+
+class ScrapeJournal:
+    """
+    Directory of JSONL segments holding one record per scraped parcel.
+
+    Args:
+        directory: Journal directory (created if missing)
+        segment_size: Records per segment before rolling to a new file
+        sync_every: fsync the segment after this many appends
+    """
+
+    def __init__(self, directory, segment_size=5000, sync_every=50):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self.sync_every = sync_every
+        self._status = {}
+        self._file = None
+        self._segment_records = 0
+        self._unsynced = 0
+
+        for record in self.iter_records():
+            self._status[str(record.get('parcel_id'))] = bool(record.get('scraped_successfully'))
+
+        segments = self._segments()
+        self._next_segment = int(segments[-1].stem.split('-')[1]) + 1 if segments else 1
+
+    def _segments(self):
+        return sorted(self.directory.glob('segment-*.jsonl'))
+
+    def _roll_segment(self):
+        if self._file is not None:
+            self.checkpoint()
+            self._file.close()
+        path = self.directory / f"segment-{self._next_segment:05d}.jsonl"
+        self._next_segment += 1
+        self._file = open(path, 'a', encoding='utf-8')
+        self._segment_records = 0
+
+    def iter_records(self):
+        """
+        Yield every journaled record in write order
+        """
+        for segment in self._segments():
+            with open(segment, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping unreadable journal line in {segment.name}")
+
+    def _write(self, record):
+        if self._file is None or self._segment_records >= self.segment_size:
+            self._roll_segment()
+        self._file.write(json.dumps(record, default=str) + '\n')
+        self._segment_records += 1
+        self._unsynced += 1
+        self._status[str(record.get('parcel_id'))] = bool(record.get('scraped_successfully'))
+
+    def append(self, record):
+        """
+        Durably record one parcel result (constant time)
+        """
+        self._write(record)
+        self._file.flush()
+        if self._unsynced >= self.sync_every:
+            self.checkpoint()
+
+    def extend(self, records):
+        """
+        Record a batch of parcel results with a single flush and fsync
+        """
+        for record in records:
+            self._write(record)
+        if self._file is not None:
+            self._file.flush()
+            self.checkpoint()
+
+    def import_csv(self, csv_file):
+        """
+        Seed the journal from an old progress/enriched CSV (one-time migration)
+        """
+        df = pd.read_csv(csv_file, dtype={'parcel_id': str})
+        for record in df.to_dict('records'):
+            record['parcel_id'] = normalize_parcel_id(record['parcel_id'])
+            self.append({k: v for k, v in record.items() if not pd.isna(v)})
+        self.checkpoint()
+        logger.info(f"📋 Imported {len(df):,} records from {csv_file} into the journal")
+
+    def checkpoint(self):
+        """
+        Force appended records to disk
+        """
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def completed_ids(self, successful_only=False):
+        """
+        Parcel IDs with a journaled record (optionally only successful ones)
+        """
+        if successful_only:
+            return {pid for pid, ok in self._status.items() if ok}
+        return set(self._status)
+
+    def __contains__(self, parcel_id):
+        """
+        True once the parcel's latest record is a successful scrape, so a
+        resumed run retries parcels that failed last time
+        """
+        return self._status.get(str(parcel_id), False)
+
+    def __len__(self):
+        return len(self._status)
+
+    def latest_records(self):
+        """
+        Return {parcel_id: latest record} across all segments
+        """
+        latest = {}
+        for record in self.iter_records():
+            latest[str(record.get('parcel_id'))] = record
+        return latest
+
+    def compact(self, output_file=None):
+        """
+        Materialize the latest record per parcel as a DataFrame (and CSV if given)
+        """
+        df = records_to_frame(list(self.latest_records().values()))
+        if output_file:
+            df.to_csv(output_file, index=False)
+            logger.info(f"💾 Compacted {len(df):,} parcels from journal into {output_file}")
+        return df
+
+    def close(self):
+        if self._file is not None:
+            self.checkpoint()
+            self._file.close()
+            self._file = None
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Shared low-overhead logging setup for the long-running scrapers and geocoders
+
+setup_logging() replaces the per-script logging.basicConfig(...) calls:
+
+- the root logger gets a single QueueHandler; console and file handlers run
+  on a QueueListener thread, so terminal and disk I/O stay out of the
+  scraping / geocoding loop
+- the log file gets one JSON object per line (timestamp, level, logger,
+  message, plus any event fields), which is easy to grep, tail and load
+  into pandas; the console keeps the usual human-readable lines
+- per-item success messages marked with event(..., sample=True) are
+  sampled (1 in `sample_every` is kept) before they reach the queue;
+  warnings and errors are never sampled
+
+Usage in a script (call setup_logging from the entry point, not at import
+time, so importing a script's functions leaves the caller's logging alone):
+    from structured_logging import event, setup_logging
+
+    if __name__ == "__main__":
+        setup_logging('data/processed/parcel_scraping.log')
+
+    logger.info(f"✅ Scraped parcel {parcel_id}", extra=event('parcel_scraped', sample=True, parcel_id=parcel_id))
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# LogRecord attributes that are not event fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_listener = None
+_plain_formatter = logging.Formatter()
+
+def event(name, sample=False, **fields):
+    """
+    `extra=` dict tagging a log call with an event name and structured fields.
+
+    sample=True marks a routine per-item message that may be sampled out.
+    """
+    return {'event': name, 'sample': sample, **fields}
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: ts, level, logger, message, event fields
+    """
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key != 'sample':
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Merge args and render the traceback now (both may not survive the
+        # thread hop), but leave the message itself for the listener to format
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = _plain_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep 1 in `every` records marked sample=True per logger; everything else passes
+    """
+
+    def __init__(self, every=10):
+        super().__init__()
+        self.every = max(1, every)
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if not getattr(record, 'sample', False) or record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            count = self._counts.get(record.name, 0)
+            self._counts[record.name] = count + 1
+        return count % self.every == 0
+
+def setup_logging(log_file=None, level=logging.INFO, sample_every=10, console=True):
+    """
+    Route all logging through a background QueueListener; return the listener.
+
+    Args:
+        log_file: JSON-lines log file (parent directory is created); None for console only
+        level: Root logger level
+        sample_every: Keep 1 in N sampled per-item messages (1 keeps all)
+        console: Also write human-readable lines to stderr
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    handlers = []
+    if console:
+        stream = logging.StreamHandler()
+        stream.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        handlers.append(stream)
+    if log_file:
+        os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_every))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+def stop_logging():
+    """
+    Flush queued records and stop the listener thread
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
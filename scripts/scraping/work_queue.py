@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Lease-based SQLite work queue for running many parcel scrapers at once
+
+load_parcel_list() hands one process the whole parcel list. Here the parcel
+IDs live in a SQLite queue instead, and any number of worker processes (on
+this machine, or on others that see the file on a share with working file
+locks) lease disjoint batches:
+
+- lease(): claims up to N pending parcels for `lease_seconds`; parcels whose
+  lease expired (crashed or stalled worker) are reclaimed the same way
+- heartbeat(): a live worker keeps extending its leases while it works
+- complete(): stores the record and marks the parcel done in one
+  transaction, but only while the caller still holds the lease, so a parcel
+  is recorded at most once even if its lease was reclaimed mid-scrape
+- failed parcels go back to pending until `max_attempts` is reached; a
+  parcel whose lease expires on its last attempt is marked failed instead
+
+Scaling out from Allston-Brighton to all of Boston is then `init` with a
+bigger parcel list and more `work` processes.
+
+Usage (from the repository root):
+    python scripts/scraping/work_queue.py init
+    python scripts/scraping/work_queue.py work --batch-size 50 --concurrency 8   # start as many as needed
+    python scripts/scraping/work_queue.py status
+    python scripts/scraping/work_queue.py export
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+from boston_assessing import failure_record, load_parcel_list, records_to_frame
+from structured_logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = 'data/processed/scrape_cache/work_queue.sqlite'
+
+class WorkQueue:
+    """
+    SQLite-backed queue of parcel IDs with leases and heartbeats.
+
+    Args:
+        path: SQLite file to use (created with its parent directory if missing)
+        lease_seconds: How long a lease lasts without a heartbeat
+        max_attempts: Leases a parcel gets before a failure is final
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, lease_seconds=300, max_attempts=3):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # Autocommit mode; writes take the lock up front with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                parcel_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker_id TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                updated_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_status_lease ON tasks (status, lease_expires);
+        """)
+
+    def _transaction(self):
+        return _ImmediateTransaction(self.conn)
+
+    def enqueue(self, parcel_ids):
+        """
+        Add parcel IDs (already-queued ones are left untouched); return how many were new
+        """
+        with self._transaction():
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO tasks (parcel_id, updated_at) VALUES (?, ?)",
+                [(str(p), datetime.now().isoformat()) for p in parcel_ids]
+            )
+            return self.conn.total_changes - before
+
+    def lease(self, worker_id, batch_size=50):
+        """
+        Claim up to `batch_size` pending or expired-lease parcels for `worker_id`.
+
+        Expired leases that already used `max_attempts` are marked failed
+        rather than leased again, so a parcel that keeps stalling its
+        worker cannot be retried forever.
+        """
+        now = time.time()
+        with self._transaction():
+            exhausted = self.conn.execute(
+                "SELECT parcel_id FROM tasks WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE tasks SET status = 'failed', result = ?, worker_id = NULL, lease_expires = NULL, "
+                "updated_at = ? WHERE parcel_id = ?",
+                [(json.dumps(failure_record(p, f"lease expired after {self.max_attempts} attempts")),
+                  datetime.now().isoformat(), p) for (p,) in exhausted]
+            )
+            rows = self.conn.execute(
+                "SELECT parcel_id FROM tasks "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY parcel_id LIMIT ?",
+                (now, batch_size)
+            ).fetchall()
+            parcel_ids = [row[0] for row in rows]
+            self.conn.executemany(
+                "UPDATE tasks SET status = 'leased', worker_id = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE parcel_id = ?",
+                [(worker_id, now + self.lease_seconds, datetime.now().isoformat(), p) for p in parcel_ids]
+            )
+        if exhausted:
+            logger.warning(f"⚠️ Marked {len(exhausted)} parcels failed after {self.max_attempts} expired leases")
+        return parcel_ids
+
+    def heartbeat(self, worker_id):
+        """
+        Extend every lease `worker_id` still holds; return how many were extended
+        """
+        with self._transaction():
+            cursor = self.conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE status = 'leased' AND worker_id = ?",
+                (time.time() + self.lease_seconds, worker_id)
+            )
+            return cursor.rowcount
+
+    def complete(self, worker_id, records):
+        """
+        Record finished parcels held by `worker_id`; return how many were accepted.
+
+        Records for parcels whose lease this worker no longer holds are
+        dropped, so each parcel is recorded at most once. Failed records put
+        the parcel back to pending until it has used `max_attempts` leases.
+        """
+        accepted = 0
+        with self._transaction():
+            for record in records:
+                ok = bool(record.get('scraped_successfully'))
+                cursor = self.conn.execute(
+                    "UPDATE tasks SET "
+                    "status = CASE WHEN ? THEN 'done' WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                    "result = ?, worker_id = NULL, lease_expires = NULL, updated_at = ? "
+                    "WHERE parcel_id = ? AND status = 'leased' AND worker_id = ?",
+                    (ok, self.max_attempts, json.dumps(record, default=str), datetime.now().isoformat(),
+                     str(record.get('parcel_id')), worker_id)
+                )
+                accepted += cursor.rowcount
+        return accepted
+
+    def release(self, worker_id):
+        """
+        Hand back every lease `worker_id` holds (e.g. on shutdown)
+        """
+        with self._transaction():
+            cursor = self.conn.execute(
+                "UPDATE tasks SET status = 'pending', worker_id = NULL, lease_expires = NULL, "
+                "attempts = MAX(attempts - 1, 0) WHERE status = 'leased' AND worker_id = ?",
+                (worker_id,)
+            )
+            return cursor.rowcount
+
+    def counts(self):
+        """
+        Return {status: parcel count}
+        """
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+
+    def records(self):
+        """
+        Yield the stored record of every finished (done or finally failed) parcel
+        """
+        for (result,) in self.conn.execute(
+            "SELECT result FROM tasks WHERE status IN ('done', 'failed') AND result IS NOT NULL"
+        ):
+            yield json.loads(result)
+
+    def close(self):
+        self.conn.close()
+
+class _ImmediateTransaction:
+    """
+    BEGIN IMMEDIATE ... COMMIT/ROLLBACK, so concurrent workers serialize on the write lock
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+async def _heartbeat_loop(queue, worker_id, interval):
+    while True:
+        await asyncio.sleep(interval)
+        queue.heartbeat(worker_id)
+
+async def _work(queue, scraper, worker_id, batch_size, parse_workers):
+    heartbeat = asyncio.create_task(_heartbeat_loop(queue, worker_id, queue.lease_seconds / 3))
+    processed = accepted = 0
+
+    def on_batch(batch):
+        nonlocal processed, accepted
+        processed += len(batch)
+        accepted += queue.complete(worker_id, batch)
+        logger.info(f"📊 {worker_id}: {processed:,} parcels scraped, queue {queue.counts()}")
+
+    try:
+        # One scrape_many run (one connection pool, one parse pool) leases batches as it goes
+        await scraper.scrape_many(queue.lease(worker_id, batch_size), on_batch=on_batch,
+                                  parse_workers=parse_workers, batch_size=min(batch_size, 25),
+                                  refill=lambda: queue.lease(worker_id, batch_size))
+        return processed, accepted
+    finally:
+        heartbeat.cancel()
+
+def run_worker(queue_path=DEFAULT_QUEUE_PATH, worker_id=None, batch_size=50, concurrency=8,
+               rate_per_host=2.0, parse_workers=None, lease_seconds=300):
+    """
+    Lease batches from the queue and scrape them until the queue is drained
+    """
+    # Imported here so `init`/`status`/`export` do not need aiohttp
+    from async_scraper import AsyncParcelScraper
+    from details_url_index import DetailsUrlIndex
+    from response_cache import ResponseCache
+
+    worker_id = worker_id or default_worker_id()
+    queue = WorkQueue(queue_path, lease_seconds=lease_seconds)
+    cache = ResponseCache()
+    url_index = DetailsUrlIndex()
+    scraper = AsyncParcelScraper(concurrency=concurrency, rate_per_host=rate_per_host,
+                                 cache=cache, url_index=url_index)
+    logger.info(f"🚀 Worker {worker_id} starting (batch={batch_size}, concurrency={concurrency})")
+
+    start = time.monotonic()
+    try:
+        processed, accepted = asyncio.run(_work(queue, scraper, worker_id, batch_size, parse_workers))
+    except KeyboardInterrupt:
+        logger.info(f"⏹️ Worker {worker_id} interrupted; released {queue.release(worker_id)} leases")
+        return
+    finally:
+        cache.close()
+        url_index.close()
+        queue.close()
+
+    elapsed = time.monotonic() - start
+    logger.info(f"🎉 Worker {worker_id} finished: {processed:,} parcels scraped, {accepted:,} recorded "
+                f"in {elapsed:.1f}s")
+
+def export_results(queue_path=DEFAULT_QUEUE_PATH,
+                   output_file='data/processed/all_parcels_comprehensive_data.csv'):
+    """
+    Write every recorded parcel in the queue to the output CSV
+    """
+    queue = WorkQueue(queue_path)
+    df = records_to_frame(list(queue.records()))
+    queue.close()
+    df.to_csv(output_file, index=False)
+    logger.info(f"💾 Exported {len(df):,} parcels to {output_file}")
+    return df
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Shared parcel work queue for multi-worker scraping')
+    parser.add_argument('--queue', default=DEFAULT_QUEUE_PATH, help='Queue SQLite file (shared by all workers)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    init_parser = subparsers.add_parser('init', help='Queue every parcel from the mapping file')
+    init_parser.add_argument('--mapping-file', default='data/processed/gis_layers/building_parcel_mapping.csv')
+
+    work_parser = subparsers.add_parser('work', help='Lease and scrape batches until the queue is empty')
+    work_parser.add_argument('--worker-id', default=None, help='Defaults to <hostname>-<pid>')
+    work_parser.add_argument('--batch-size', type=int, default=50, help='Parcels leased at a time')
+    work_parser.add_argument('--concurrency', type=int, default=8, help='Parcels in flight at once')
+    work_parser.add_argument('--rate', type=float, default=2.0, help='Maximum requests per second per host')
+    work_parser.add_argument('--parse-workers', type=int, default=None, help='Processes parsing pages')
+    work_parser.add_argument('--lease-seconds', type=int, default=300, help='Lease length without a heartbeat')
+
+    subparsers.add_parser('status', help='Show parcel counts per status')
+
+    export_parser = subparsers.add_parser('export', help='Write recorded parcels to CSV')
+    export_parser.add_argument('--output', default='data/processed/all_parcels_comprehensive_data.csv')
+
+    args = parser.parse_args()
+    setup_logging('data/processed/work_queue.log')
+
+    if args.command == 'init':
+        queue = WorkQueue(args.queue)
+        added = queue.enqueue(load_parcel_list(args.mapping_file))
+        logger.info(f"📋 Queued {added:,} new parcels; queue now {queue.counts()}")
+        queue.close()
+    elif args.command == 'work':
+        run_worker(args.queue, worker_id=args.worker_id, batch_size=args.batch_size,
+                   concurrency=args.concurrency, rate_per_host=args.rate,
+                   parse_workers=args.parse_workers, lease_seconds=args.lease_seconds)
+    elif args.command == 'status':
+        queue = WorkQueue(args.queue)
+        logger.info(f"📊 Queue {args.queue}: {queue.counts()}")
+        queue.close()
+    else:
+        export_results(args.queue, args.output)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: addresses/second per geocoder backend, single queries vs. batches
+
+Builds a synthetic answer file of Allston-Brighton style addresses, then
+times each backend's geocode() loop and geocode_batch() call on the same
+addresses and reports throughput and match rate. The cache is bypassed so
+only the backend is measured.
+
+The mock backend runs offline; its --mock-request-latency and
+--mock-row-latency flags model a provider's per-request and per-row cost.
+nominatim and census hit the real services and only run with --live (keep
+--single-limit small for nominatim, it is limited to ~1 request/second).
+
+Usage (from the repository root):
+    python scripts/testing/benchmark_geocoders.py
+    python scripts/testing/benchmark_geocoders.py --mock-request-latency 1.1 --mock-row-latency 0.002 --single-limit 20
+    python scripts/testing/benchmark_geocoders.py --backends census,nominatim --live --addresses 200 --single-limit 10
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data_processing'))
+
+import pandas as pd
+
+from geocoder_backends import get_backend
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+STREETS = ['N HARVARD ST', 'CAMBRIDGE ST', 'COMMONWEALTH AVE', 'BRIGHTON AVE', 'WASHINGTON ST',
+           'BEACON ST', 'CHESTNUT HILL AVE', 'WESTERN AVE', 'MARKET ST', 'LINCOLN ST']
+LIVE_BACKENDS = {'nominatim', 'census'}
+
+def synthetic_addresses(count, seed=0):
+    """
+    DataFrame of address, zip_code, latitude, longitude
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        rows.append({
+            'address': f"{rng.randint(1, 400)} {rng.choice(STREETS)}",
+            'zip_code': rng.choice(['02134', '02135']),
+            'latitude': 42.34 + rng.random() * 0.03,
+            'longitude': -71.17 + rng.random() * 0.05,
+        })
+    return pd.DataFrame(rows).drop_duplicates(['address', 'zip_code']).reset_index(drop=True)
+
+def run_backend(backend, addresses, single_limit):
+    queries = [(i, row.address, 'Boston', 'MA', row.zip_code) for i, row in enumerate(addresses.itertuples())]
+    results = {}
+
+    single = queries[:single_limit]
+    start = time.perf_counter()
+    matched = sum(1 for _, address, city, state, zip_code in single
+                  if backend.geocode(address, city, state, zip_code)[0] is not None)
+    elapsed = time.perf_counter() - start
+    results['single'] = (len(single), elapsed, matched)
+
+    start = time.perf_counter()
+    found = backend.geocode_batch(queries)
+    elapsed = time.perf_counter() - start
+    results['batch'] = (len(queries), elapsed, sum(1 for lat, _ in found.values() if lat is not None))
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare geocoder backend throughput')
+    parser.add_argument('--backends', default='mock', help='Comma-separated backend names')
+    parser.add_argument('--addresses', type=int, default=5000, help='Synthetic addresses to generate')
+    parser.add_argument('--single-limit', type=int, default=1000, help='Addresses timed through single queries')
+    parser.add_argument('--mock-request-latency', type=float, default=0.0)
+    parser.add_argument('--mock-row-latency', type=float, default=0.0)
+    parser.add_argument('--live', action='store_true', help='Allow backends that call real services')
+    args = parser.parse_args()
+
+    addresses = synthetic_addresses(args.addresses)
+    with tempfile.TemporaryDirectory() as tmp:
+        answers_path = os.path.join(tmp, 'answers.csv')
+        addresses.to_csv(answers_path, index=False)
+
+        rows = []
+        for name in [n.strip() for n in args.backends.split(',') if n.strip()]:
+            if name in LIVE_BACKENDS and not args.live:
+                logger.warning(f"⚠️  Skipping {name}: it calls a real service, pass --live to include it")
+                continue
+            kwargs = {}
+            if name == 'mock':
+                kwargs = {'path': answers_path, 'request_latency': args.mock_request_latency,
+                          'row_latency': args.mock_row_latency}
+            backend = get_backend(name, **kwargs)
+            logger.info(f"⏱️  {name}: {min(args.single_limit, len(addresses)):,} single queries, "
+                        f"{len(addresses):,} in batches")
+            for mode, (count, elapsed, matched) in run_backend(backend, addresses, args.single_limit).items():
+                rows.append({
+                    'backend': name,
+                    'mode': mode,
+                    'addresses': count,
+                    'seconds': round(elapsed, 3),
+                    'addresses_per_sec': round(count / elapsed, 1) if elapsed > 0 else float('inf'),
+                    'match_rate': f"{matched / count * 100:.1f}%" if count else '-',
+                })
+
+    if rows:
+        print()
+        print(pd.DataFrame(rows).to_string(index=False))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: BeautifulSoup extractor vs. single-pass lxml parser
+
+Parses saved Boston.gov details pages with both the legacy BeautifulSoup
+extractor (legacy_bs4_extractor.py, html.parser backend) and
+property_page_parser.parse_property_page, reports per-page parse time for
+each, and checks that both produce the same fields.
+
+Pages come from scripts/testing/fixtures/*.html by default, or from the raw
+response cache with --cache.
+
+Usage (from the repository root):
+    python scripts/testing/benchmark_property_parser.py
+    python scripts/testing/benchmark_property_parser.py --cache data/processed/scrape_cache/responses.sqlite --pages 500
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scraping'))
+
+from bs4 import BeautifulSoup
+
+from legacy_bs4_extractor import extract_all_information
+from property_page_parser import parse_property_page
+from response_cache import ResponseCache
+
+FIXTURE_DIR = Path(__file__).parent / 'fixtures'
+
+def load_pages(cache_path=None, max_pages=200):
+    """
+    Load details pages from the fixture directory or the response cache
+    """
+    if cache_path:
+        cache = ResponseCache(cache_path)
+        urls = [url for url in cache.urls() if 'pid=' in url][:max_pages]
+        pages = [cache.get(url) for url in urls]
+        cache.close()
+        return pages
+    return [path.read_bytes() for path in sorted(FIXTURE_DIR.glob('*.html'))][:max_pages]
+
+def legacy_parse(content):
+    return extract_all_information(BeautifulSoup(content, 'html.parser'))
+
+def time_parser(parse, pages, repeat):
+    """
+    Return the best average seconds per page over `repeat` runs
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for content in pages:
+            parse(content)
+        best = min(best, (time.perf_counter() - start) / len(pages))
+    return best
+
+def compare_outputs(pages):
+    """
+    Return a list of (page_index, field, legacy_value, new_value) mismatches
+    """
+    mismatches = []
+    for i, content in enumerate(pages):
+        old, new = legacy_parse(content), parse_property_page(content)
+        for field in sorted(set(old) | set(new)):
+            if old.get(field) != new.get(field):
+                mismatches.append((i, field, old.get(field), new.get(field)))
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark property page parsers')
+    parser.add_argument('--cache', default=None, help='Read details pages from this response cache instead of fixtures')
+    parser.add_argument('--pages', type=int, default=200, help='Maximum number of pages to parse')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs per parser (best is reported)')
+    args = parser.parse_args()
+
+    # Keep per-page log lines out of the timings
+    logging.getLogger().setLevel(logging.WARNING)
+
+    pages = load_pages(args.cache, args.pages)
+    if not pages:
+        print("❌ No pages found to benchmark")
+        return
+
+    print(f"📄 Benchmarking {len(pages)} page(s), best of {args.repeat} runs")
+
+    legacy = time_parser(legacy_parse, pages, args.repeat)
+    single_pass = time_parser(parse_property_page, pages, args.repeat)
+
+    print(f"  BeautifulSoup (html.parser, 3 table walks): {legacy * 1000:8.2f} ms/page")
+    print(f"  lxml single pass + dispatch table:          {single_pass * 1000:8.2f} ms/page")
+    print(f"  ⚡ Speedup: {legacy / single_pass:.1f}x")
+
+    mismatches = compare_outputs(pages)
+    if mismatches:
+        print(f"⚠️ {len(mismatches)} field mismatches between parsers:")
+        for i, field, old, new in mismatches[:20]:
+            print(f"  page {i} {field}: {old!r} != {new!r}")
+    else:
+        print("✅ Both parsers produced identical records")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Load-test the parcel scrapers against the local stand-in site
+
+Starts standin_assessing_server.py in a subprocess, drives the real scraping
+code at it (AsyncParcelScraper, or AssessingClient with --mode sync), and
+reports throughput, request latency, retries and memory, so concurrency,
+rate-controller and parser changes can be compared offline.
+
+Each run uses a fresh temporary response cache and details URL index, so
+every parcel costs the full search + details round trip.
+
+Usage (from the repository root):
+    python scripts/testing/benchmark_scraper_load.py --parcels 500 --concurrency 16 --rate 50
+    python scripts/testing/benchmark_scraper_load.py --latency-ms 120 --jitter-ms 80 --error-rate 0.02 --rate-limit 20
+    python scripts/testing/benchmark_scraper_load.py --mode sync --parcels 100
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scraping'))
+
+from async_scraper import AsyncParcelScraper
+from boston_assessing import AssessingClient
+from details_url_index import DetailsUrlIndex
+from rate_controller import AdaptiveRateController
+from response_cache import ResponseCache
+
+SERVER_SCRIPT = Path(__file__).parent / 'standin_assessing_server.py'
+
+class TimedController(AdaptiveRateController):
+    """
+    Rate controller that keeps every successful request's latency (pacing waits excluded)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+
+    def record_success(self, latency):
+        self.latencies.append(latency)
+        super().record_success(latency)
+
+class TimedAsyncScraper(AsyncParcelScraper):
+    controller_class = TimedController
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+def start_server(port, server_args):
+    """
+    Launch the stand-in server and wait until it accepts connections
+    """
+    process = subprocess.Popen([sys.executable, str(SERVER_SCRIPT), '--port', str(port)] + server_args,
+                               stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('localhost', port), timeout=0.5):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"Stand-in server did not start on port {port}")
+
+def run_async(parcel_ids, base_url, workdir, args):
+    cache = ResponseCache(os.path.join(workdir, 'responses.sqlite'))
+    url_index = DetailsUrlIndex(os.path.join(workdir, 'index.sqlite'))
+    scraper = TimedAsyncScraper(concurrency=args.concurrency, rate_per_host=args.rate,
+                                cache=cache, url_index=url_index, base_url=base_url)
+    try:
+        records = asyncio.run(scraper.scrape_many(parcel_ids, parse_workers=args.parse_workers))
+    finally:
+        cache.close()
+        url_index.close()
+    controller = scraper.controller(base_url)
+    return records, controller.latencies, controller.stats()
+
+def run_sync(parcel_ids, base_url, workdir, args):
+    cache = ResponseCache(os.path.join(workdir, 'responses.sqlite'))
+    url_index = DetailsUrlIndex(os.path.join(workdir, 'index.sqlite'))
+    controller = TimedController(max_rate=args.rate)
+    client = AssessingClient(cache=cache, url_index=url_index, max_retries=3, base_url=base_url,
+                             rate_controller=controller)
+    try:
+        records = [client.scrape_parcel(parcel_id) for parcel_id in parcel_ids]
+    finally:
+        client.close()
+        cache.close()
+        url_index.close()
+    return records, controller.latencies, controller.stats()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scrapers against the local stand-in site')
+    parser.add_argument('--mode', choices=['async', 'sync'], default='async')
+    parser.add_argument('--parcels', type=int, default=300, help='Number of parcels to scrape')
+    parser.add_argument('--concurrency', type=int, default=8, help='Async parcels in flight')
+    parser.add_argument('--rate', type=float, default=50.0, help='Rate controller ceiling (requests/s per host)')
+    parser.add_argument('--parse-workers', type=int, default=None, help='Async parse processes (0 = inline)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Also report peak Python heap via tracemalloc (slows the run)')
+    # Passed through to the stand-in server
+    parser.add_argument('--cache', default=None, help='Serve recorded pages from this response cache')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, default=None)
+    parser.add_argument('--burst-every', type=float, default=None)
+    parser.add_argument('--burst-length', type=float, default=0.0)
+    args = parser.parse_args()
+
+    # Keep per-parcel log lines out of the timings
+    logging.getLogger().setLevel(logging.ERROR)
+
+    server_args = ['--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+                   '--error-rate', str(args.error_rate), '--burst-length', str(args.burst_length)]
+    for flag, value in (('--cache', args.cache), ('--rate-limit', args.rate_limit),
+                        ('--burst-every', args.burst_every)):
+        if value is not None:
+            server_args += [flag, str(value)]
+
+    base_url = f"http://localhost:{args.port}/assessing/search/"
+    parcel_ids = [str(2100000000 + i) for i in range(args.parcels)]
+    server = start_server(args.port, server_args)
+
+    print(f"🏁 {args.mode} scrape of {len(parcel_ids)} parcels "
+          f"(concurrency={args.concurrency}, rate ceiling={args.rate}/s)")
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            if args.trace_memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            run = run_async if args.mode == 'async' else run_sync
+            records, latencies, controller_stats = run(parcel_ids, base_url, workdir, args)
+            elapsed = time.perf_counter() - start
+            peak_traced = tracemalloc.get_traced_memory()[1] if args.trace_memory else None
+    finally:
+        server.terminate()
+        server.wait()
+
+    successful = sum(1 for r in records if r.get('scraped_successfully'))
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"  ✅ Successful:      {successful}/{len(records)}")
+    print(f"  ⏱️ Elapsed:         {elapsed:.2f}s")
+    print(f"  🚀 Throughput:      {len(records) / elapsed:.2f} parcels/s")
+    print(f"  📡 Requests:        {controller_stats['requests']} "
+          f"(p50 {percentile(latencies, 50) * 1000:.1f} ms, p99 {percentile(latencies, 99) * 1000:.1f} ms)")
+    print(f"  🔁 Retries:         {controller_stats['retries']} "
+          f"(failures {controller_stats['failures']}, breaker trips {controller_stats['breaker_trips']})")
+    print(f"  🚦 Final rate:      {controller_stats['rate']}/s")
+    print(f"  🧠 Peak RSS:        {max_rss_mb:.1f} MB")
+    if peak_traced is not None:
+        print(f"  🧠 Peak Python heap: {peak_traced / 1024 / 1024:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Boston.gov assessing site
+
+Serves recorded search and details pages so the scrapers can be exercised
+and benchmarked without touching the live site. Pages come from the raw
+response cache (scripts/scraping/response_cache.py) when --cache is given;
+parcels that are not recorded get a synthetic search page linking to
+`?pid=<parcel>` and the details page from scripts/testing/fixtures/.
+
+Misbehaviour is configurable, to see how the rate controller copes:
+    --latency-ms / --jitter-ms   per-request service time
+    --error-rate                 fraction of requests answered 503
+    --rate-limit                 requests/second above which replies are 429
+    --burst-every / --burst-length
+                                 every N seconds, answer 429 for M seconds
+    --retry-after                Retry-After seconds sent with every 429
+
+Responses carry an ETag, and If-None-Match is answered with 304.
+
+Point a scraper at it with base_url=http://localhost:<port>/assessing/search/.
+
+Usage (from the repository root):
+    python scripts/testing/standin_assessing_server.py --port 8765
+    python scripts/testing/standin_assessing_server.py --cache data/processed/scrape_cache/responses.sqlite --latency-ms 150 --error-rate 0.02
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scraping'))
+
+from boston_assessing import BASE_URL
+from response_cache import ResponseCache
+
+FIXTURE_DIR = Path(__file__).parent / 'fixtures'
+SEARCH_PATH = '/assessing/search/'
+
+class StandInConfig:
+    """
+    Behaviour knobs shared by all request handler threads.
+    """
+
+    def __init__(self, cache_path=None, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                 rate_limit=None, burst_every=None, burst_length=0.0, retry_after=1):
+        self.cache_path = cache_path
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+
+        self.details_fixture = sorted(FIXTURE_DIR.glob('*.html'))[0].read_bytes()
+        self.started = time.monotonic()
+        self.counts = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._window_start = self.started
+        self._window_requests = 0
+
+    def count(self, status):
+        with self._lock:
+            self.counts[status] = self.counts.get(status, 0) + 1
+
+    def cache(self):
+        # sqlite3 connections are per thread
+        if self.cache_path and not hasattr(self._local, 'cache'):
+            self._local.cache = ResponseCache(self.cache_path)
+        return getattr(self._local, 'cache', None)
+
+    def throttled(self):
+        """
+        True when this request falls in a 429 burst or exceeds --rate-limit
+        """
+        now = time.monotonic()
+        if self.burst_every and (now - self.started) % self.burst_every < self.burst_length:
+            return True
+        if self.rate_limit:
+            with self._lock:
+                if now - self._window_start >= 1.0:
+                    self._window_start, self._window_requests = now, 0
+                self._window_requests += 1
+                return self._window_requests > self.rate_limit
+        return False
+
+    def page(self, query):
+        """
+        Return the body for a search (`parcel=`) or details (`pid=`) query, or None
+        """
+        cache = self.cache()
+        if cache is not None:
+            body = cache.get(f"{BASE_URL}?{query}")
+            if body is not None:
+                return body
+
+        params = parse_qs(query)
+        if 'parcel' in params:
+            parcel_id = params['parcel'][0]
+            return (f'<html><body><table><tr><td><a href="?pid={parcel_id}">{parcel_id}</a>'
+                    f'</td></tr></table></body></html>').encode()
+        if 'pid' in params:
+            return self.details_fixture
+        return None
+
+def make_handler(config):
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, body=b'', headers=None):
+            config.count(status)
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            delay = config.latency + random.uniform(0, config.jitter)
+            if delay:
+                time.sleep(delay)
+
+            url = urlsplit(self.path)
+            if url.path != SEARCH_PATH:
+                return self._reply(404, b'Not found')
+            if config.throttled():
+                return self._reply(429, b'Too many requests', {'Retry-After': str(config.retry_after)})
+            if random.random() < config.error_rate:
+                return self._reply(503, b'Service unavailable')
+
+            body = config.page(url.query)
+            if body is None:
+                return self._reply(404, b'Not found')
+
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            if self.headers.get('If-None-Match') == etag:
+                return self._reply(304, headers={'ETag': etag})
+            self._reply(200, body, {'Content-Type': 'text/html; charset=utf-8', 'ETag': etag})
+
+    return StandInHandler
+
+def serve(port=8765, **config_kwargs):
+    config = StandInConfig(**config_kwargs)
+    server = ThreadingHTTPServer(('localhost', port), make_handler(config))
+    server.daemon_threads = True
+    print(f"🧪 Stand-in assessing site on http://localhost:{port}{SEARCH_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"📊 Responses by status: {dict(sorted(config.counts.items()))}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve recorded Boston.gov assessing pages locally')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cache', default=None, help='Response cache to serve recorded pages from')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Base service time per request')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Extra uniform random service time')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered 503')
+    parser.add_argument('--rate-limit', type=float, default=None, help='Requests/second before answering 429')
+    parser.add_argument('--burst-every', type=float, default=None, help='Seconds between 429 bursts')
+    parser.add_argument('--burst-length', type=float, default=0.0, help='Length of each 429 burst in seconds')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429s')
+    args = parser.parse_args()
+
+    serve(args.port, cache_path=args.cache, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+          error_rate=args.error_rate, rate_limit=args.rate_limit, burst_every=args.burst_every,
+          burst_length=args.burst_length, retry_after=args.retry_after)
@@ -83,6 +83,17 @@ CREATE TABLE property_assessments (
     FOREIGN KEY (parcel_id) REFERENCES parcels(parcel_id)
 );
 
+-- Scraped assessment value history, one row per parcel and fiscal year
+-- (loaded by scripts/data_loading/load_value_history.py)
+CREATE TABLE property_value_history (
+    parcel_id VARCHAR(50) NOT NULL,
+    fiscal_year INTEGER NOT NULL,
+    property_type VARCHAR(100),
+    assessed_value DECIMAL(14,2) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (parcel_id, fiscal_year)
+);
+
 -- Property ownership
 CREATE TABLE property_ownership (
     ownership_id SERIAL PRIMARY KEY,
@@ -169,6 +180,8 @@ CREATE TABLE voters (
     normalized_address VARCHAR(200),
     latitude DECIMAL(10, 8),
     longitude DECIMAL(11, 8),
+    coord_quality VARCHAR(30),
+    coord_offset_m DOUBLE PRECISION,
     is_elderly BOOLEAN,
     age INTEGER,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -341,6 +354,32 @@ LEFT JOIN property_assessments pa ON p.parcel_id = pa.parcel_id
     AND pa.fiscal_year = (SELECT MAX(fiscal_year) FROM property_assessments)
 GROUP BY w.ward_id, w.ward_name;
 
+-- Value history trends per parcel (5/10-year change counts back from the latest year)
+CREATE VIEW property_value_trends AS
+WITH ranked AS (
+    SELECT
+        parcel_id,
+        fiscal_year,
+        assessed_value,
+        ROW_NUMBER() OVER w as recency,
+        LEAD(assessed_value, 4) OVER w as value_5_back,
+        LEAD(assessed_value, 9) OVER w as value_10_back
+    FROM property_value_history
+    WINDOW w AS (PARTITION BY parcel_id ORDER BY fiscal_year DESC)
+)
+SELECT 
+    parcel_id,
+    MAX(fiscal_year) as latest_fiscal_year,
+    MAX(CASE WHEN recency = 1 THEN assessed_value END) as latest_assessed_value,
+    MAX(CASE WHEN recency = 1 THEN (assessed_value - value_5_back) * 100.0 / NULLIF(value_5_back, 0) END) as value_trend_5yr,
+    MAX(CASE WHEN recency = 1 THEN (assessed_value - value_10_back) * 100.0 / NULLIF(value_10_back, 0) END) as value_trend_10yr,
+    STDDEV_POP(assessed_value) as value_volatility,
+    MAX(assessed_value) as max_value,
+    MIN(assessed_value) as min_value,
+    COUNT(*) as years_of_data
+FROM ranked
+GROUP BY parcel_id;
+
 -- Elderly density by precinct
 CREATE VIEW elderly_density_by_precinct AS
 SELECT 
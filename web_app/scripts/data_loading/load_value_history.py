@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Load the long-format value history (value_history.parquet) into Postgres
+
+The Parquet file is written by scripts/data_processing/value_history_store.py.
+Rows are streamed with COPY into a temporary table and upserted into
+property_value_history on its (parcel_id, fiscal_year) key, so the load can
+be re-run after every scrape. The property_value_trends view is (re)created
+on every load, so trend metrics are available even in databases created
+before complete_schema.sql defined it.
+
+Usage (from the repository root):
+    python web_app/scripts/data_loading/load_value_history.py
+    python web_app/scripts/data_loading/load_value_history.py --parquet data/processed/value_history.parquet
+"""
+
+import argparse
+import os
+
+import pandas as pd
+import psycopg
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Database configuration
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'dbname': os.getenv('DB_NAME', 'abcdc_spatial'),
+    'user': os.getenv('DB_USER', 'Studies'),
+    'password': os.getenv('DB_PASSWORD', ''),
+    'port': os.getenv('DB_PORT', '5432')
+}
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS property_value_history (
+        parcel_id VARCHAR(50) NOT NULL,
+        fiscal_year INTEGER NOT NULL,
+        property_type VARCHAR(100),
+        assessed_value DECIMAL(14,2) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (parcel_id, fiscal_year)
+    )
+"""
+
+# Same definition as in web_app/config/complete_schema.sql
+CREATE_TRENDS_VIEW_SQL = """
+    CREATE OR REPLACE VIEW property_value_trends AS
+    WITH ranked AS (
+        SELECT
+            parcel_id,
+            fiscal_year,
+            assessed_value,
+            ROW_NUMBER() OVER w as recency,
+            LEAD(assessed_value, 4) OVER w as value_5_back,
+            LEAD(assessed_value, 9) OVER w as value_10_back
+        FROM property_value_history
+        WINDOW w AS (PARTITION BY parcel_id ORDER BY fiscal_year DESC)
+    )
+    SELECT
+        parcel_id,
+        MAX(fiscal_year) as latest_fiscal_year,
+        MAX(CASE WHEN recency = 1 THEN assessed_value END) as latest_assessed_value,
+        MAX(CASE WHEN recency = 1 THEN (assessed_value - value_5_back) * 100.0 / NULLIF(value_5_back, 0) END) as value_trend_5yr,
+        MAX(CASE WHEN recency = 1 THEN (assessed_value - value_10_back) * 100.0 / NULLIF(value_10_back, 0) END) as value_trend_10yr,
+        STDDEV_POP(assessed_value) as value_volatility,
+        MAX(assessed_value) as max_value,
+        MIN(assessed_value) as min_value,
+        COUNT(*) as years_of_data
+    FROM ranked
+    GROUP BY parcel_id
+"""
+
+def load_value_history(parquet_path='data/processed/value_history.parquet'):
+    """Upsert every (parcel_id, fiscal_year) row from the Parquet file"""
+    if not os.path.exists(parquet_path):
+        print(f"❌ Value history file not found: {parquet_path}")
+        return False
+
+    df = pd.read_parquet(parquet_path, columns=['parcel_id', 'fiscal_year', 'property_type', 'assessed_value'])
+    print(f"📊 Loaded {len(df):,} value history rows from {parquet_path}")
+
+    try:
+        with psycopg.connect(**DB_CONFIG) as conn:
+            cursor = conn.cursor()
+            cursor.execute(CREATE_TABLE_SQL)
+            cursor.execute(CREATE_TRENDS_VIEW_SQL)
+            cursor.execute("""
+                CREATE TEMP TABLE value_history_staging
+                (LIKE property_value_history INCLUDING DEFAULTS) ON COMMIT DROP
+            """)
+
+            with cursor.copy("COPY value_history_staging (parcel_id, fiscal_year, property_type, assessed_value) "
+                             "FROM STDIN") as copy:
+                for row in df.itertuples(index=False):
+                    copy.write_row((row.parcel_id, int(row.fiscal_year),
+                                    None if pd.isna(row.property_type) else row.property_type,
+                                    row.assessed_value))
+
+            cursor.execute("""
+                INSERT INTO property_value_history (parcel_id, fiscal_year, property_type, assessed_value)
+                SELECT parcel_id, fiscal_year, property_type, assessed_value FROM value_history_staging
+                ON CONFLICT (parcel_id, fiscal_year) DO UPDATE
+                SET property_type = EXCLUDED.property_type,
+                    assessed_value = EXCLUDED.assessed_value
+            """)
+            upserted = cursor.rowcount
+
+            cursor.execute("SELECT COUNT(*), COUNT(DISTINCT parcel_id) FROM property_value_history")
+            total_rows, total_parcels = cursor.fetchone()
+
+        print(f"✅ Upserted {upserted:,} rows")
+        print(f"💰 property_value_history: {total_rows:,} rows for {total_parcels:,} parcels")
+        return True
+
+    except psycopg.Error as e:
+        print(f"❌ Database error: {e}")
+        return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load long-format value history into Postgres')
+    parser.add_argument('--parquet', default='data/processed/value_history.parquet')
+    args = parser.parse_args()
+
+    load_value_history(args.parquet)
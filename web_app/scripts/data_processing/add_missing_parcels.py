@@ -10,6 +10,13 @@ import os
 from dotenv import load_dotenv
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+                                'scripts', 'data_processing'))
+
+from address_point_index import geocode_local
+from geocode_cache import shared_cache
+from geocoder_backends import get_backend
+
 load_dotenv()
 
 DB_CONFIG = {
@@ -22,20 +29,14 @@ DB_CONFIG = {
 
 def geocode_address(st_num, st_name, city, zip_code):
     try:
-        from geopy.geocoders import Nominatim
-        import time
-        
-        geolocator = Nominatim(user_agent='abcdc_geocoder')
-        
-        address = f"{int(st_num) if pd.notna(st_num) else ''} {st_name}, {city}, MA {int(zip_code) if pd.notna(zip_code) else ''}"
-        address = address.strip().replace('  ', ' ')
-        
-        time.sleep(1)
-        location = geolocator.geocode(address, timeout=10)
-        
-        if location:
-            return location.latitude, location.longitude
-        return None, None
+        street = f"{int(st_num) if pd.notna(st_num) else ''} {st_name}".strip()
+        local = geocode_local(street, zip_code)
+        if local:
+            return local[0], local[1]
+        zip_val = int(zip_code) if pd.notna(zip_code) else None
+        backend = get_backend()
+        return shared_cache().forward(street, lambda: backend.geocode(street, city, 'MA', zip_val),
+                                      zip_code=zip_code, provider=backend.name)
     except ImportError:
         return None, None
     except Exception:
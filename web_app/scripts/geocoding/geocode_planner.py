@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Address-level geocoding plan and set-based write-back
+
+Many voters (and buildings) share a street address. The planner groups the
+pending rows by normalized address (geocode_cache.address_key), so each
+unique address is geocoded once, then fans the coordinates back out to
+every row id. The results go to Postgres with one COPY into a temporary
+geocode_results table, and the caller applies them with a single
+UPDATE ... FROM geocode_results. Network calls and DB round-trips both
+scale with unique addresses instead of residents.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+                                'scripts', 'data_processing'))
+
+from geocode_cache import address_key
+from geocoder_backends import geocode_many, get_backend
+
+def group_by_address(rows):
+    """
+    [(id, address, zip_code), ...] -> {address_key: (address, zip_code, [ids])}
+
+    Rows without an address are left out.
+    """
+    groups = {}
+    for row_id, address, zip_code in rows:
+        if not address or not address.strip():
+            continue
+        key = address_key(address, zip_code)
+        if key not in groups:
+            groups[key] = (address, zip_code, [])
+        groups[key][2].append(row_id)
+    return groups
+
+def resolve_addresses(groups, resolve, progress_every=50):
+    """
+    Call resolve(address, zip_code) -> (lat, lon) once per unique address.
+
+    Returns {address_key: (lat, lon)} for the addresses that resolved.
+    """
+    coords = {}
+    for i, (key, (address, zip_code, row_ids)) in enumerate(groups.items(), 1):
+        lat, lon = resolve(address, zip_code)
+        if lat and lon:
+            coords[key] = (lat, lon)
+        if progress_every and i % progress_every == 0:
+            print(f"Progress: {i}/{len(groups)} addresses ({i/len(groups)*100:.1f}%) - Resolved: {len(coords)}")
+    return coords
+
+def geocode_groups(groups, local, backend=None, city='Boston', state='MA'):
+    """
+    Like resolve_addresses, but every address local(address, zip_code) cannot
+    place is submitted together through geocoder_backends.geocode_many (geocode
+    cache first, then the configured backend in as few batches as it allows).
+    """
+    coords = {}
+    queries = []
+    for key, (address, zip_code, row_ids) in groups.items():
+        point = local(address, zip_code)
+        if point:
+            coords[key] = point
+        else:
+            queries.append((key, address, city, state, zip_code))
+    print(f"{len(coords):,} of {len(groups):,} unique addresses resolved locally")
+
+    if queries:
+        backend = backend or get_backend()
+        print(f"Geocoding {len(queries):,} addresses: geocode cache first, misses go to {backend.name} "
+              f"in batches of up to {backend.batch_size:,}...")
+        try:
+            coords.update(geocode_many(queries, backend))
+        except Exception as e:
+            # Completed submissions are already in the geocode cache; a re-run picks them up
+            print(f"❌ {backend.name} geocoding stopped: {e}")
+    return coords
+
+def fan_out(groups, coords):
+    """
+    [(id, lat, lon), ...] for every row whose address resolved
+    """
+    return [(row_id, lat, lon)
+            for key, (lat, lon) in coords.items()
+            for row_id in groups[key][2]]
+
+def copy_coordinates(cursor, rows):
+    """
+    COPY (id, lat, lon) rows into the temporary table geocode_results
+    (dropped at commit), ready for one UPDATE ... FROM geocode_results
+    """
+    cursor.execute("DROP TABLE IF EXISTS geocode_results")
+    cursor.execute("""
+        CREATE TEMP TABLE geocode_results (
+            id VARCHAR(50) PRIMARY KEY,
+            latitude DOUBLE PRECISION NOT NULL,
+            longitude DOUBLE PRECISION NOT NULL
+        ) ON COMMIT DROP
+    """)
+    with cursor.copy("COPY geocode_results (id, latitude, longitude) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+    return len(rows)
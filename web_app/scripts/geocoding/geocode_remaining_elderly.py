@@ -7,7 +7,13 @@ import psycopg
 import os
 from dotenv import load_dotenv
 import sys
-import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+                                'scripts', 'data_processing'))
+
+from address_point_index import geocode_local
+from geocode_cache import shared_cache
+from geocoder_backends import get_backend
 
 load_dotenv()
 
@@ -20,22 +26,13 @@ DB_CONFIG = {
 }
 
 def geocode_address(address, city='Boston', state='MA', zip_code=None):
+    local = geocode_local(address, zip_code)
+    if local:
+        return local[0], local[1]
     try:
-        from geopy.geocoders import Nominatim
-        from geopy.exc import GeocoderTimedOut
-        
-        geolocator = Nominatim(user_agent='abcdc_geocoder')
-        
-        full_address = f"{address}, {city}, {state}"
-        if zip_code:
-            full_address += f" {zip_code}"
-        
-        time.sleep(1.1)
-        location = geolocator.geocode(full_address, timeout=15)
-        
-        if location:
-            return location.latitude, location.longitude
-        return None, None
+        backend = get_backend()
+        return shared_cache().forward(address, lambda: backend.geocode(address, city, state, zip_code),
+                                      zip_code=zip_code, provider=backend.name)
     except ImportError:
         print("  Error: geopy not installed. Run: pip install geopy")
         return None, None
@@ -3,6 +3,8 @@
 Smart script to geocode remaining elderly voters
 - First checks homeowners_geocoded.csv for existing coordinates
 - Only geocodes addresses not found in the CSV
+- Submits the unresolved addresses together to the backend chosen by
+  GEOCODER_BACKEND (nominatim, census or mock; see geocoder_backends.py)
 """
 
 import psycopg
@@ -10,7 +12,13 @@ import pandas as pd
 import os
 from dotenv import load_dotenv
 import sys
-import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+                                'scripts', 'data_processing'))
+
+from address_point_index import geocode_local
+from geocode_cache import shared_cache
+from geocode_planner import copy_coordinates, fan_out, geocode_groups, group_by_address, resolve_addresses
 
 load_dotenv()
 
@@ -23,51 +31,40 @@ DB_CONFIG = {
 }
 
 def load_geocoded_addresses():
+    """Seed the shared geocode cache from homeowners_geocoded.csv (skipped if the CSV is unchanged)"""
     csv_path = '/Users/Studies/Projects/ds-abcdc-allston/fa25-team-a/data/processed/voter_data/homeowners_geocoded.csv'
     
     if not os.path.exists(csv_path):
-        return {}
+        return 0
     
-    df = pd.read_csv(csv_path)
+    df = pd.read_csv(csv_path, usecols=lambda c: c in {'Street .', 'Street Name', 'Zip', 'latitude', 'longitude'})
     df = df[df['latitude'].notna() & df['longitude'].notna()]
     
-    address_map = {}
-    for _, row in df.iterrows():
-        st_num = str(int(row['Street .'])) if pd.notna(row['Street .']) else ''
-        st_name = str(row['Street Name']).strip().upper() if pd.notna(row['Street Name']) else ''
-        address_key = f"{st_num} {st_name}".strip()
-        
-        if address_key and address_key not in address_map:
-            address_map[address_key] = (row['latitude'], row['longitude'])
+    st_num = pd.to_numeric(df['Street .'], errors='coerce').astype('Int64').astype(str).replace('<NA>', '')
+    addresses = (st_num + ' ' + df['Street Name'].fillna('').astype(str)).str.strip()
     
-    print(f"Loaded {len(address_map):,} geocoded addresses from CSV")
-    return address_map
+    # With the ZIP, seeded points also answer lookups that pass one
+    zip_codes = df['Zip'].tolist() if 'Zip' in df.columns else None
+    seeded = shared_cache().seed_forward(addresses.tolist(), df['latitude'].tolist(), df['longitude'].tolist(),
+                                         source='homeowners_geocoded.csv', modified=os.path.getmtime(csv_path),
+                                         zip_codes=zip_codes)
+    print(f"Seeded {seeded:,} geocoded addresses from CSV into the geocode cache")
+    return seeded
 
-def geocode_address(address, city='Boston', state='MA', zip_code=None):
-    try:
-        from geopy.geocoders import Nominatim
-        
-        geolocator = Nominatim(user_agent='abcdc_geocoder')
-        
-        full_address = f"{address}, {city}, {state}"
-        if zip_code:
-            full_address += f" {zip_code}"
-        
-        time.sleep(1.1)
-        location = geolocator.geocode(full_address, timeout=15)
-        
-        if location:
-            return location.latitude, location.longitude
-        return None, None
-    except ImportError:
-        return None, None
-    except Exception:
-        return None, None
+def cached_coordinates(address, zip_code=None):
+    """(lat, lon) from the local address points or the geocode cache without any network call, or None"""
+    local = geocode_local(address, zip_code)
+    if local:
+        return local[0], local[1]
+    entry = shared_cache().get_forward(address, zip_code)
+    if entry and entry['latitude'] is not None:
+        return entry['latitude'], entry['longitude']
+    return None
 
 def geocode_remaining_elderly():
     try:
         print("Loading geocoded addresses from CSV...")
-        geocoded_addresses = load_geocoded_addresses()
+        load_geocoded_addresses()
         
         print("Connecting to database...")
         conn = psycopg.connect(**DB_CONFIG)
@@ -113,68 +110,47 @@ def geocode_remaining_elderly():
         
         print("\n=== Step 1: Update from CSV geocoded addresses ===\n")
         
-        updated_from_csv = 0
-        for res_id, address, zip_code in unmapped_elderly:
-            if not address:
-                continue
-            
-            address_key = address.upper().strip()
-            if address_key in geocoded_addresses:
-                lat, lon = geocoded_addresses[address_key]
-                cursor.execute("""
-                    UPDATE voters
-                    SET latitude = %s, longitude = %s
-                    WHERE res_id = %s
-                """, (lat, lon, res_id))
-                updated_from_csv += 1
+        voter_groups = group_by_address(unmapped_elderly)
+        print(f"{len(unmapped_elderly):,} voters share {len(voter_groups):,} unique addresses")
         
+        local_coords = resolve_addresses(voter_groups, lambda address, zip_code: cached_coordinates(address, zip_code)
+                                         or (None, None), progress_every=0)
+        copy_coordinates(cursor, fan_out(voter_groups, local_coords))
+        cursor.execute("""
+            UPDATE voters v
+            SET latitude = g.latitude, longitude = g.longitude
+            FROM geocode_results g
+            WHERE v.res_id = g.id
+        """)
+        updated_from_csv = cursor.rowcount
         conn.commit()
-        print(f"✅ Updated {updated_from_csv:,} voters from CSV geocoded addresses")
+        print(f"✅ Updated {updated_from_csv:,} voters from local address points and cached geocodes")
         
         remaining_unmapped = len(unmapped_elderly) - updated_from_csv
         print(f"Remaining to geocode: {remaining_unmapped:,}")
         
         print("\n=== Step 2: Geocode buildings ===\n")
         
-        building_coords = {}
-        geocoded_buildings = 0
+        building_groups = group_by_address(
+            (struct_id, address, zip_code) for struct_id, address, zip_code, elderly_count in buildings_no_geom
+        )
+        print(f"{len(buildings_no_geom):,} buildings share {len(building_groups):,} unique addresses")
         
-        for struct_id, address, zip_code, elderly_count in buildings_no_geom:
-            if not address or address.strip() == '':
-                continue
-            
-            address_key = address.upper().strip()
-            
-            if address_key in geocoded_addresses:
-                lat, lon = geocoded_addresses[address_key]
-                building_coords[struct_id] = (lat, lon)
-                print(f"  ✅ {struct_id}: Found in CSV ({elderly_count} elderly)")
-            else:
-                zip_val = str(int(zip_code)) if zip_code else None
-                print(f"  Geocoding {struct_id}: {address}... ({elderly_count} elderly)")
-                lat, lon = geocode_address(address, 'Boston', 'MA', zip_val)
-                
-                if lat and lon:
-                    building_coords[struct_id] = (lat, lon)
-                    geocoded_buildings += 1
-                    print(f"    ✅ Got coordinates: ({lat:.6f}, {lon:.6f})")
-                else:
-                    print(f"    ❌ Failed to geocode")
-        
-        print(f"\n✅ Geocoded {geocoded_buildings} buildings (others found in CSV)")
+        building_coords = geocode_groups(building_groups, cached_coordinates)
+        print(f"\n✅ Located {len(building_coords)} of {len(building_groups)} building addresses")
         
         if building_coords:
             print("\nUpdating voters mapped to geocoded buildings...")
-            for struct_id, (lat, lon) in building_coords.items():
-                cursor.execute("""
-                    UPDATE voters v
-                    SET latitude = %s, longitude = %s
-                    FROM voters_buildings_map vbm
-                    WHERE v.res_id = vbm.res_id
-                    AND vbm.struct_id = %s
-                    AND v.is_elderly = true
-                    AND (v.latitude IS NULL OR v.longitude IS NULL)
-                """, (lat, lon, struct_id))
+            copy_coordinates(cursor, fan_out(building_groups, building_coords))
+            cursor.execute("""
+                UPDATE voters v
+                SET latitude = g.latitude, longitude = g.longitude
+                FROM voters_buildings_map vbm
+                JOIN geocode_results g ON g.id = vbm.struct_id
+                WHERE v.res_id = vbm.res_id
+                AND v.is_elderly = true
+                AND (v.latitude IS NULL OR v.longitude IS NULL)
+            """)
             
             updated_from_buildings = cursor.rowcount
             conn.commit()
@@ -198,42 +174,26 @@ def geocode_remaining_elderly():
                 ORDER BY v.res_id
             """)
             remaining_voters = cursor.fetchall()
+            remaining_groups = group_by_address(remaining_voters)
             
-            estimated_time = remaining_unmapped * 1.1 / 60
-            print(f"Estimated time: ~{estimated_time:.1f} minutes")
+            print(f"{len(remaining_voters):,} voters share {len(remaining_groups):,} unique addresses")
             print("Starting geocoding...\n")
             
-            geocoded_voters = 0
-            failed_voters = 0
-            
-            for i, (res_id, address, zip_code) in enumerate(remaining_voters, 1):
-                if not address or address.strip() == '':
-                    continue
-                
-                address_key = address.upper().strip()
-                if address_key in geocoded_addresses:
-                    lat, lon = geocoded_addresses[address_key]
-                else:
-                    zip_val = str(int(zip_code)) if zip_code else None
-                    lat, lon = geocode_address(address, 'Boston', 'MA', zip_val)
-                
-                if lat and lon:
-                    cursor.execute("""
-                        UPDATE voters
-                        SET latitude = %s, longitude = %s
-                        WHERE res_id = %s
-                    """, (lat, lon, res_id))
-                    geocoded_voters += 1
-                else:
-                    failed_voters += 1
-                
-                if i % 50 == 0:
-                    conn.commit()
-                    print(f"Progress: {i}/{remaining_unmapped} ({i/remaining_unmapped*100:.1f}%) - Geocoded: {geocoded_voters}, Failed: {failed_voters}")
+            voter_coords = geocode_groups(remaining_groups, cached_coordinates)
             
+            copy_coordinates(cursor, fan_out(remaining_groups, voter_coords))
+            cursor.execute("""
+                UPDATE voters v
+                SET latitude = g.latitude, longitude = g.longitude
+                FROM geocode_results g
+                WHERE v.res_id = g.id
+            """)
+            geocoded_voters = cursor.rowcount
             conn.commit()
+            failed_voters = len(remaining_voters) - geocoded_voters
             
-            print(f"\n✅ Geocoded {geocoded_voters:,} individual elderly voters")
+            print(f"\n✅ Geocoded {geocoded_voters:,} individual elderly voters "
+                  f"({len(voter_coords):,} of {len(remaining_groups):,} unique addresses)")
             print(f"❌ Failed to geocode {failed_voters:,} voters")
         
         print("\n=== FINAL STATISTICS ===\n")
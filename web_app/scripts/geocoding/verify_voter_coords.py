@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Script to verify every voter coordinate against building footprints and parcels
+
+Voter coordinates come from Nominatim, building centroids, parcel centroids
+and parcel vertices, and nothing checked that they agree. This script loads
+all voters, footprints and parcels once, builds STRtrees over the footprints
+and parcels (EPSG:26986, meters) and, in one vectorized pass:
+
+- tests each point for containment in the voter's mapped building
+  (or in its parcel when the building has no footprint) and measures how
+  far off it is
+- snaps a point to the footprint's (or parcel's) representative point when
+  that is safe: it is within --snap-distance meters and not inside some
+  other building
+- fills missing coordinates from the mapped footprint or parcel
+
+Each voter gets a coord_quality code (see QUALITY_CODES) and coord_offset_m.
+The results go back with one COPY and one UPDATE ... FROM.
+
+Usage:
+    python web_app/scripts/geocoding/verify_voter_coords.py --dry-run
+    python web_app/scripts/geocoding/verify_voter_coords.py --snap-distance 25
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import psycopg
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'dbname': os.getenv('DB_NAME', 'abcdc_spatial'),
+    'user': os.getenv('DB_USER', 'Studies'),
+    'password': os.getenv('DB_PASSWORD', ''),
+    'port': os.getenv('DB_PORT', '5432')
+}
+
+# Massachusetts State Plane (meters)
+METRIC_CRS = 'EPSG:26986'
+
+QUALITY_CODES = {
+    'in_building': 'Inside the mapped building footprint',
+    'snapped_to_building': 'Near the mapped footprint, moved to its representative point',
+    'in_other_building': 'Inside a different building than the mapped one (left as is)',
+    'far_from_building': 'Farther than the snap distance from the mapped footprint (left as is)',
+    'in_parcel': 'Inside the mapped parcel (building has no footprint)',
+    'snapped_to_parcel': 'Near the mapped parcel, moved to its representative point',
+    'far_from_parcel': 'Farther than the snap distance from the mapped parcel (left as is)',
+    'filled_from_building': 'No coordinates, set to the footprint representative point',
+    'filled_from_parcel': 'No coordinates, set to the parcel representative point',
+    'unmapped': 'No mapped building or parcel geometry to check against',
+    'missing': 'No coordinates and nothing to fill them from',
+}
+
+def _representative_lonlat(projected):
+    points = projected.representative_point().to_crs(epsg=4326)
+    return points.x.values, points.y.values
+
+def _containment(tree, points, candidates, mapped):
+    """
+    (inside mapped geometry, inside any geometry) for points[candidates]
+    """
+    inside_mapped = np.zeros(len(points), dtype=bool)
+    inside_any = np.zeros(len(points), dtype=bool)
+    point_idx, tree_idx = tree.query(points[candidates], predicate='within')
+    point_idx = candidates[point_idx]
+    inside_any[point_idx] = True
+    inside_mapped[point_idx[tree_idx == mapped[point_idx]]] = True
+    return inside_mapped, inside_any
+
+def verify_voter_points(voters, buildings, parcels, snap_distance_m=25.0):
+    """
+    Quality-check voter points against their mapped footprint / parcel.
+
+    Args:
+        voters: DataFrame with res_id, latitude, longitude, struct_id, parcel_id
+        buildings: GeoDataFrame with struct_id and footprint geometry
+        parcels: GeoDataFrame with parcel_id and polygon geometry
+        snap_distance_m: Largest offset that is snapped to the representative point
+
+    Returns:
+        DataFrame with res_id, latitude, longitude (after snapping or filling),
+        coord_quality and coord_offset_m, in the order of `voters`
+    """
+    import geopandas as gpd
+    import shapely
+    from shapely import STRtree
+
+    n = len(voters)
+    latitude = pd.to_numeric(voters['latitude'], errors='coerce').to_numpy(dtype=float, copy=True)
+    longitude = pd.to_numeric(voters['longitude'], errors='coerce').to_numpy(dtype=float, copy=True)
+    has_coords = ~(np.isnan(latitude) | np.isnan(longitude))
+    located = np.flatnonzero(has_coords)
+
+    points = np.full(n, None, dtype=object)
+    points[located] = gpd.GeoSeries.from_xy(longitude[located], latitude[located],
+                                            crs='EPSG:4326').to_crs(METRIC_CRS).values
+
+    buildings = buildings.to_crs(METRIC_CRS).reset_index(drop=True)
+    parcels = parcels.to_crs(METRIC_CRS).reset_index(drop=True)
+    building_geoms = buildings.geometry.values
+    parcel_geoms = parcels.geometry.values
+    mapped_building = pd.Index(buildings['struct_id'].astype(str)).get_indexer(voters['struct_id'].astype(str))
+    mapped_parcel = pd.Index(parcels['parcel_id'].astype(str)).get_indexer(voters['parcel_id'].astype(str))
+    has_building = mapped_building >= 0
+    has_parcel = mapped_parcel >= 0
+
+    in_building, in_any_building = _containment(STRtree(building_geoms), points, located, mapped_building)
+    in_parcel, _ = _containment(STRtree(parcel_geoms), points, located, mapped_parcel)
+
+    building_offset = np.full(n, np.nan)
+    check = has_coords & has_building
+    building_offset[check] = shapely.distance(building_geoms[mapped_building[check]], points[check])
+    parcel_offset = np.full(n, np.nan)
+    check = has_coords & has_parcel
+    parcel_offset[check] = shapely.distance(parcel_geoms[mapped_parcel[check]], points[check])
+
+    near_building = building_offset <= snap_distance_m
+    near_parcel = parcel_offset <= snap_distance_m
+    quality = np.select(
+        [
+            ~has_coords & has_building,
+            ~has_coords & has_parcel,
+            ~has_coords,
+            in_building,
+            has_building & in_any_building,
+            has_building & near_building,
+            has_building,
+            has_parcel & in_parcel,
+            has_parcel & near_parcel,
+            has_parcel,
+        ],
+        ['filled_from_building', 'filled_from_parcel', 'missing', 'in_building', 'in_other_building',
+         'snapped_to_building', 'far_from_building', 'in_parcel', 'snapped_to_parcel', 'far_from_parcel'],
+        default='unmapped',
+    )
+
+    building_lon, building_lat = _representative_lonlat(buildings.geometry)
+    parcel_lon, parcel_lat = _representative_lonlat(parcels.geometry)
+    for codes, index, rep_lon, rep_lat in (
+        (('filled_from_building', 'snapped_to_building'), mapped_building, building_lon, building_lat),
+        (('filled_from_parcel', 'snapped_to_parcel'), mapped_parcel, parcel_lon, parcel_lat),
+    ):
+        move = np.isin(quality, codes)
+        longitude[move] = rep_lon[index[move]]
+        latitude[move] = rep_lat[index[move]]
+
+    return pd.DataFrame({
+        'res_id': voters['res_id'].values,
+        'latitude': latitude,
+        'longitude': longitude,
+        'coord_quality': quality,
+        'coord_offset_m': np.round(np.where(has_building, building_offset, parcel_offset), 2),
+    })
+
+def load_inputs(cursor):
+    """
+    Voters with their mapped building / parcel, plus all footprints and parcels
+    """
+    import geopandas as gpd
+    import shapely
+
+    # A voter mapped to several buildings is checked against one with a footprint, if any
+    cursor.execute("""
+        SELECT DISTINCT ON (v.res_id)
+            v.res_id, v.latitude, v.longitude, vbm.struct_id, b.parcel_id
+        FROM voters v
+        LEFT JOIN voters_buildings_map vbm ON vbm.res_id = v.res_id
+        LEFT JOIN buildings b ON b.struct_id = vbm.struct_id
+        ORDER BY v.res_id, b.geometry IS NULL
+    """)
+    voters = pd.DataFrame(cursor.fetchall(), columns=['res_id', 'latitude', 'longitude', 'struct_id', 'parcel_id'])
+
+    frames = []
+    for table, id_column in (('buildings', 'struct_id'), ('parcels', 'parcel_id')):
+        cursor.execute(f"SELECT {id_column}, ST_AsBinary(geometry) FROM {table} WHERE geometry IS NOT NULL")
+        rows = cursor.fetchall()
+        frames.append(gpd.GeoDataFrame(
+            {id_column: [row[0] for row in rows]},
+            geometry=shapely.from_wkb([bytes(row[1]) for row in rows]), crs='EPSG:4326'))
+    return voters, frames[0], frames[1]
+
+def write_results(cursor, results):
+    """
+    One COPY into a temp table and one UPDATE of voters
+    """
+    cursor.execute("ALTER TABLE voters ADD COLUMN IF NOT EXISTS coord_quality VARCHAR(30)")
+    cursor.execute("ALTER TABLE voters ADD COLUMN IF NOT EXISTS coord_offset_m DOUBLE PRECISION")
+    cursor.execute("""
+        CREATE TEMP TABLE voter_coord_checks (
+            res_id VARCHAR(50) PRIMARY KEY,
+            latitude DOUBLE PRECISION,
+            longitude DOUBLE PRECISION,
+            coord_quality VARCHAR(30),
+            coord_offset_m DOUBLE PRECISION
+        ) ON COMMIT DROP
+    """)
+    with cursor.copy("COPY voter_coord_checks FROM STDIN") as copy:
+        for row in results.itertuples(index=False):
+            copy.write_row((row.res_id,
+                            None if np.isnan(row.latitude) else row.latitude,
+                            None if np.isnan(row.longitude) else row.longitude,
+                            row.coord_quality,
+                            None if np.isnan(row.coord_offset_m) else row.coord_offset_m))
+    cursor.execute("""
+        UPDATE voters v
+        SET latitude = c.latitude,
+            longitude = c.longitude,
+            coord_quality = c.coord_quality,
+            coord_offset_m = c.coord_offset_m
+        FROM voter_coord_checks c
+        WHERE v.res_id = c.res_id
+    """)
+    return cursor.rowcount
+
+def verify_voter_coords(snap_distance_m=25.0, dry_run=False, output_csv=None):
+    try:
+        print("Connecting to database...")
+        conn = psycopg.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+
+        print("Loading voters, building footprints and parcels...")
+        voters, buildings, parcels = load_inputs(cursor)
+        print(f"Loaded {len(voters):,} voters, {len(buildings):,} footprints, {len(parcels):,} parcels")
+
+        start = time.perf_counter()
+        results = verify_voter_points(voters, buildings, parcels, snap_distance_m=snap_distance_m)
+        print(f"⚡ Verified {len(results):,} voter points in {time.perf_counter() - start:.2f}s\n")
+
+        for code, count in results['coord_quality'].value_counts().items():
+            print(f"   {code:22s} {count:>7,}  {QUALITY_CODES[code]}")
+
+        if output_csv:
+            results.to_csv(output_csv, index=False)
+            print(f"\n💾 Saved per-voter results to {output_csv}")
+
+        if dry_run:
+            print("\nDry run - database not updated")
+        else:
+            updated = write_results(cursor, results)
+            conn.commit()
+            print(f"\n✅ Updated {updated:,} voters with coord_quality / coord_offset_m")
+
+        conn.close()
+        return True
+
+    except Exception as e:
+        print(f"❌ Error verifying voter coordinates: {e}")
+        import traceback
+        traceback.print_exc()
+        if 'conn' in locals():
+            conn.rollback()
+            conn.close()
+        return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Verify and snap voter coordinates against building footprints')
+    parser.add_argument('--snap-distance', type=float, default=25.0,
+                        help='Largest offset in meters that is snapped to the footprint')
+    parser.add_argument('--dry-run', action='store_true', help='Report only, do not update voters')
+    parser.add_argument('--output-csv', default=None, help='Also save per-voter results to this CSV')
+    args = parser.parse_args()
+
+    success = verify_voter_coords(args.snap_distance, args.dry_run, args.output_csv)
+    sys.exit(0 if success else 1)